@@ -0,0 +1,88 @@
+"""Benchmark the `lensort` implementations on a large generated input.
+
+Usage:
+    python benchmarks/lensort.py [LINES]
+"""
+
+import random
+import re
+import sys
+from bisect import bisect_right
+from itertools import accumulate
+from itertools import repeat as forever
+from operator import add
+from timeit import repeat
+
+from pygeneral.sort import lensort
+
+
+def two_pass(lines: str, regex: str) -> str:
+    """The original implementation: per-line `re.search` and two sorts."""
+
+    def len_to_match(line: str) -> int:
+        match = re.search(regex, line)
+        return match.start() if match else 0
+
+    as_list = lines.splitlines()
+    as_list.sort(key=len)
+    as_list.sort(key=len_to_match)
+    return "\n".join(as_list)
+
+
+def whole_buffer(lines: str, regex: str) -> str:
+    """One `finditer` over the whole text instead of a search per line.
+
+    The line of each match is found by bisecting the line start offsets. This
+    is only exact when the text is separated by `\\n` only and the pattern
+    cannot match a line break nor look beyond one.
+    """
+    as_list = lines.splitlines()
+    lengths = list(map(len, as_list))
+    starts = list(accumulate(map(add, lengths, forever(1)), initial=0))
+    positions = list(
+        map(re.Match.start, re.finditer(regex, lines, re.MULTILINE))
+    )
+    indices = map(bisect_right, forever(starts), positions)
+    first = dict(zip(reversed(list(indices)), reversed(positions)))
+    offsets = [0] * len(as_list)
+    for index, position in first.items():
+        offsets[index - 1] = position - starts[index - 1]
+
+    stride = max(lengths, default=0) + 1
+    keys = [
+        offset * stride + length for offset, length in zip(offsets, lengths)
+    ]
+    order = sorted(range(len(as_list)), key=keys.__getitem__)
+    return "\n".join(map(as_list.__getitem__, order))
+
+
+def make_text(count: int, seed: int = 0) -> str:
+    """Return `count` random assignment-like lines joined by a newline."""
+    rng = random.Random(seed)
+    separators = ["=", " = ", "==", ""]
+    lines = []
+    for _ in range(count):
+        name = "x" * rng.randint(0, 30)
+        value = "y" * rng.randint(0, 30)
+        lines.append(f"{name}{rng.choice(separators)}{value}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Time each implementation and print the best of a few runs."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    text = make_text(count)
+    functions = [("lensort", lensort), ("whole_buffer", whole_buffer)]
+    for _, function in functions:
+        if two_pass(text, "=") != function(text, "="):
+            raise AssertionError("Implementations disagree.")
+
+    baseline = min(repeat(lambda: two_pass(text, "="), number=1, repeat=3))
+    print(f"two_pass: {baseline:.3f}s ({count} lines)")
+    for name, function in functions:
+        best = min(repeat(lambda: function(text, "="), number=1, repeat=3))
+        print(f"{name}: {best:.3f}s ({baseline / best:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
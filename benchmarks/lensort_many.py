@@ -0,0 +1,68 @@
+"""Benchmark sorting many small texts with the same regular expression.
+
+Usage:
+    python benchmarks/lensort_many.py [TEXTS] [LINES]
+"""
+
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from timeit import repeat
+
+from pygeneral.sort import LenSorter, lensort, lensort_many
+
+
+def make_texts(count: int, lines: int, seed: int = 0) -> list[str]:
+    """Return `count` texts of `lines` random assignment-like lines."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        block = []
+        for _ in range(lines):
+            name = "x" * rng.randint(1, 20)
+            value = "y" * rng.randint(0, 20)
+            block.append(f"{name} = {value}")
+        texts.append("\n".join(block))
+    return texts
+
+
+def main() -> None:
+    """Time each approach and print the best of a few runs."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    texts = make_texts(count, lines)
+    sorter = LenSorter("=")
+    expected = [lensort(text, "=") for text in texts]
+
+    def loop() -> list[str]:
+        return [lensort(text, "=") for text in texts]
+
+    def many() -> list[str]:
+        return lensort_many(texts, "=")
+
+    def reused() -> list[str]:
+        return sorter.sort_many(texts)
+
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+
+        def processes() -> list[str]:
+            return sorter.sort_many(texts, executor, chunksize=256)
+
+        functions = [
+            ("lensort_many", many),
+            ("LenSorter.sort_many", reused),
+            (f"LenSorter.sort_many ({workers} processes)", processes),
+        ]
+        baseline = min(repeat(loop, number=1, repeat=15))
+        print(f"lensort loop: {baseline:.3f}s ({count}x{lines} lines)")
+        for name, function in functions:
+            if function() != expected:
+                raise AssertionError(f"{name} disagrees with lensort.")
+            best = min(repeat(function, number=1, repeat=15))
+            print(f"{name}: {best:.3f}s ({baseline / best:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark the binary mode of stream_subprocess against `cat`.
+
+The producer is `yes`, limited to LINES lines of two bytes by `head`. Its
+output is copied to /dev/null by `cat` and by stream_subprocess.
+
+Usage:
+    python benchmarks/stream_binary.py [LINES]
+"""
+
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+
+from pygeneral.process import stream_subprocess
+
+
+def main() -> None:
+    """Print the throughput of each way of copying the output."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000
+    producer = f"yes | head -n {lines}"
+    command = ["sh", "-c", producer]
+    print(f"{lines} lines")
+
+    with open(os.devnull, "w") as text, open(os.devnull, "wb") as raw:
+        variants: list[tuple[str, Callable[[], object]]] = [
+            (
+                "cat",
+                lambda: subprocess.run(
+                    ["sh", "-c", f"{producer} | cat"],
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                ),
+            ),
+            (
+                "binary, thread",
+                lambda: stream_subprocess(command, raw, binary=True),
+            ),
+            (
+                "binary, selector",
+                lambda: stream_subprocess(
+                    command, raw, binary=True, engine="selector"
+                ),
+            ),
+            ("text, thread", lambda: stream_subprocess(command, text)),
+            (
+                "text, selector",
+                lambda: stream_subprocess(command, text, engine="selector"),
+            ),
+        ]
+        for name, function in variants:
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {lines / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
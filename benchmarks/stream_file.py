@@ -0,0 +1,45 @@
+"""Benchmark stream_subprocess writing to a file with and without zero-copy.
+
+The producer is `yes`, limited to LINES lines of two bytes by `head`. Its
+output is streamed to a temporary file, and the wall time and the CPU time
+of this process are printed for each variant.
+
+Usage:
+    python benchmarks/stream_file.py [LINES]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pygeneral.process import stream_subprocess
+
+
+def main() -> None:
+    """Print the throughput and CPU time of each variant."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000
+    command = ["sh", "-c", f"yes | head -n {lines}"]
+    print(f"{lines} lines")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "out"
+        for binary in (True, False):
+            for zero_copy in (True, False):
+                with open(path, "wb" if binary else "w") as file:
+                    start = time.perf_counter()
+                    cpu = time.process_time()
+                    stream_subprocess(
+                        command, file, binary=binary, zero_copy=zero_copy
+                    )
+                    cpu = time.process_time() - cpu
+                    elapsed = time.perf_counter() - start
+                mode = "binary" if binary else "text"
+                print(
+                    f"{mode}, zero_copy={zero_copy}: "
+                    f"{lines / elapsed:,.0f} lines/s, {cpu:.2f} s CPU"
+                )
+
+
+if __name__ == "__main__":
+    main()
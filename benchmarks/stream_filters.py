@@ -0,0 +1,60 @@
+"""Benchmark the filter stages of stream_subprocess against sink filters.
+
+The child prints LINES log lines, half of them debug lines and the other
+half with a secret. Four sinks receive the lines without the debug lines
+and with the secrets redacted: once by filtering in each sink, and once by
+the filter stages of stream_subprocess, which run once per line.
+
+Usage:
+    python benchmarks/stream_filters.py [LINES]
+"""
+
+import re
+import sys
+import time
+from collections.abc import Callable
+
+from pygeneral.process import Exclude, Redact, stream_subprocess
+
+SINKS = 4
+
+
+def main() -> None:
+    """Print the throughput of both ways and the time of each stage."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    command = [
+        sys.executable,
+        "-c",
+        (
+            f"for i in range({lines // 2}):\n"
+            "    print(f'DEBUG {i}')\n"
+            "    print(f'INFO {i} token=secret{i}')"
+        ),
+    ]
+    print(f"{lines} lines, {SINKS} sinks")
+
+    debug = re.compile("^DEBUG")
+    secret = re.compile(r"secret\d+")
+    output: list[str] = []
+
+    def filtering_sink(line: str) -> None:
+        if not debug.search(line):
+            output.append(secret.sub("***", line))
+
+    start = time.perf_counter()
+    stream_subprocess(command, [filtering_sink] * SINKS)
+    elapsed = time.perf_counter() - start
+    print(f"sink filters: {lines / elapsed:,.0f} lines/s")
+
+    stages = [Exclude("^DEBUG"), Redact(r"secret\d+")]
+    sinks: list[Callable[[str], None]] = [output.append] * SINKS
+    start = time.perf_counter()
+    stream_subprocess(command, sinks, filters=stages)
+    elapsed = time.perf_counter() - start
+    print(f"filter stages: {lines / elapsed:,.0f} lines/s")
+    for stage in stages:
+        print(f"  {stage}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark the output latency of stream_subprocess with pipes and ptys.
+
+The child prints the current time LINES times, sleeping INTERVAL seconds
+in between, without flushing. Through a pipe, its output is block buffered
+and arrives when the buffer is full or the child exits. Through a pseudo-
+terminal, it is line buffered. The latency is the time between printing a
+line and receiving it in the sink.
+
+Usage:
+    python benchmarks/stream_latency.py [LINES] [INTERVAL]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+from pygeneral.process import stream_subprocess
+
+
+def main() -> None:
+    """Print the latency statistics of each mode."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    command = [
+        sys.executable,
+        "-c",
+        (
+            "import time\n"
+            f"for _ in range({lines}):\n"
+            "    print(time.time())\n"
+            f"    time.sleep({interval})"
+        ),
+    ]
+    # Unbuffered output would hide the buffering of the child.
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONUNBUFFERED"}
+    print(f"{lines} lines, {interval} s apart")
+
+    for name, pty in (("pipe", False), ("pty", True)):
+        latencies: list[float] = []
+
+        def sink(line: str) -> None:
+            latencies.append(time.time() - float(line))
+
+        stream_subprocess(command, sink, pty=pty, env=env)
+        print(
+            f"{name}: mean {statistics.mean(latencies) * 1000:.1f} ms, "
+            f"median {statistics.median(latencies) * 1000:.1f} ms, "
+            f"max {max(latencies) * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
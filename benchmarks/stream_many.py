@@ -0,0 +1,55 @@
+"""Benchmark running a batch of commands serially and with stream_many.
+
+Each command is a Python child that prints LINES lines and sleeps for a
+short while, like a small build or test step.
+
+Usage:
+    python benchmarks/stream_many.py [COMMANDS] [LINES]
+"""
+
+import os
+import sys
+import time
+
+from pygeneral.process import stream_many, stream_subprocess
+
+CHILD = """
+import time
+for i in range({lines}):
+    print(i)
+time.sleep(0.05)
+"""
+
+
+def main() -> None:
+    """Print the wall time of each approach."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    command = [sys.executable, "-c", CHILD.format(lines=lines)]
+    commands = [command] * count
+    received: list[str] = []
+    print(f"{count} commands x {lines} lines, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    for command in commands:
+        stream_subprocess(command, received.append)
+    serial = time.perf_counter() - start
+    print(f"stream_subprocess loop: {serial:.2f}s")
+
+    for max_parallel in (None, 4 * (os.cpu_count() or 1)):
+        received.clear()
+        start = time.perf_counter()
+        results = stream_many(
+            commands, received.append, max_parallel=max_parallel
+        )
+        elapsed = time.perf_counter() - start
+        if any(results.values()) or len(received) != count * lines:
+            raise AssertionError("stream_many lost output.")
+        print(
+            f"stream_many ({max_parallel=}): {elapsed:.2f}s "
+            f"({serial / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
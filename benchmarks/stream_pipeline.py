@@ -0,0 +1,51 @@
+"""Benchmark stream_pipeline against a shell pipeline.
+
+The pipeline is `yes | head -n LINES | tr y n`. Its output is streamed to
+/dev/null by stream_subprocess running it in a shell, and by
+stream_pipeline, which connects the same commands with OS pipes.
+
+Usage:
+    python benchmarks/stream_pipeline.py [LINES]
+"""
+
+import os
+import sys
+import time
+from collections.abc import Callable
+
+from pygeneral.process import stream_pipeline, stream_subprocess
+
+
+def main() -> None:
+    """Print the throughput of each way of running the pipeline."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000
+    commands = [["yes"], ["head", "-n", str(lines)], ["tr", "y", "n"]]
+    shell = " | ".join(" ".join(command) for command in commands)
+    print(f"{lines} lines")
+
+    with open(os.devnull, "w") as text, open(os.devnull, "wb") as raw:
+        variants: list[tuple[str, Callable[[], object]]] = [
+            (
+                "shell, binary",
+                lambda: stream_subprocess(
+                    ["sh", "-c", shell], raw, binary=True
+                ),
+            ),
+            (
+                "pipeline, binary",
+                lambda: stream_pipeline(commands, raw, binary=True),
+            ),
+            (
+                "pipeline, text, no zero-copy",
+                lambda: stream_pipeline(commands, text, zero_copy=False),
+            ),
+        ]
+        for name, function in variants:
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {lines / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
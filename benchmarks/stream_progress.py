@@ -0,0 +1,75 @@
+"""Benchmark the coalescing of progress updates by stream_subprocess.
+
+The child writes UPDATES progress updates that end with "\\r", like curl or
+pip do. They are streamed to /dev/null through a sink that counts its
+writes and issues a system call per flush, like a terminal, with and
+without coalescing. The CPU time is the time spent by this process.
+
+Usage:
+    python benchmarks/stream_progress.py [UPDATES]
+"""
+
+import os
+import sys
+import time
+
+from pygeneral.process import stream_subprocess
+
+
+class DevNull:
+    """A text sink that writes to /dev/null when it is flushed."""
+
+    writes: int
+    _fd: int
+    _pending: list[str]
+
+    def __init__(self) -> None:
+        self.writes = 0
+        self._fd = os.open(os.devnull, os.O_WRONLY)
+        self._pending = []
+
+    def __enter__(self) -> "DevNull":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        os.close(self._fd)
+
+    def write(self, line: str) -> None:
+        self.writes += 1
+        self._pending.append(line)
+
+    def flush(self) -> None:
+        os.write(self._fd, "".join(self._pending).encode())
+        self._pending.clear()
+
+
+def main() -> None:
+    """Print the sink writes and the duration with and without coalescing."""
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    command = [
+        sys.executable,
+        "-c",
+        (
+            "import sys\n"
+            f"for i in range({updates}): sys.stdout.write(f'{{i}}\\r')\n"
+            "print('done')"
+        ),
+    ]
+    print(f"{updates} updates")
+
+    for name, progress in (("every update", None), ("coalesced", 0.1)):
+        sink = DevNull()
+        start = time.perf_counter()
+        cpu = time.process_time()
+        with sink:
+            stream_subprocess(command, sink, progress=progress)
+        cpu = time.process_time() - cpu
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {sink.writes:,} sink writes, {elapsed:.2f} s, "
+            f"{cpu:.2f} s CPU"
+        )
+
+
+if __name__ == "__main__":
+    main()
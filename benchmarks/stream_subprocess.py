@@ -0,0 +1,67 @@
+"""Benchmark the engines of stream_subprocess under a thread pool.
+
+Each engine runs COMMANDS children concurrently, each printing LINES lines
+to stdout and to stderr. The throughput in lines per second and the peak
+number of threads are printed.
+
+Usage:
+    python benchmarks/stream_subprocess.py [COMMANDS] [LINES]
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pygeneral.process import stream_subprocess
+
+CHILD = """
+import sys
+line = "x" * 60 + "\\n"
+for _ in range({lines}):
+    sys.stdout.write(line)
+    sys.stderr.write(line)
+"""
+
+
+def run(engine: str, commands: int, lines: int) -> tuple[float, int]:
+    """Return the lines per second and the peak thread count of `engine`."""
+    command = [sys.executable, "-c", CHILD.format(lines=lines)]
+    peak = threading.active_count()
+    received = 0
+    lock = threading.Lock()
+
+    def sink(_: str) -> None:
+        nonlocal peak, received
+        with lock:
+            received += 1
+            if received % 1000 == 0:
+                peak = max(peak, threading.active_count())
+
+    def one(_: int) -> int:
+        return stream_subprocess(command, sink, sink, engine=engine)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(commands) as executor:
+        codes = list(executor.map(one, range(commands)))
+    elapsed = time.perf_counter() - start
+
+    if any(codes) or received != 2 * commands * lines:
+        raise AssertionError(f"{engine} lost output: {received=}, {codes=}")
+    return received / elapsed, peak
+
+
+def main() -> None:
+    """Print the best of a few runs for each engine."""
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    print(f"{commands} commands x {lines} lines on stdout and stderr")
+    for engine in ("thread", "selector"):
+        results = [run(engine, commands, lines) for _ in range(3)]
+        rate = max(rate for rate, _ in results)
+        peak = max(peak for _, peak in results)
+        print(f"{engine}: {rate:,.0f} lines/s, peak {peak} threads")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
+"""
+Command line interface of `lensort`.
+
+As this command is typically called once per file by editors and hooks, its
+start-up time matters. Modules that are only needed by some of the options
+are therefore imported where they are used, and nothing is written to the
+file system unless `--log-file` is given. `tests/test_lensort.py` checks this
+against a budget.
+"""
+
 import logging
+import os
+import stat
 import sys
 from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
-from sys import stdin
+from collections.abc import Iterable
+from itertools import repeat
+from sys import stdin, stdout
+from typing import IO, AnyStr
 
-from pygeneral import log
-from pygeneral.sort import lensort
+from pygeneral.sort import lensort, lensort_bytes, lensort_stream
 
 _DESCRIPTION = """
 Sort lines of text based on the number of characters before a regular
@@ -27,6 +41,20 @@ If our input was located in a file called `input.txt', we could use the
 following command to sort the text when using bash:
 
     lensort '=' < input.txt
+
+Inputs that do not fit in memory can be sorted with the `--stream' option.
+The input is then sorted in chunks of at most `--buffer-size' bytes, which are
+merged afterwards using temporary files. Large files can also be sorted with
+the `--bytes' option, which memory-maps the file and sorts the offsets of the
+lines instead of the lines themselves.
+
+Multiple files, or glob patterns such as `src/**/*.conf', can be given after
+the regular expression. With `--in-place', each file is sorted and replaced
+atomically, unless it is sorted already. With `--check', nothing is written
+and the exit code is 1 if any file is not sorted, which is useful as a
+pre-commit hook:
+
+    lensort '=' --check 'config/**/*.conf'
 """
 
 
@@ -34,7 +62,6 @@ def main():
     """Entrypoint"""
     try:
         _main()
-        log.setup("lensort")
     except Exception as error:
         logging.critical(error)
         sys.exit(1)
@@ -43,13 +70,58 @@ def main():
 def _main():
     """Entrypoint without error handling."""
     parser: ArgumentParser = _make_parser()
-    args: Namespace = parser.parse_args()
-    logging.basicConfig(level=parser.parse_args().loglevel)
+    args: Namespace = parser.parse_intermixed_args()
+    if args.log_file:
+        from pygeneral import log
+
+        level: int = logging.getLevelNamesMapping()[args.loglevel]
+        log.setup(None, args.log_file, loglevel=level)
+    else:
+        logging.basicConfig(level=args.loglevel)
+
+    paths: list[str] = _expand_paths(args.paths)
+    if args.file:
+        paths.insert(0, args.file)
+
+    if args.check or args.in_place:
+        if not paths:
+            parser.error("--check and --in-place require at least one file.")
+        if args.head is not None or args.bytes or args.stream:
+            parser.error(
+                "--head, --bytes and --stream cannot be combined with"
+                " --check or --in-place."
+            )
+        unsorted: list[str] = _rewrite_files(paths, args)
+        if args.check and unsorted:
+            sys.exit(1)
+        return
+
+    for path in paths or [None]:
+        _sort(args, path)
+
+
+def _sort(args: Namespace, path: str | None) -> None:
+    """
+    Sort a single file, or stdin if `path` is None, and print the result.
+
+    Args:
+    ----
+        args: the parsed command line arguments.
+        path: the path to the file.
 
-    text: str = _read(args.file) if args.file else stdin.read()
+    """
+    if args.bytes:
+        _sort_bytes(args, path)
+        return
+
+    if args.stream:
+        _stream(args, path)
+        return
+
+    text: str = _read(path) if path else stdin.read()
     logging.debug("Input text: %s", text)
 
-    sorted_text: str = lensort(text, args.regex)
+    sorted_text: str = lensort(text, args.regex, args.jobs, args.head)
     logging.debug("Sorted text: %s", sorted_text)
 
     print(sorted_text)
@@ -74,6 +146,16 @@ def _make_parser() -> ArgumentParser:
         "regex", type=str, help="The regular expression to sort the text by."
     )
 
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATH",
+        help=(
+            "Files or glob patterns of files to sort. If not provided, text "
+            "is read from stdin."
+        ),
+    )
+
     parser.add_argument(
         "-l",
         "--loglevel",
@@ -83,6 +165,15 @@ def _make_parser() -> ArgumentParser:
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
     )
 
+    parser.add_argument(
+        "--log-file",
+        type=str,
+        help=(
+            "Also write the log to this file, which is rotated when it grows "
+            "large. If not provided, the log is only written to stderr."
+        ),
+    )
+
     parser.add_argument(
         "-f",
         "--file",
@@ -93,9 +184,160 @@ def _make_parser() -> ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "-i",
+        "--in-place",
+        action="store_true",
+        help=(
+            "Replace the files by their sorted text instead of printing it. "
+            "Files that are sorted already are not written."
+        ),
+    )
+
+    parser.add_argument(
+        "-c",
+        "--check",
+        action="store_true",
+        help=(
+            "Do not write anything, but exit with code 1 if any of the files "
+            "is not sorted."
+        ),
+    )
+
+    parser.add_argument(
+        "-n",
+        "--head",
+        type=int,
+        metavar="N",
+        help="Only print the first N lines of the sorted text.",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "The maximum number of processes to sort large inputs, or "
+            "multiple files with --in-place or --check, with. "
+            "Default: %(default)s."
+        ),
+    )
+
+    parser.add_argument(
+        "-b",
+        "--bytes",
+        action="store_true",
+        help=(
+            "Sort the input as bytes, without decoding it. A file is "
+            "memory-mapped instead of read. Offsets are counted in bytes."
+        ),
+    )
+
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help=(
+            "Sort the input in bounded chunks that are merged using temporary "
+            "files, such that the input does not need to fit in memory."
+        ),
+    )
+
+    parser.add_argument(
+        "-S",
+        "--buffer-size",
+        type=int,
+        default=64 * 1024 * 1024,
+        help=(
+            "The approximate number of bytes that are kept in memory when "
+            "--stream is used. Default: %(default)s."
+        ),
+    )
+
     return parser
 
 
+def _stream(args: Namespace, path: str | None) -> None:
+    """
+    Sort the input using `lensort_stream` and print the result.
+
+    Args:
+    ----
+        args: the parsed command line arguments.
+        path: the path to the file, or None to read from stdin.
+
+    """
+    if path:
+        with open(path, "r") as file:
+            lines = lensort_stream(
+                file, args.regex, args.buffer_size, args.head
+            )
+            _print_lines(lines, stdout, "\n")
+    else:
+        lines = lensort_stream(stdin, args.regex, args.buffer_size, args.head)
+        _print_lines(lines, stdout, "\n")
+
+
+def _sort_bytes(args: Namespace, path: str | None) -> None:
+    """
+    Sort the input using `lensort_bytes` and write the result to the binary
+    buffer of stdout.
+
+    Args:
+    ----
+        args: the parsed command line arguments.
+        path: the path to the file, or None to read from stdin.
+
+    """
+    import mmap
+
+    regex: bytes = os.fsencode(args.regex)
+    stdout.flush()
+    if not path:
+        data: bytes = stdin.buffer.read()
+        lines = lensort_bytes(data, regex, args.head)
+        _print_lines(lines, stdout.buffer, b"\n")
+        return
+
+    with open(path, "rb") as file:
+        status = os.fstat(file.fileno())
+        if not stat.S_ISREG(status.st_mode):
+            # Pipes and devices cannot be mapped, and report no size.
+            lines = lensort_bytes(file.read(), regex, args.head)
+            _print_lines(lines, stdout.buffer, b"\n")
+            return
+        if status.st_size == 0:
+            _print_lines([], stdout.buffer, b"\n")
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = lensort_bytes(mapped, regex, args.head)
+            _print_lines(lines, stdout.buffer, b"\n")
+
+
+def _print_lines(
+    lines: Iterable[AnyStr], output: IO[AnyStr], newline: AnyStr
+) -> None:
+    """
+    Print `lines` in the same way as printing the lines joined by a newline,
+    without joining them first.
+
+    Args:
+    ----
+        lines: the lines to print.
+        output: the stream to print to.
+        newline: the line separator, of the same type as `lines`.
+
+    """
+    empty: bool = True
+    for line in lines:
+        empty = False
+        output.write(line)
+        output.write(newline)
+    if empty:
+        output.write(newline)
+
+
 def _read(path: str) -> str:
     """
     Read the text from a file.
@@ -111,3 +353,134 @@ def _read(path: str) -> str:
     """
     with open(path, "r") as file:
         return file.read()
+
+
+def _expand_paths(patterns: list[str]) -> list[str]:
+    """
+    Expand glob patterns into the files they match. A pattern that does not
+    match any file is kept as is, such that it is reported when it is read.
+
+    Args:
+    ----
+        patterns: paths or glob patterns, where `**` matches any number of
+            directories.
+
+    Returns:
+    -------
+        the paths of the files, in the order of the patterns.
+
+    """
+    import glob
+
+    paths: list[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        paths.extend([x for x in matches if os.path.isfile(x)] or [pattern])
+    return paths
+
+
+def _rewrite_files(paths: list[str], args: Namespace) -> list[str]:
+    """
+    Sort each file in `paths`, which is replaced by its sorted text unless
+    `--check` is given. When `--jobs` is larger than 1, the files are
+    processed concurrently by a process pool.
+
+    Args:
+    ----
+        paths: the paths of the files.
+        args: the parsed command line arguments.
+
+    Returns:
+    -------
+        the paths of the files that were not sorted.
+
+    """
+    jobs: int = min(args.jobs, len(paths))
+    arguments = (paths, repeat(args.regex))
+    write = repeat(not args.check)
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize: int = max(1, len(paths) // (4 * jobs))
+        with ProcessPoolExecutor(jobs) as executor:
+            changes = list(
+                executor.map(
+                    _rewrite_file, *arguments, write, chunksize=chunksize
+                )
+            )
+    else:
+        changes = list(map(_rewrite_file, *arguments, write))
+
+    unsorted: list[str] = [x for x, changed in zip(paths, changes) if changed]
+    for path in unsorted:
+        if args.check:
+            logging.warning("%s is not sorted", path)
+        else:
+            logging.info("Sorted %s", path)
+    return unsorted
+
+
+def _rewrite_file(path: str, regex: str, write: bool) -> bool:
+    """
+    Sort the text in a file and replace the file if its text changes. A
+    trailing newline is kept, and so are the line endings of the file,
+    unless they are mixed.
+
+    Args:
+    ----
+        path: the path to the file.
+        regex: the regular expression.
+        write: whether to replace the file.
+
+    Returns:
+    -------
+        whether the sorted text differs from the text in the file.
+
+    """
+    with open(path, "r") as file:
+        text: str = file.read()
+        newlines = file.newlines
+    sorted_text: str = lensort(text, regex)
+    if text.endswith("\n"):
+        sorted_text += "\n"
+
+    if sorted_text == text:
+        return False
+
+    if write:
+        newline = newlines if isinstance(newlines, str) else None
+        _write_atomic(path, sorted_text, newline)
+    return True
+
+
+def _write_atomic(path: str, text: str, newline: str | None = None) -> None:
+    """
+    Replace the contents of a file by writing `text` to a temporary file in
+    the same directory and renaming it. This way, the file is never left
+    half-written. The permissions of the file are kept. If the path is a
+    symbolic link, the file it points to is replaced.
+
+    Args:
+    ----
+        path: the path to the file.
+        text: the new contents of the file.
+        newline: the line ending to write, or None for the default line
+            ending of the platform.
+
+    """
+    import shutil
+    import tempfile
+
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    fd, temp = tempfile.mkstemp(
+        prefix=f".{name}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w", newline=newline) as file:
+            file.write(text)
+        shutil.copymode(path, temp)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
@@ -2,8 +2,7 @@
 
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from platform import platform
+import sys
 
 _FMT = "%(asctime)s - %(levelname)s - %(name)s@%(module)s.%(funcName)s:%(lineno)d - %(message)s"
 _WIN_LOG_DIR = os.path.join(os.getenv("APPDATA", ""))
@@ -52,7 +51,7 @@ def setup(
 
 def _make_default_log_file(name: str) -> str:
     """Create a default log file path based on the OS."""
-    if platform().startswith("Windows"):
+    if sys.platform == "win32":
         base_dir = os.path.join(os.getenv("APPDATA", ""))
     else:
         home = os.path.expanduser("~")
@@ -76,6 +75,8 @@ def _make_handlers(
     formatter = logging.Formatter(fmt)
     handlers: list[logging.Handler] = [logging.StreamHandler()]
     if filename:
+        from logging.handlers import RotatingFileHandler
+
         file_handler = RotatingFileHandler(
             filename,
             maxBytes=10 * 1024 * 1024,
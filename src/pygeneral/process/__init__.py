@@ -0,0 +1,44 @@
+from pygeneral.process.aio import async_stream_subprocess
+from pygeneral.process.cache import ResultCache
+from pygeneral.process.cancel import CancelToken
+from pygeneral.process.filters import Exclude, Include, Redact, Sample, Stage
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.many import async_stream_many, stream_many
+from pygeneral.process.metrics import StreamCounter, StreamMetrics
+from pygeneral.process.pipeline import stream_pipeline
+from pygeneral.process.result import Capture, StreamResult
+from pygeneral.process.sinks import (
+    AsyncSink,
+    BinarySink,
+    LineSink,
+    QueuedSink,
+    Sink,
+    SinkWrapper,
+)
+from pygeneral.process.stream import stream_subprocess
+
+__all__ = [
+    "AsyncSink",
+    "BinarySink",
+    "CancelToken",
+    "Capture",
+    "Exclude",
+    "FlushPolicy",
+    "Include",
+    "LineSink",
+    "QueuedSink",
+    "Redact",
+    "ResultCache",
+    "Sample",
+    "Sink",
+    "SinkWrapper",
+    "Stage",
+    "StreamCounter",
+    "StreamMetrics",
+    "StreamResult",
+    "async_stream_many",
+    "async_stream_subprocess",
+    "stream_many",
+    "stream_pipeline",
+    "stream_subprocess",
+]
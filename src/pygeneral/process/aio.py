@@ -0,0 +1,93 @@
+import asyncio
+import sys
+
+from pygeneral.process.decode import LineDecoder
+from pygeneral.process.selector import CHUNK_SIZE
+from pygeneral.process.sinks import AsyncSink, Fanout
+
+
+async def async_stream_subprocess(
+    command: list[str],
+    stdout: AsyncSink | list[AsyncSink] | None = None,
+    stderr: AsyncSink | list[AsyncSink] | None = None,
+    **kwargs,
+) -> int:
+    """Run `command` as a subprocess while streaming its stdout and stderr.
+
+    This is the asyncio counterpart of `stream_subprocess`: the output is
+    read by the running event loop, so no threads are started. Besides the
+    sinks of `stream_subprocess`, async callables are accepted as sinks.
+
+    If the task is cancelled, the subprocess is killed and reaped before the
+    cancellation propagates.
+
+    Args:
+        command: The command to execute.
+        stdout: Optional sinks or sink collections that receive stdout data.
+        stderr: Optional sinks or sink collections that receive stderr data.
+        **kwargs: Additional keyword arguments to pass to
+            `asyncio.create_subprocess_exec`. The `encoding` and `errors`
+            kwargs are used to decode the output like `subprocess.Popen`
+            does. The following kwargs cannot be overridden:
+            - stdout: Set to `asyncio.subprocess.PIPE`.
+            - stderr: Set to `asyncio.subprocess.PIPE`.
+
+    Returns:
+        The return code of the subprocess.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if stdout is None or stderr is None:
+        raise ValueError(f"stdout and/or stderr is None: {stdout=}, {stderr=}")
+
+    stdout = stdout if isinstance(stdout, list) else [stdout]
+    stderr = stderr if isinstance(stderr, list) else [stderr]
+
+    encoding: str | None = kwargs.pop("encoding", None)
+    errors: str | None = kwargs.pop("errors", None)
+    for key in ("text", "universal_newlines", "bufsize"):
+        kwargs.pop(key, None)
+    kwargs["stderr"] = asyncio.subprocess.PIPE
+    kwargs["stdout"] = asyncio.subprocess.PIPE
+    process = await asyncio.create_subprocess_exec(*command, **kwargs)
+    if process.stdout is None or process.stderr is None:
+        raise RuntimeError(
+            "Stdout and/or stderr cannot be None"
+            f"{process.stdout=}, {process.stderr=}"
+        )
+
+    try:
+        await asyncio.gather(
+            _pump(process.stdout, Fanout(stdout), encoding, errors),
+            _pump(process.stderr, Fanout(stderr), encoding, errors),
+        )
+        return await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        raise
+
+
+async def _pump(
+    reader: asyncio.StreamReader,
+    fanout: Fanout,
+    encoding: str | None,
+    errors: str | None,
+) -> None:
+    """Copy lines from a subprocess stream to a fanout until end of file.
+
+    Args:
+        reader: The subprocess stream to read from.
+        fanout: The fanout that receives the lines.
+        encoding: The text encoding, see `LineDecoder`.
+        errors: The error handler of the encoding, see `LineDecoder`.
+    """
+    decoder = LineDecoder(encoding, errors)
+    while True:
+        data = await reader.read(CHUNK_SIZE)
+        for line in decoder.decode(data, final=not data):
+            await fanout.awrite(line)
+        if not data:
+            fanout.close()
+            return
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from typing import IO, Any
+
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.sinks import BinarySink, Fanout, Sink
+
+_MAGIC = b"PGRC1\n"
+_EVENT = struct.Struct(">BI")
+_RETURN_CODE = struct.Struct(">i")
+_END = 255
+_SUFFIX = ".run"
+_TEMP_SUFFIX = ".tmp"
+_STALE_AGE = 24 * 60 * 60
+
+
+class ResultCache:
+    """A size-bounded on-disk cache of the output of subprocesses.
+
+    Pass it to `stream_subprocess` for commands whose output only depends on
+    the command, some environment variables and the content of some input
+    files, like linters and code generators. On a hit, the recorded stdout
+    and stderr are written to the sinks in their original order and the
+    recorded return code is returned, without running the command.
+
+    Each run is stored in a file named after the hash of its key. When the
+    files exceed `max_size` bytes, the least recently used ones are
+    deleted. The cache can be shared by threads and processes.
+    """
+
+    directory: Path
+    max_size: int
+    env: tuple[str, ...]
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        max_size: int = 256 * 1024 * 1024,
+        env: Iterable[str] = (),
+    ) -> None:
+        """Initialize a cache, creating its directory if needed.
+
+        Args:
+            directory: The directory to store the runs in.
+            max_size: The total size of the stored runs in bytes. A run that
+                is larger on its own is not stored.
+            env: The names of the environment variables that are part of
+                the key of each run.
+
+        Raises:
+            ValueError: If `max_size` is not positive.
+        """
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive: {max_size=}")
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.env = tuple(env)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultCache(directory={str(self.directory)!r}, "
+            f"max_size={self.max_size}, env={self.env!r})"
+        )
+
+    def key(
+        self,
+        command: list[str],
+        inputs: Iterable[str | os.PathLike[str]] = (),
+        env: Mapping[str, str] | None = None,
+        cwd: str | os.PathLike[str] | None = None,
+        **options: Any,
+    ) -> str:
+        """Return the key of a run.
+
+        Args:
+            command: The command to execute.
+            inputs: Files whose content the output depends on. Relative
+                paths are relative to `cwd`. Missing files are part of the
+                key as well.
+            env: The environment of the subprocess. Defaults to the
+                environment of this process.
+            cwd: The working directory of the subprocess.
+            **options: Other values that the output depends on. They must
+                be serializable to JSON.
+
+        Returns:
+            The SHA-256 hash of the key, in hexadecimal.
+        """
+        env = os.environ if env is None else env
+        base = Path(cwd) if cwd is not None else Path()
+        digests = {}
+        for path in inputs:
+            try:
+                with open(base / path, "rb") as file:
+                    digests[os.fspath(path)] = hashlib.file_digest(
+                        file, "sha256"
+                    ).hexdigest()
+            except FileNotFoundError:
+                digests[os.fspath(path)] = None
+        key = {
+            "command": command,
+            "cwd": None if cwd is None else os.fspath(cwd),
+            "env": {name: env.get(name) for name in self.env},
+            "inputs": digests,
+            "options": options,
+        }
+        data = json.dumps(key, sort_keys=True, default=str).encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def replay(
+        self,
+        key: str,
+        stdout: list[Sink] | list[BinarySink],
+        stderr: list[Sink] | list[BinarySink],
+        binary: bool = False,
+        policy: FlushPolicy | None = None,
+    ) -> int | None:
+        """Write a stored run to sinks, if there is one.
+
+        Args:
+            key: The key of the run, see `key`.
+            stdout: Sinks that receive the stdout data.
+            stderr: Sinks that receive the stderr data.
+            binary: Whether the sinks receive chunks of bytes.
+            policy: The flush policy of the sinks, see `Fanout`.
+
+        Returns:
+            The return code of the run, or None if it is not stored. A
+            stored run that is corrupt is deleted and not written.
+        """
+        path = self.path(key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with file:
+            return_code = _check(file)
+            if return_code is None:
+                _unlink(path)
+                return None
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            fanouts = (Fanout(stdout, policy), Fanout(stderr, policy))
+            try:
+                _replay(file, fanouts, binary)
+            finally:
+                for fanout in fanouts:
+                    fanout.close()
+            return return_code
+
+    def record(self, key: str) -> "Recording":
+        """Start recording a run.
+
+        Args:
+            key: The key of the run, see `key`.
+
+        Returns:
+            The recording, whose sinks must receive the output of the run.
+        """
+        return Recording(self, key)
+
+    def clear(self) -> None:
+        """Delete all stored runs and recordings.
+
+        Runs that are being recorded are then not stored.
+        """
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            _unlink(path)
+        for path in self.directory.glob(f"*{_TEMP_SUFFIX}"):
+            _unlink(path)
+
+    def evict(self) -> None:
+        """Delete the least recently used runs until the cache fits.
+
+        Recordings that were not written to for a day are deleted as well,
+        as they were left behind by processes that crashed.
+        """
+        stale = time.time() - _STALE_AGE
+        for path in self.directory.glob(f"*{_TEMP_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < stale:
+                    _unlink(path)
+            except FileNotFoundError:
+                pass
+        entries = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            _unlink(path)
+            total -= size
+
+    def path(self, key: str) -> Path:
+        """Return the path of the stored run of `key`."""
+        return self.directory / f"{key}{_SUFFIX}"
+
+
+class Recording:
+    """The output of a run that is being recorded into a `ResultCache`.
+
+    The output is written to a temporary file, which is renamed into place
+    by `commit`. Recording stops if the output exceeds the size of the
+    cache.
+    """
+
+    size: int
+    _cache: ResultCache
+    _key: str
+    _file: IO[bytes] | None
+    _lock: threading.Lock
+
+    def __init__(self, cache: ResultCache, key: str) -> None:
+        """Initialize a recording.
+
+        Args:
+            cache: The cache to store the run in.
+            key: The key of the run.
+        """
+        self.size = len(_MAGIC)
+        self._cache = cache
+        self._key = key
+        self._lock = threading.Lock()
+        self._file = tempfile.NamedTemporaryFile(
+            dir=cache.directory, suffix=_TEMP_SUFFIX, delete=False
+        )
+        self._file.write(_MAGIC)
+
+    def sink(self, stream: int) -> Callable[[str | bytes], None]:
+        """Return a sink that records a stream.
+
+        Args:
+            stream: 0 for stdout, 1 for stderr.
+
+        Returns:
+            The sink.
+        """
+
+        def write(data: str | bytes) -> None:
+            if isinstance(data, str):
+                data = data.encode("utf-8", "surrogateescape")
+            with self._lock:
+                if self._file is None:
+                    return
+                self.size += _EVENT.size + len(data)
+                if self.size > self._cache.max_size:
+                    self._discard()
+                    return
+                self._file.write(_EVENT.pack(stream, len(data)))
+                self._file.write(data)
+
+        return write
+
+    def commit(self, return_code: int) -> None:
+        """Store the run, unless it was too large.
+
+        Args:
+            return_code: The return code of the run.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_EVENT.pack(_END, _RETURN_CODE.size))
+            self._file.write(_RETURN_CODE.pack(return_code))
+            self._file.close()
+            try:
+                os.replace(self._file.name, self._cache.path(self._key))
+            except FileNotFoundError:
+                # The recording was deleted by `ResultCache.clear`.
+                return
+            finally:
+                self._file = None
+        self._cache.evict()
+
+    def discard(self) -> None:
+        """Delete the recording without storing it."""
+        with self._lock:
+            self._discard()
+
+    def _discard(self) -> None:
+        """Delete the recording, while holding the lock."""
+        if self._file is not None:
+            self._file.close()
+            _unlink(Path(self._file.name))
+            self._file = None
+
+
+def _check(file: IO[bytes]) -> int | None:
+    """Check that a stored run is complete, without reading its data.
+
+    Args:
+        file: The stored run, at its start. It is left after its magic.
+
+    Returns:
+        The return code of the run, or None if it is corrupt.
+    """
+    if file.read(len(_MAGIC)) != _MAGIC:
+        return None
+    start = file.tell()
+    end = file.seek(0, os.SEEK_END)
+    position = start
+    return_code = None
+    while position < end:
+        file.seek(position)
+        header = file.read(_EVENT.size)
+        if len(header) < _EVENT.size:
+            return None
+        stream, size = _EVENT.unpack(header)
+        position += _EVENT.size + size
+        if position > end or stream not in (0, 1, _END):
+            return None
+        if stream == _END:
+            if size != _RETURN_CODE.size or position != end:
+                return None
+            return_code = _RETURN_CODE.unpack(file.read(size))[0]
+    file.seek(start)
+    return return_code
+
+
+def _replay(
+    file: IO[bytes], fanouts: tuple[Fanout, Fanout], binary: bool
+) -> None:
+    """Write the events of a stored run to the fanouts.
+
+    Args:
+        file: The stored run, after its magic. It must have been checked by
+            `_check`.
+        fanouts: The fanouts of stdout and stderr.
+        binary: Whether to write bytes instead of text.
+    """
+    while True:
+        stream, size = _EVENT.unpack(file.read(_EVENT.size))
+        if stream == _END:
+            return
+        data = file.read(size)
+        if binary:
+            fanouts[stream].write(data)
+        else:
+            fanouts[stream].write(data.decode("utf-8", "surrogateescape"))
+
+
+def _unlink(path: Path) -> None:
+    """Delete a file that may have been deleted by another process."""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
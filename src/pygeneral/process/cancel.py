@@ -0,0 +1,171 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, override
+
+
+class CancelToken:
+    """A token to cancel streamed subprocesses from another thread.
+
+    One token can be passed to any number of `stream_subprocess` calls.
+    Cancelling it stops all of them, including the ones that start later.
+    """
+
+    _lock: threading.Lock
+    _cancelled: bool
+    _callbacks: list[Callable[[], None]]
+
+    def __init__(self) -> None:
+        """Initialize a token that is not cancelled."""
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled."""
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Cancel the token and run its callbacks, once."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Run `callback` when the token is cancelled.
+
+        Args:
+            callback: The function to run. It runs immediately if the token
+                was already cancelled.
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Stop running `callback` when the token is cancelled.
+
+        Args:
+            callback: A function that was added by `add_callback`.
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class Watchdog(threading.Thread):
+    """Stop a subprocess after a timeout or when a token is cancelled.
+
+    The subprocess is asked to terminate, and killed if it has not exited
+    after a grace period. On POSIX, the signals are sent to its process
+    group, so the subprocess must be started with `start_new_session=True`.
+    """
+
+    timeout: float | None
+    token: CancelToken | None
+    grace: float
+    timed_out: bool
+    cancelled: bool
+    _process: subprocess.Popen[Any] | None
+    _wake: threading.Event
+    _exited: threading.Event
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        token: CancelToken | None = None,
+        grace: float = 5.0,
+    ) -> None:
+        """Initialize a watchdog.
+
+        Args:
+            timeout: The number of seconds the subprocess may run.
+            token: A token that stops the subprocess when it is cancelled.
+            grace: The number of seconds between terminating and killing.
+        """
+        super().__init__(name="Watchdog", daemon=True)
+        self.timeout = timeout
+        self.token = token
+        self.grace = grace
+        self.timed_out = False
+        self.cancelled = False
+        self._process = None
+        self._wake = threading.Event()
+        self._exited = threading.Event()
+
+    @contextmanager
+    def watch(self, process: subprocess.Popen[Any]) -> Iterator[None]:
+        """Watch `process` until the context exits.
+
+        If the context exits with an exception, like the KeyboardInterrupt
+        of Ctrl-C, the subprocess and its process group are killed, as they
+        are in a session of their own and do not get its SIGINT.
+
+        Args:
+            process: The subprocess to stop when needed.
+        """
+        self._process = process
+        if self.token is not None:
+            self.token.add_callback(self._wake.set)
+        self.start()
+        try:
+            yield
+        except BaseException:
+            self._signal(terminate=False)
+            raise
+        finally:
+            self._exited.set()
+            self._wake.set()
+            self.join()
+            if self.token is not None:
+                self.token.remove_callback(self._wake.set)
+
+    @override
+    def run(self) -> None:
+        """Wait for the timeout or cancellation, then stop the subprocess."""
+        self._wake.wait(self.timeout)
+        if self._exited.is_set():
+            return
+        if self.token is not None and self.token.cancelled:
+            self.cancelled = True
+        else:
+            self.timed_out = True
+        self._signal(terminate=True)
+        if not self._exited.wait(self.grace):
+            self._signal(terminate=False)
+
+    def _signal(self, terminate: bool) -> None:
+        """Terminate or kill the subprocess and its process group.
+
+        Args:
+            terminate: Whether to terminate instead of kill.
+        """
+        process = self._process
+        if process is None:
+            return
+        if sys.platform == "win32":
+            if process.returncode is not None:
+                return
+            if terminate:
+                process.terminate()
+            else:
+                process.kill()
+            return
+        # The group is signalled even if the subprocess itself has exited,
+        # as its children may still hold the pipes open.
+        sig = signal.SIGTERM if terminate else signal.SIGKILL
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,77 @@
+import codecs
+import io
+import locale
+import re
+
+_LINE_BREAK = re.compile(r"(?<=[\r\n])")
+
+
+class LineDecoder:
+    r"""Decode chunks of bytes into lines of text.
+
+    The text is decoded and its newlines are translated in the same way as a
+    subprocess pipe opened with `text=True` does: "\r\n" and "\r" become "\n".
+    Lines are only split on "\n" and keep their line ending.
+
+    If `progress` is True, a "\r" that is not followed by "\n" is kept and
+    ends a line of its own. Such lines are progress updates that overwrite
+    each other on a terminal, see `ProgressSink`.
+    """
+
+    _decoder: io.IncrementalNewlineDecoder
+    _progress: bool
+    _pending: list[str]
+
+    def __init__(
+        self,
+        encoding: str | None = None,
+        errors: str | None = None,
+        progress: bool = False,
+    ) -> None:
+        r"""Initialize a decoder.
+
+        Args:
+            encoding: The text encoding. Defaults to the locale encoding.
+            errors: The error handler of the encoding. Defaults to "strict".
+            progress: Whether to keep "\r" as the end of progress updates.
+        """
+        encoding = encoding or locale.getpreferredencoding(False)
+        decoder = codecs.getincrementaldecoder(encoding)(errors or "strict")
+        self._decoder = io.IncrementalNewlineDecoder(
+            decoder, translate=not progress
+        )
+        self._progress = progress
+        self._pending = []
+
+    def decode(self, data: bytes, final: bool = False) -> list[str]:
+        """Decode a chunk of bytes.
+
+        Args:
+            data: The next chunk of bytes.
+            final: Whether this is the last chunk. If so, an incomplete last
+                line is returned as well.
+
+        Returns:
+            The lines that were completed by `data`.
+        """
+        # The parts of an incomplete line are only joined once it ends, so
+        # that a long line does not copy its start with every chunk.
+        text = self._decoder.decode(data, final)
+        if self._progress:
+            lines = _LINE_BREAK.split(text.replace("\r\n", "\n"))
+            rest = lines.pop()
+        else:
+            lines = text.split("\n")
+            rest = lines.pop()
+            lines = [line + "\n" for line in lines]
+        pending = self._pending
+        if lines and pending:
+            pending.append(lines[0])
+            lines[0] = "".join(pending)
+            pending.clear()
+        if rest:
+            pending.append(rest)
+        if final and pending:
+            lines.append("".join(pending))
+            pending.clear()
+        return lines
@@ -0,0 +1,275 @@
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import override
+
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.sinks import Fanout, Sink, SinkWrapper
+
+LineFunction = Callable[[str], str | None]
+
+
+class Stage(ABC):
+    """A step that filters or transforms each line before it is written.
+
+    The stages of `stream_subprocess` run once per line, before the line is
+    written to the sinks. Each stage counts the lines it received and
+    dropped and the seconds it spent on them, over all streams that used
+    it. The counters are updated at the end of each stream.
+    """
+
+    lines: int
+    dropped: int
+    seconds: float
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        """Initialize the counters of a stage."""
+        self.lines = 0
+        self.dropped = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(lines={self.lines}, "
+            f"dropped={self.dropped}, seconds={self.seconds:.6f})"
+        )
+
+    @abstractmethod
+    def compile(self) -> LineFunction:
+        """Return the function that applies this stage to one stream.
+
+        Returns:
+            A function that returns the transformed line, or None to drop
+            it. It may keep state of its own, as each stream calls this.
+        """
+
+    def record(self, lines: int, dropped: int, seconds: float) -> None:
+        """Add the counts of a stream to the counters.
+
+        Args:
+            lines: The number of lines that the stage received.
+            dropped: The number of lines that the stage dropped.
+            seconds: The time that the stage spent on the lines.
+        """
+        with self._lock:
+            self.lines += lines
+            self.dropped += dropped
+            self.seconds += seconds
+
+
+def _alternation(patterns: tuple[str, ...]) -> re.Pattern[str]:
+    """Compile regular expressions into one that matches any of them.
+
+    Args:
+        patterns: The regular expressions.
+
+    Returns:
+        The compiled alternation.
+
+    Raises:
+        ValueError: If no patterns are given.
+    """
+    if not patterns:
+        raise ValueError("At least one pattern is required")
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class Include(Stage):
+    """Keep only the lines that match any of the regular expressions."""
+
+    regex: re.Pattern[str]
+
+    def __init__(self, *patterns: str) -> None:
+        """Initialize an include stage.
+
+        Args:
+            *patterns: Regular expressions that are searched in each line.
+                They are combined into one alternation.
+        """
+        super().__init__()
+        self.regex = _alternation(patterns)
+
+    @override
+    def compile(self) -> LineFunction:
+        """Return a function that drops the lines that do not match."""
+        search = self.regex.search
+        return lambda line: line if search(line) else None
+
+
+class Exclude(Stage):
+    """Drop the lines that match any of the regular expressions."""
+
+    regex: re.Pattern[str]
+
+    def __init__(self, *patterns: str) -> None:
+        """Initialize an exclude stage.
+
+        Args:
+            *patterns: Regular expressions that are searched in each line.
+                They are combined into one alternation.
+        """
+        super().__init__()
+        self.regex = _alternation(patterns)
+
+    @override
+    def compile(self) -> LineFunction:
+        """Return a function that drops the lines that match."""
+        search = self.regex.search
+        return lambda line: None if search(line) else line
+
+
+class Redact(Stage):
+    """Replace the matches of any of the regular expressions."""
+
+    regex: re.Pattern[str]
+    replacement: str
+
+    def __init__(self, *patterns: str, replacement: str = "***") -> None:
+        """Initialize a redaction stage.
+
+        Args:
+            *patterns: Regular expressions of the text to replace, like
+                secrets. They are combined into one alternation.
+            replacement: The text that replaces each match.
+        """
+        super().__init__()
+        self.regex = _alternation(patterns)
+        self.replacement = replacement
+
+    @override
+    def compile(self) -> LineFunction:
+        """Return a function that replaces the matches in a line."""
+        sub = self.regex.sub
+        replacement = self.replacement.replace("\\", "\\\\")
+        return lambda line: sub(replacement, line)
+
+
+class Sample(Stage):
+    """Keep a fraction of the lines, spread evenly over the stream."""
+
+    rate: float
+
+    def __init__(self, rate: float) -> None:
+        """Initialize a sampling stage.
+
+        Args:
+            rate: The fraction of lines to keep, for example 0.1 to keep
+                every tenth line, starting with the first.
+
+        Raises:
+            ValueError: If `rate` is not between 0 and 1.
+        """
+        if not 0 < rate <= 1:
+            raise ValueError(f"rate must be in (0, 1]: {rate=}")
+        super().__init__()
+        self.rate = rate
+
+    @override
+    def compile(self) -> LineFunction:
+        """Return a function that keeps every 1/rate-th line of a stream."""
+        rate = self.rate
+        credit = 1.0
+
+        def sample(line: str) -> str | None:
+            nonlocal credit
+            if credit >= 1:
+                credit += rate - 1
+                return line
+            credit += rate
+            return None
+
+        return sample
+
+
+class FilterSink(SinkWrapper):
+    """Apply stages to each line of a stream before it is written to sinks.
+
+    The stages run once per line, however many sinks there are. A line that
+    is dropped by a stage is not passed to the following stages. The sinks
+    are opened with the first stream that writes to this sink and closed
+    after the last one, when the counts are recorded in the stages.
+    """
+
+    _stages: list[Stage]
+    _sinks: list[Sink]
+    _policy: FlushPolicy | None
+    _lock: threading.Lock
+    _streams: int
+    _functions: list[LineFunction]
+    _lines: list[int]
+    _dropped: list[int]
+    _seconds: list[float]
+    _fanout: Fanout
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        sinks: Sink | list[Sink],
+        policy: FlushPolicy | None = None,
+    ) -> None:
+        """Initialize a filter sink.
+
+        Args:
+            stages: The stages to apply, in order.
+            sinks: Sinks that will receive the remaining lines.
+            policy: The flush policy of the sinks, see `Fanout`.
+        """
+        self._stages = stages
+        self._sinks = sinks if isinstance(sinks, list) else [sinks]
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._streams = 0
+
+    @override
+    def open(self) -> None:
+        """Compile the stages and open the sinks, unless a stream did."""
+        with self._lock:
+            self._streams += 1
+            if self._streams > 1:
+                return
+            stages = self._stages
+            self._functions = [stage.compile() for stage in stages]
+            self._lines = [0] * len(stages)
+            self._dropped = [0] * len(stages)
+            self._seconds = [0.0] * len(stages)
+            self._fanout = Fanout(self._sinks, self._policy)
+
+    @override
+    def write(self, data: str) -> None:
+        """Apply the stages to a line and write what remains.
+
+        Args:
+            data: The line to write.
+        """
+        line = data
+        clock = time.perf_counter
+        start = clock()
+        for index, function in enumerate(self._functions):
+            self._lines[index] += 1
+            result = function(line)
+            now = clock()
+            self._seconds[index] += now - start
+            if result is None:
+                self._dropped[index] += 1
+                return
+            line = result
+            start = now
+        self._fanout.write(line)
+
+    @override
+    def close(self) -> None:
+        """Record the counts in the stages after the last stream."""
+        with self._lock:
+            self._streams -= 1
+            if self._streams:
+                return
+            counts = zip(
+                self._stages, self._lines, self._dropped, self._seconds
+            )
+            for stage, lines, dropped, seconds in counts:
+                stage.record(lines, dropped, seconds)
+            self._fanout.close()
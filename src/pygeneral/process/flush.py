@@ -0,0 +1,132 @@
+import threading
+import time
+import weakref
+from typing import Protocol, override
+
+
+class FlushPolicy:
+    """When a sink is flushed while a subprocess is streamed.
+
+    The default policy flushes after every line or chunk. Pending data is
+    always flushed at the end of the stream. For example:
+
+    - `FlushPolicy(size=65536)` flushes every 64 KiB.
+    - `FlushPolicy(size=None, interval=0.1)` flushes every 100 ms.
+    - `FlushPolicy(size=None)` only flushes at the end of the stream.
+
+    A sink can declare its own policy as a `flush_policy` attribute, which
+    takes precedence over the policy passed to `stream_subprocess`.
+    """
+
+    size: int | None
+    interval: float | None
+
+    def __init__(
+        self, size: int | None = 0, interval: float | None = None
+    ) -> None:
+        """Initialize a flush policy.
+
+        Args:
+            size: Flush once this many characters or bytes were written since
+                the last flush. If 0, flush after every write. If None, the
+                amount of pending data is ignored.
+            interval: Flush pending data once it is this many seconds old,
+                also when the subprocess stays quiet. If None, the age of
+                pending data is ignored.
+
+        Raises:
+            ValueError: If `size` is negative or `interval` is not positive.
+        """
+        if size is not None and size < 0:
+            raise ValueError(f"size must not be negative: {size=}")
+        if interval is not None and interval <= 0:
+            raise ValueError(f"interval must be positive: {interval=}")
+        self.size = size
+        self.interval = interval
+
+    def __repr__(self) -> str:
+        return f"FlushPolicy(size={self.size!r}, interval={self.interval!r})"
+
+
+class Flushable(Protocol):
+    """An object with pending data that must be flushed in time."""
+
+    @property
+    def interval(self) -> float:
+        """The shortest flush interval of the object, in seconds."""
+        ...
+
+    def flush_due(self, now: float) -> None:
+        """Flush the data that is older than its flush interval."""
+        ...
+
+    def fail(self, error: Exception) -> None:
+        """Keep an error of `flush_due` until the object is closed."""
+        ...
+
+
+class FlushTimer(threading.Thread):
+    """A daemon thread that flushes registered objects in time.
+
+    One timer serves all streams of the process, see `flush_timer`. Objects
+    are held by weak references, so they need not be unregistered. An
+    object whose flush fails is unregistered and keeps the error, so that
+    the timer goes on flushing the other objects.
+    """
+
+    _objects: weakref.WeakSet[Flushable]
+    _condition: threading.Condition
+
+    def __init__(self) -> None:
+        """Initialize a flush timer."""
+        super().__init__(name="FlushTimer", daemon=True)
+        self._objects = weakref.WeakSet()
+        self._condition = threading.Condition()
+
+    def register(self, obj: Flushable) -> None:
+        """Flush `obj` periodically until it is unregistered."""
+        with self._condition:
+            self._objects.add(obj)
+            self._condition.notify()
+
+    def unregister(self, obj: Flushable) -> None:
+        """Stop flushing `obj`."""
+        with self._condition:
+            self._objects.discard(obj)
+
+    @override
+    def run(self) -> None:
+        """Flush the registered objects at their shortest interval.
+
+        Registering an object wakes the timer, so that a shorter interval
+        takes effect immediately.
+        """
+        while True:
+            with self._condition:
+                while not self._objects:
+                    self._condition.wait()
+                interval = min(obj.interval for obj in self._objects)
+                self._condition.wait(interval)
+                objects = list(self._objects)
+            now = time.monotonic()
+            for obj in objects:
+                try:
+                    obj.flush_due(now)
+                except Exception as error:
+                    self.unregister(obj)
+                    obj.fail(error)
+            del objects
+
+
+_timer: FlushTimer | None = None
+_timer_lock = threading.Lock()
+
+
+def flush_timer() -> FlushTimer:
+    """Return the flush timer of the process, starting it if needed."""
+    global _timer
+    with _timer_lock:
+        if _timer is None:
+            _timer = FlushTimer()
+            _timer.start()
+        return _timer
@@ -0,0 +1,143 @@
+import errno
+import io
+import os
+from typing import IO, Any, cast
+
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.selector import CHUNK_SIZE, ChunkReader, Reader
+from pygeneral.process.sinks import BinarySink, Fanout, LineSink, Sink
+
+SPLICE_SIZE = 1024 * 1024
+
+
+def forwarder(sinks: list[Any], binary: bool = False) -> "Forwarder | None":
+    """Return a forwarder to `sinks` if they are all real files.
+
+    Args:
+        sinks: The sinks of a stream.
+        binary: Whether the stream is in binary mode. Otherwise, the sinks
+            must be binary files, as text files encode the text themselves
+            and translate its newlines.
+
+    Returns:
+        A forwarder, or None if a sink is not a file object with a file
+        descriptor, in which case the data must go through Python.
+    """
+    if not sinks:
+        return None
+    for sink in sinks:
+        if not isinstance(sink, io.IOBase):
+            return None
+        if not binary and not isinstance(
+            sink, (io.BufferedIOBase, io.RawIOBase)
+        ):
+            return None
+        try:
+            sink.fileno()
+        except (OSError, ValueError):
+            return None
+    return Forwarder(sinks)
+
+
+def pipe_reader(
+    sinks: list[Sink] | list[BinarySink],
+    binary: bool,
+    flush: FlushPolicy | None,
+    zero_copy: bool,
+    encoding: str | None,
+    errors: str | None,
+    progress: float | None = None,
+) -> Reader:
+    """Return a reader that copies chunks of a pipe to `sinks`.
+
+    Args:
+        sinks: Targets that receive the data.
+        binary: Whether the targets receive chunks instead of lines.
+        flush: The flush policy of the targets.
+        zero_copy: Whether to forward the data to files in the kernel.
+        encoding: The encoding of the lines, if not binary.
+        errors: The error handling of the decoding, if not binary.
+        progress: The interval of progress updates, if they are coalesced.
+
+    Returns:
+        A forwarder if the sinks are files, otherwise a chunk reader.
+    """
+    if zero_copy and progress is None:
+        forward = forwarder(sinks, binary)
+        if forward is not None:
+            return forward
+    if binary:
+        return ChunkReader(Fanout(sinks, flush))
+    line_sink = LineSink(
+        cast(list[Sink], sinks), encoding, errors, flush, progress
+    )
+    return ChunkReader(Fanout([line_sink]))
+
+
+class Forwarder:
+    """Copy the data of a pipe to files, bypassing Python objects.
+
+    The data is copied unchanged, without decoding or translating newlines.
+    For a single file on Linux, it is moved by the kernel with `os.splice`.
+    Otherwise, it is read into a reused buffer and written to each file. The
+    buffers of the file objects are flushed before the first write, and
+    their positions are updated afterwards.
+    """
+
+    _files: list[IO[Any]]
+    _fds: list[int]
+    _splice: bool
+    _buffer: bytearray
+    _view: memoryview
+
+    def __init__(self, files: list[IO[Any]]) -> None:
+        """Initialize a forwarder.
+
+        Args:
+            files: File objects that have a file descriptor.
+        """
+        for file in files:
+            file.flush()
+        self._files = files
+        self._fds = [file.fileno() for file in files]
+        self._splice = hasattr(os, "splice") and len(files) == 1
+        self._buffer = bytearray(CHUNK_SIZE)
+        self._view = memoryview(self._buffer)
+
+    def read(self, fd: int) -> bool:
+        """Copy the data that is available in `fd` to the files.
+
+        Args:
+            fd: A readable pipe.
+
+        Returns:
+            False at end of file, True otherwise.
+        """
+        if self._splice:
+            try:
+                return os.splice(fd, self._fds[0], SPLICE_SIZE) > 0
+            except OSError as error:
+                if error.errno not in (errno.EINVAL, errno.ENOSYS):
+                    raise
+                self._splice = False
+
+        if hasattr(os, "readv"):
+            size = os.readv(fd, [self._buffer])
+        else:
+            data = os.read(fd, CHUNK_SIZE)
+            size = len(data)
+            self._buffer[:size] = data
+        for out in self._fds:
+            written = 0
+            while written < size:
+                written += os.write(out, self._view[written:size])
+        return size > 0
+
+    def close(self) -> None:
+        """Move the file objects to the positions of their descriptors."""
+        for file, fd in zip(self._files, self._fds):
+            try:
+                if file.seekable():
+                    file.seek(os.lseek(fd, 0, os.SEEK_CUR))
+            except (OSError, ValueError):
+                pass
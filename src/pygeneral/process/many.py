@@ -0,0 +1,193 @@
+import asyncio
+import os
+import sys
+from collections.abc import Awaitable, Iterable, Mapping
+from typing import cast, override
+
+from pygeneral.process.aio import async_stream_subprocess
+from pygeneral.process.sinks import AsyncSink, Fanout, SinkWrapper
+
+# The errors of a command that cannot be started, unlike errors of sinks.
+_START_ERRORS = (FileNotFoundError, NotADirectoryError, PermissionError)
+
+
+class _FailedError(Exception):
+    """Raised by a command that fails while running in fail-fast mode."""
+
+
+def stream_many(
+    commands: Mapping[str, list[str]] | Iterable[list[str]],
+    stdout: AsyncSink | list[AsyncSink] | None = None,
+    stderr: AsyncSink | list[AsyncSink] | None = None,
+    *,
+    max_parallel: int | None = None,
+    tag: str | None = "[{id}] ",
+    fail_fast: bool = False,
+    **kwargs,
+) -> dict[str, int | None]:
+    """Run `commands` concurrently while streaming their stdout and stderr.
+
+    The commands share one event loop, see `async_stream_subprocess`. As all
+    sinks are called from that loop, one line at a time, they can be shared
+    between commands without locking. Use `async_stream_many` if an event
+    loop is already running.
+
+    Args:
+        commands: The commands to execute, keyed by their id. If an iterable
+            is given, the id of a command is its index.
+        stdout: Optional sinks or sink collections that receive stdout data.
+        stderr: Optional sinks or sink collections that receive stderr data.
+        max_parallel: The maximum number of commands that run at the same
+            time. Defaults to the number of CPUs.
+        tag: Prefix of each line, in which "{id}" is replaced by the id of
+            the command that wrote it. If None, lines are not prefixed.
+        fail_fast: If True, the first command that returns a non-zero code
+            stops the batch: running commands are killed and pending ones are
+            not started, and an error of a command is raised. If False, all
+            commands are run, also when some of them cannot be started.
+        **kwargs: Additional keyword arguments to pass to
+            `async_stream_subprocess`.
+
+    Returns:
+        The return code of each command, keyed by its id, in the order of
+        `commands`. The code is None if the command could not be started,
+        like a missing executable, or was not started or was killed because
+        of `fail_fast`.
+    """
+    return asyncio.run(
+        async_stream_many(
+            commands,
+            stdout,
+            stderr,
+            max_parallel=max_parallel,
+            tag=tag,
+            fail_fast=fail_fast,
+            **kwargs,
+        )
+    )
+
+
+async def async_stream_many(
+    commands: Mapping[str, list[str]] | Iterable[list[str]],
+    stdout: AsyncSink | list[AsyncSink] | None = None,
+    stderr: AsyncSink | list[AsyncSink] | None = None,
+    *,
+    max_parallel: int | None = None,
+    tag: str | None = "[{id}] ",
+    fail_fast: bool = False,
+    **kwargs,
+) -> dict[str, int | None]:
+    """Run `commands` concurrently on the running event loop.
+
+    See `stream_many` for a description of the arguments and the result.
+    """
+    if isinstance(commands, Mapping):
+        named = cast(dict[str, list[str]], dict(commands))
+    else:
+        named = {str(i): command for i, command in enumerate(commands)}
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if stdout is None or stderr is None:
+        raise ValueError(f"stdout and/or stderr is None: {stdout=}, {stderr=}")
+
+    stdout = stdout if isinstance(stdout, list) else [stdout]
+    stderr = stderr if isinstance(stderr, list) else [stderr]
+
+    results: dict[str, int | None] = dict.fromkeys(named)
+    if not results:
+        return results
+    semaphore = asyncio.Semaphore(max_parallel or os.cpu_count() or 1)
+
+    async def run(command_id: str, command: list[str]) -> None:
+        async with semaphore:
+            prefix = "" if tag is None else tag.format(id=command_id)
+            try:
+                code = await async_stream_subprocess(
+                    command,
+                    _tag(stdout, prefix),
+                    _tag(stderr, prefix),
+                    **kwargs,
+                )
+            except _START_ERRORS:
+                if fail_fast:
+                    raise
+                return
+        results[command_id] = code
+        if code and fail_fast:
+            raise _FailedError
+
+    tasks = [
+        asyncio.create_task(run(command_id, command))
+        for command_id, command in named.items()
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+
+    for task in done:
+        error = task.exception()
+        if error is not None and not isinstance(error, _FailedError):
+            raise error
+    return results
+
+
+def _tag(sinks: list[AsyncSink], prefix: str) -> list[AsyncSink]:
+    """Return sinks that prefix each line before writing it to `sinks`.
+
+    Args:
+        sinks: The sinks that receive the prefixed lines.
+        prefix: The prefix of each line.
+
+    Returns:
+        `sinks` itself if `prefix` is empty, or a single sink otherwise.
+    """
+    if not prefix:
+        return sinks
+    return [_Tagger(sinks, prefix)]
+
+
+class _Tagger(SinkWrapper):
+    """Prefix each line of a stream before writing it to sinks.
+
+    The sinks are opened and closed with the stream, like those of a
+    `Fanout`, so that they are flushed at its end.
+    """
+
+    _sinks: list[AsyncSink]
+    _prefix: str
+    _fanout: Fanout
+
+    def __init__(self, sinks: list[AsyncSink], prefix: str) -> None:
+        """Initialize a tagger.
+
+        Args:
+            sinks: The sinks that receive the prefixed lines.
+            prefix: The prefix of each line.
+        """
+        self._sinks = sinks
+        self._prefix = prefix
+
+    @override
+    def open(self) -> None:
+        """Open the sinks for the stream."""
+        self._fanout = Fanout(self._sinks)
+
+    @override
+    def write(self, data: str) -> Awaitable[None]:
+        """Write a prefixed line to the sinks.
+
+        Args:
+            data: The line to write.
+
+        Returns:
+            An awaitable that writes the line, awaiting async sinks.
+        """
+        return self._fanout.awrite(self._prefix + data)
+
+    @override
+    def close(self) -> None:
+        """Flush the sinks and close the wrappers among them."""
+        self._fanout.close()
@@ -0,0 +1,135 @@
+import os
+import subprocess
+import sys
+import time
+from typing import Any
+
+
+class StreamCounter:
+    """A sink that counts the lines and bytes of a stream.
+
+    Text is counted by its UTF-8 encoded size.
+    """
+
+    lines: int
+    nbytes: int
+    first_write: float | None
+
+    def __init__(self) -> None:
+        """Initialize a counter."""
+        self.lines = 0
+        self.nbytes = 0
+        self.first_write = None
+
+    def __repr__(self) -> str:
+        return f"StreamCounter(lines={self.lines}, nbytes={self.nbytes})"
+
+    def write(self, data: str | bytes) -> None:
+        """Count a line or chunk.
+
+        Args:
+            data: The line or chunk that was streamed.
+        """
+        if self.first_write is None:
+            self.first_write = time.monotonic()
+        if isinstance(data, bytes):
+            self.lines += data.count(b"\n")
+            self.nbytes += len(data)
+        else:
+            self.lines += 1
+            self.nbytes += len(data) if data.isascii() else len(data.encode())
+
+
+class StreamMetrics:
+    """Resource usage and throughput of a streamed subprocess.
+
+    The CPU times and the maximum resident set size are reported by
+    `os.wait4`, so they are None on platforms without it, like Windows.
+    """
+
+    args: list[str]
+    returncode: int | None
+    wall_time: float
+    user_time: float | None
+    system_time: float | None
+    max_rss: int | None
+    stdout: StreamCounter
+    stderr: StreamCounter
+    _start: float
+
+    def __init__(self, args: list[str]) -> None:
+        """Initialize the metrics and start the wall clock.
+
+        Args:
+            args: The command that is executed.
+        """
+        self.args = args
+        self.returncode = None
+        self.wall_time = 0.0
+        self.user_time = None
+        self.system_time = None
+        self.max_rss = None
+        self.stdout = StreamCounter()
+        self.stderr = StreamCounter()
+        self._start = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (
+            f"StreamMetrics(args={self.args!r}, returncode={self.returncode}, "
+            f"wall_time={self.wall_time:.3f}, user_time={self.user_time}, "
+            f"system_time={self.system_time}, max_rss={self.max_rss}, "
+            f"first_output={self.first_output}, stdout={self.stdout}, "
+            f"stderr={self.stderr})"
+        )
+
+    @property
+    def first_output(self) -> float | None:
+        """Seconds from the start until the first stdout or stderr data."""
+        writes = [self.stdout.first_write, self.stderr.first_write]
+        first = min(filter(None, writes), default=None)
+        return None if first is None else first - self._start
+
+    def stop(self, returncode: int, rusage: Any = None) -> None:
+        """Stop the wall clock and record the outcome of the subprocess.
+
+        Args:
+            returncode: The return code of the subprocess.
+            rusage: The resource usage reported by `os.wait4`, if any.
+        """
+        self.wall_time = time.monotonic() - self._start
+        self.returncode = returncode
+        if rusage is not None:
+            self.user_time = rusage.ru_utime
+            self.system_time = rusage.ru_stime
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.max_rss = rusage.ru_maxrss * scale
+
+
+def wait(
+    process: subprocess.Popen[Any], metrics: StreamMetrics | None = None
+) -> int:
+    """Wait for a subprocess and record its resource usage in `metrics`.
+
+    The subprocess is reaped with `os.wait4` where available, which is
+    what `Popen.wait` would do, except that it also returns the resource
+    usage of the subprocess.
+
+    Args:
+        process: The subprocess to wait for.
+        metrics: The metrics to record the outcome in.
+
+    Returns:
+        The return code of the subprocess.
+    """
+    if metrics is None:
+        return process.wait()
+    rusage = None
+    if process.returncode is None and hasattr(os, "wait4"):
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            rusage = None
+    return_code = process.wait()
+    metrics.stop(return_code, rusage)
+    return return_code
@@ -0,0 +1,165 @@
+import subprocess
+import sys
+from typing import IO, Any, cast
+
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.forward import pipe_reader
+from pygeneral.process.selector import PumpThread, multiplex
+from pygeneral.process.sinks import BinarySink, Sink, sink_list
+from pygeneral.process.stream import Engine
+
+
+def stream_pipeline(
+    commands: list[list[str]],
+    stdout: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    stderr: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    *,
+    engine: Engine = "thread",
+    binary: bool = False,
+    flush: FlushPolicy | None = None,
+    zero_copy: bool = True,
+    progress: float | None = None,
+    **kwargs,
+) -> list[int]:
+    r"""Run `commands` as a pipeline while streaming its output.
+
+    The stdout of each command is connected to the stdin of the next one by
+    an OS pipe, like `a | b | c` in a shell, so the data between the stages
+    never passes through Python. Only the stdout of the last command and
+    the stderr of every command are streamed to the sinks.
+
+    Args:
+        commands: The commands to execute, from the first to the last stage.
+        stdout: Optional sinks or sink collections that receive the stdout
+            data of the last command.
+        stderr: Optional sinks or sink collections that receive the stderr
+            data of all commands.
+        engine: How the output is read, see `stream_subprocess`.
+        binary: If True, the output is passed to the sinks as chunks of
+            bytes, see `stream_subprocess`.
+        flush: When the sinks are flushed, see `FlushPolicy`.
+        zero_copy: If all sinks of stdout are binary file objects with a
+            file descriptor, the data is copied to them by the kernel, see
+            `stream_subprocess`. The stderr of a pipeline with multiple
+            commands is forwarded only in binary mode, as lines of different
+            commands could otherwise be mixed up.
+        progress: If set, progress updates that end with "\r" are
+            coalesced, see `stream_subprocess`.
+        **kwargs: Additional keyword arguments to pass to `subprocess.Popen`
+            for each command. The `stdin` kwarg only applies to the first
+            command, and the `encoding` and `errors` kwargs are used to
+            decode the output, like `stream_subprocess` does. The stdout and
+            stderr kwargs cannot be overridden.
+
+    Returns:
+        The return code of each command, in the order of `commands`.
+
+    Raises:
+        ValueError: If no commands are given, or `progress` is used in
+            binary mode.
+    """
+    if not commands:
+        raise ValueError("No commands are given")
+    if binary and progress is not None:
+        raise ValueError("progress requires text mode, use a LineSink")
+    if binary:
+        stdout = stdout or sys.stdout.buffer
+        stderr = stderr or sys.stderr.buffer
+    else:
+        stdout = stdout or sys.stdout
+        stderr = stderr or sys.stderr
+    if stdout is None or stderr is None:
+        raise ValueError(f"stdout and/or stderr is None: {stdout=}, {stderr=}")
+
+    stdout_sinks = sink_list(stdout)
+    stderr_sinks = sink_list(stderr)
+
+    encoding: str | None = kwargs.pop("encoding", None)
+    errors: str | None = kwargs.pop("errors", None)
+    kwargs.pop("universal_newlines", None)
+    kwargs["stderr"] = subprocess.PIPE
+    kwargs["stdout"] = subprocess.PIPE
+    kwargs["text"] = False
+    stdin = kwargs.pop("stdin", None)
+
+    processes: list[subprocess.Popen[bytes]] = []
+    try:
+        pipe: IO[bytes] | None = None
+        for command in commands:
+            # The output is bytes, as text is False.
+            process = cast(
+                subprocess.Popen[bytes],
+                subprocess.Popen(
+                    command, stdin=stdin if pipe is None else pipe, **kwargs
+                ),
+            )
+            processes.append(process)
+            if pipe is not None:
+                # Only the next command holds the read end of the pipe, so
+                # that the previous one gets SIGPIPE if it exits early.
+                pipe.close()
+            pipe = process.stdout
+
+        stderr_zero_copy = zero_copy and (binary or len(commands) == 1)
+        options = (binary, flush, zero_copy, encoding, errors, progress)
+        stderr_options = (
+            binary,
+            flush,
+            stderr_zero_copy,
+            encoding,
+            errors,
+            progress,
+        )
+        sources = [
+            (
+                _fileno(processes[-1].stdout),
+                pipe_reader(stdout_sinks, *options),
+            ),
+            *(
+                (
+                    _fileno(process.stderr),
+                    pipe_reader(stderr_sinks, *stderr_options),
+                )
+                for process in processes
+            ),
+        ]
+        if engine == "selector":
+            multiplex(sources)
+            return [process.wait() for process in processes]
+
+        threads = [PumpThread(*source) for source in sources]
+        for thread in threads:
+            thread.start()
+        try:
+            return_codes = [process.wait() for process in processes]
+        finally:
+            for thread in threads:
+                thread.join()
+        for thread in threads:
+            thread.check()
+        return return_codes
+    except BaseException:
+        for process in processes:
+            process.kill()
+        raise
+    finally:
+        for process in processes:
+            with process:
+                pass
+
+
+def _fileno(file: IO[Any] | None) -> int:
+    """Return the file descriptor of a pipe of a subprocess.
+
+    Args:
+        file: The pipe.
+
+    Returns:
+        The file descriptor.
+
+    Raises:
+        RuntimeError: If the pipe is None.
+    """
+    if file is None:
+        raise RuntimeError("The pipe of a subprocess cannot be None")
+    return file.fileno()
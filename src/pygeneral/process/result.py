@@ -0,0 +1,187 @@
+import io
+import subprocess
+from collections import deque
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+
+from pygeneral.process.metrics import StreamMetrics
+
+_ENCODING = "utf-8"
+_ERRORS = "surrogateescape"
+
+
+class Capture:
+    """A text sink that keeps a bounded amount of the output it receives.
+
+    By default, all lines are kept in memory. With `lines`, only the last
+    lines are kept in a ring buffer. With `size`, all lines are kept, but
+    they are moved to a temporary file once they take more than `size`
+    bytes, so memory use stays bounded while the tail remains available.
+    """
+
+    dropped: int
+    _lines: deque[str]
+    _file: SpooledTemporaryFile[bytes] | None
+    _size: int
+    _max_size: int
+
+    def __init__(self, lines: int | None = None, size: int | None = None):
+        """Initialize a capture.
+
+        Args:
+            lines: The number of last lines to keep.
+            size: The number of bytes to keep in memory before spilling to a
+                temporary file.
+
+        Raises:
+            ValueError: If both `lines` and `size` are given, or if one of
+                them is not positive.
+        """
+        if lines is not None and size is not None:
+            raise ValueError("Only one of lines and size can be given.")
+        if any(limit is not None and limit <= 0 for limit in (lines, size)):
+            raise ValueError(f"Limits must be positive: {lines=}, {size=}")
+        self.dropped = 0
+        self._size = 0
+        self._max_size = size or 0
+        # The lines stay empty if they are written to a file instead.
+        self._lines = deque(maxlen=lines)
+        self._file = None
+        if size is not None:
+            self._file = SpooledTemporaryFile(max_size=size)
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the captured output was moved to a temporary file."""
+        return self._file is not None and self._size > self._max_size
+
+    def write(self, line: str) -> None:
+        """Capture a line.
+
+        Args:
+            line: The line to capture.
+        """
+        if self._file is not None:
+            self._size += self._file.write(line.encode(_ENCODING, _ERRORS))
+            return
+        if len(self._lines) == self._lines.maxlen:
+            self.dropped += 1
+        self._lines.append(line)
+
+    def getvalue(self) -> str:
+        """Return all captured output.
+
+        Returns:
+            The captured lines, joined.
+        """
+        if self._file is None:
+            return "".join(self._lines)
+        self._file.seek(0)
+        data = self._file.read()
+        self._file.seek(0, io.SEEK_END)
+        return data.decode(_ENCODING, _ERRORS)
+
+    def tail(self, lines: int = 10) -> str:
+        """Return the last captured lines.
+
+        Only the end of a temporary file is read.
+
+        Args:
+            lines: The number of lines to return.
+
+        Returns:
+            The last `lines` lines, joined.
+        """
+        if lines <= 0:
+            return ""
+        if self._file is None:
+            start = max(len(self._lines) - lines, 0)
+            return "".join(islice(self._lines, start, None))
+
+        end = self._file.seek(0, io.SEEK_END)
+        position = end
+        data = b""
+        while position and data.count(b"\n", 0, -1) < lines:
+            step = min(position, 64 * 1024)
+            position -= step
+            self._file.seek(position)
+            data = self._file.read(step) + data
+        self._file.seek(end)
+        text = data.decode(_ENCODING, _ERRORS)
+        return "".join(text.splitlines(keepends=True)[-lines:])
+
+    def close(self) -> None:
+        """Discard the captured output and remove the temporary file."""
+        if self._file is None:
+            self._lines.clear()
+        else:
+            self._file.close()
+
+
+class StreamResult:
+    """The outcome of `stream_subprocess` when a result is requested."""
+
+    args: list[str]
+    returncode: int
+    stdout: Capture
+    stderr: Capture
+    metrics: StreamMetrics
+    timed_out: bool
+    cancelled: bool
+
+    def __init__(
+        self,
+        args: list[str],
+        returncode: int,
+        stdout: Capture,
+        stderr: Capture,
+        metrics: StreamMetrics,
+        timed_out: bool = False,
+        cancelled: bool = False,
+    ) -> None:
+        """Initialize a stream result.
+
+        Args:
+            args: The command that was executed.
+            returncode: The return code of the subprocess.
+            stdout: The captured stdout.
+            stderr: The captured stderr.
+            metrics: The resource usage and throughput of the subprocess.
+            timed_out: Whether the subprocess was stopped by a timeout.
+            cancelled: Whether the subprocess was stopped by a cancel token.
+        """
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.metrics = metrics
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+    def __repr__(self) -> str:
+        return (
+            f"StreamResult(args={self.args!r}, returncode={self.returncode!r})"
+        )
+
+    def check_returncode(self, lines: int = 10) -> None:
+        """Raise an error if the subprocess failed.
+
+        Args:
+            lines: The number of last lines of stdout and stderr to attach
+                to the error.
+
+        Raises:
+            subprocess.CalledProcessError: If the return code is non-zero.
+        """
+        if self.returncode:
+            raise subprocess.CalledProcessError(
+                self.returncode,
+                self.args,
+                self.stdout.tail(lines),
+                self.stderr.tail(lines),
+            )
+
+    def close(self) -> None:
+        """Discard the captured output, see `Capture.close`."""
+        self.stdout.close()
+        self.stderr.close()
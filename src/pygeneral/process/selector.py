@@ -0,0 +1,170 @@
+import os
+import selectors
+import threading
+from collections.abc import Iterable
+from typing import Protocol, override
+
+from pygeneral.process.sinks import Fanout
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Reader(Protocol):
+    """Consumes the data of a readable file descriptor."""
+
+    def read(self, fd: int) -> bool:
+        """Read from `fd` once, returning False at end of file."""
+        ...
+
+    def close(self) -> None:
+        """Handle the end of file."""
+        ...
+
+
+class ChunkReader:
+    """Read chunks of bytes from a file descriptor into a fanout."""
+
+    _fanout: Fanout
+
+    def __init__(self, fanout: Fanout) -> None:
+        """Initialize a chunk reader.
+
+        Args:
+            fanout: The fanout that receives the chunks of bytes. Wrap text
+                sinks in a `LineSink`.
+        """
+        self._fanout = fanout
+
+    def read(self, fd: int) -> bool:
+        """Read a chunk from `fd` and write it to the fanout.
+
+        Args:
+            fd: A readable file descriptor.
+
+        Returns:
+            False at end of file, True otherwise.
+        """
+        data = os.read(fd, CHUNK_SIZE)
+        if data:
+            self._fanout.write(data)
+        return bool(data)
+
+    def close(self) -> None:
+        """Close the fanout."""
+        self._fanout.close()
+
+
+def multiplex(sources: Iterable[tuple[int, Reader]]) -> None:
+    """Read from file descriptors on the current thread.
+
+    The file descriptors are made non-blocking and are watched with a
+    selector, so any number of them is served without starting threads.
+    This returns once all of them have reached end of file, after closing
+    their readers. If a reader raises, the file descriptors that have not
+    reached end of file are released, see `release`, and their readers are
+    closed before the error is raised. Selectors do not support pipes on
+    Windows.
+
+    Args:
+        sources: Pairs of a readable file descriptor and its reader.
+    """
+    with selectors.DefaultSelector() as selector:
+        for fd, reader in sources:
+            os.set_blocking(fd, False)
+            selector.register(fd, selectors.EVENT_READ, reader)
+
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    reader: Reader = key.data
+                    try:
+                        if reader.read(key.fd):
+                            continue
+                    except BlockingIOError:
+                        continue
+                    selector.unregister(key.fd)
+                    reader.close()
+        except BaseException:
+            for key in list(selector.get_map().values()):
+                selector.unregister(key.fd)
+                release(key.fd)
+                key.data.close()
+            raise
+
+
+def pump(fd: int, reader: Reader) -> None:
+    """Read from a blocking file descriptor until end of file.
+
+    This returns after closing the reader. If the reader raises, `fd` is
+    released first, see `release`, so that the writer does not block once
+    the pipe is full.
+
+    Args:
+        fd: A readable file descriptor.
+        reader: The reader of `fd`.
+    """
+    try:
+        while reader.read(fd):
+            pass
+    except BaseException:
+        release(fd)
+        raise
+    finally:
+        reader.close()
+
+
+def release(fd: int) -> None:
+    """Close the pipe behind a file descriptor that others still own.
+
+    The descriptor is replaced by one of the null device, which closes the
+    read end of the pipe, so that its writer gets SIGPIPE instead of
+    blocking. The descriptor itself stays valid until its owner closes it,
+    so that it cannot be reused by another file in the meantime.
+
+    Args:
+        fd: The file descriptor of the read end of a pipe.
+    """
+    null = os.open(os.devnull, os.O_RDONLY)
+    try:
+        os.dup2(null, fd)
+    except OSError:
+        pass
+    finally:
+        os.close(null)
+
+
+class PumpThread(threading.Thread):
+    """A thread that reads from a file descriptor, see `pump`.
+
+    An error of the reader is kept instead of being printed by the thread,
+    so that the thread that joins it can raise it with `check`.
+    """
+
+    error: BaseException | None
+    _fd: int
+    _reader: Reader
+
+    def __init__(self, fd: int, reader: Reader) -> None:
+        """Initialize a pump thread.
+
+        Args:
+            fd: A readable file descriptor.
+            reader: The reader of `fd`.
+        """
+        super().__init__(daemon=True)
+        self.error = None
+        self._fd = fd
+        self._reader = reader
+
+    @override
+    def run(self) -> None:
+        """Read from the file descriptor until end of file."""
+        try:
+            pump(self._fd, self._reader)
+        except BaseException as error:
+            self.error = error
+
+    def check(self) -> None:
+        """Raise the error of the reader, if any."""
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,613 @@
+import inspect
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractContextManager, nullcontext
+from typing import IO, Any, Literal, cast, override
+
+from pygeneral.process.decode import LineDecoder
+from pygeneral.process.flush import FlushPolicy, flush_timer
+
+
+class SinkWrapper(ABC):
+    """A sink that wraps other sinks and takes part in the stream lifetime.
+
+    A fanout opens its wrappers when it is created and closes them at the
+    end of the stream, so a wrapper can be shared between streams.
+    """
+
+    def open(self) -> None:
+        """Prepare for a stream that starts writing to this sink."""
+
+    @abstractmethod
+    def write(self, data: Any) -> Awaitable[None] | None:
+        """Write a line or chunk of a stream.
+
+        A wrapper of async sinks returns an awaitable, which is awaited by
+        `Fanout.awrite`.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """Handle the end of a stream that wrote to this sink.
+
+        The wrapped sinks themselves are not closed.
+        """
+
+
+Sink = IO[str] | Callable[[str], None] | SinkWrapper
+AsyncSink = Sink | Callable[[str], Awaitable[None]]
+BinarySink = IO[bytes] | Callable[[bytes], None] | SinkWrapper
+Overflow = Literal["block", "drop_oldest", "drop_newest"]
+
+
+def sink_list(
+    sinks: Sink | BinarySink | list[Sink] | list[BinarySink],
+) -> list[Any]:
+    """Return a new list of the sinks of a stream.
+
+    Args:
+        sinks: A sink or a list of sinks.
+
+    Returns:
+        The sinks, in a list that can be extended.
+    """
+    return list(sinks) if isinstance(sinks, list) else [sinks]
+
+
+class Fanout:
+    """Write each line or chunk of a stream to one or more sinks.
+
+    The sinks are flushed according to their flush policy. Sinks that have
+    a flush interval are flushed by the flush timer as well, so the fanout
+    is locked while it writes. An error of the flush timer is raised when
+    the fanout is closed.
+    """
+
+    interval: float
+    _targets: list["_Target"]
+    _wrappers: list[SinkWrapper]
+    _lock: AbstractContextManager[Any]
+    _error: Exception | None
+
+    def __init__(
+        self,
+        sinks: list[Sink] | list[AsyncSink] | list[BinarySink],
+        policy: FlushPolicy | None = None,
+    ) -> None:
+        """Initialize a fanout.
+
+        Args:
+            sinks: Sinks that will receive the streamed data.
+            policy: The flush policy of sinks that do not declare one.
+                Defaults to flushing after every write.
+        """
+        policy = policy or FlushPolicy()
+        self._error = None
+        self._targets = [_Target(sink, policy) for sink in sinks]
+        self._wrappers = [
+            sink for sink in sinks if isinstance(sink, SinkWrapper)
+        ]
+        for wrapper in self._wrappers:
+            wrapper.open()
+        intervals = [target.interval for target in self._targets]
+        self.interval = min(filter(None, intervals), default=0.0)
+        if self.interval:
+            self._lock = threading.Lock()
+            flush_timer().register(self)
+        else:
+            self._lock = nullcontext()
+
+    def write(self, line: str | bytes) -> None:
+        """Write a line or chunk to each sink.
+
+        Args:
+            line: The line or chunk to write.
+        """
+        with self._lock:
+            for target in self._targets:
+                target.write(line)
+                if target.size == 0:
+                    target.flush()
+                else:
+                    target.add_pending(len(line))
+
+    async def awrite(self, line: str) -> None:
+        """Write a line to each sink, awaiting async callables.
+
+        Args:
+            line: The line to write.
+        """
+        for target in self._targets:
+            with self._lock:
+                result = target.write(line)
+            if inspect.isawaitable(result):
+                await result
+            with self._lock:
+                if target.size == 0:
+                    target.flush()
+                else:
+                    target.add_pending(len(line))
+
+    def flush_due(self, now: float) -> None:
+        """Flush the sinks whose pending data is older than their interval.
+
+        Args:
+            now: The current value of `time.monotonic`.
+        """
+        with self._lock:
+            for target in self._targets:
+                if target.since is not None and target.interval:
+                    if now - target.since >= target.interval:
+                        target.flush_pending()
+
+    def fail(self, error: Exception) -> None:
+        """Keep an error of the flush timer until the fanout is closed.
+
+        Args:
+            error: The exception that a sink raised.
+        """
+        self._error = self._error or error
+
+    def close(self) -> None:
+        """Signal the end of the stream and flush all pending data.
+
+        Raises:
+            Exception: The exception that a sink raised while it was
+                flushed by the flush timer, if any.
+        """
+        try:
+            for wrapper in self._wrappers:
+                wrapper.close()
+            with self._lock:
+                for target in self._targets:
+                    target.flush_pending()
+        finally:
+            if self.interval:
+                flush_timer().unregister(self)
+        if self._error is not None:
+            raise self._error
+
+
+class _Target:
+    """A sink of a fanout with its flush policy and flush state."""
+
+    __slots__ = ("write", "flush", "size", "interval", "pending", "since")
+
+    write: Callable[[Any], object]
+    flush: Callable[[], object]
+    size: int | None
+    interval: float | None
+    pending: int
+    since: float | None
+
+    def __init__(self, sink: object, policy: FlushPolicy) -> None:
+        """Initialize a target.
+
+        Args:
+            sink: The sink to write to.
+            policy: The flush policy, unless the sink declares its own.
+        """
+        write_callable = getattr(sink, "write", None)
+        if write_callable is None:
+            write_callable = cast(Callable[[Any], object], sink)
+        policy = getattr(sink, "flush_policy", None) or policy
+        self.write = write_callable
+        self.flush = getattr(sink, "flush", lambda: None)
+        self.size = policy.size
+        self.interval = policy.interval
+        self.pending = 0
+        self.since = None
+
+    def add_pending(self, size: int) -> None:
+        """Account for unflushed data and flush it if it is too much.
+
+        Args:
+            size: The length of the data that was written.
+        """
+        self.pending += size
+        if self.size is not None and self.pending >= self.size:
+            self.flush_pending()
+        elif self.since is None:
+            self.since = time.monotonic()
+
+    def flush_pending(self) -> None:
+        """Flush the sink if data was written since it was last flushed."""
+        if self.pending:
+            self.flush()
+            self.pending = 0
+            self.since = None
+
+
+class LineSink(SinkWrapper):
+    """Split chunks of bytes into lines for one or more text sinks.
+
+    This adapts text sinks to the binary mode of `stream_subprocess`, which
+    otherwise passes chunks of bytes to its sinks without decoding them. The
+    lines are decoded by a `LineDecoder`. The sinks are opened with the
+    first stream that writes to this sink and closed after the last one.
+    Streams that write to it at the same time share its decoder, so their
+    incomplete lines may be mixed up.
+    """
+
+    _sinks: list[Sink]
+    _encoding: str | None
+    _errors: str | None
+    _policy: FlushPolicy | None
+    _progress: "ProgressSink | None"
+    _lock: threading.Lock
+    _streams: int
+    _decoder: LineDecoder
+    _fanout: Fanout
+
+    def __init__(
+        self,
+        sinks: Sink | list[Sink],
+        encoding: str | None = None,
+        errors: str | None = None,
+        policy: FlushPolicy | None = None,
+        progress: float | None = None,
+    ) -> None:
+        r"""Initialize a line sink.
+
+        Args:
+            sinks: Sinks that will receive the decoded lines.
+            encoding: The text encoding, see `LineDecoder`.
+            errors: The error handler of the encoding, see `LineDecoder`.
+            policy: The flush policy of the sinks, see `Fanout`.
+            progress: If set, progress updates that end with "\r" are
+                coalesced and written at most once per this many seconds,
+                see `ProgressSink`.
+        """
+        sinks = sinks if isinstance(sinks, list) else [sinks]
+        self._sinks = sinks
+        self._encoding = encoding
+        self._errors = errors
+        self._policy = policy
+        self._progress = None
+        if progress is not None:
+            self._progress = ProgressSink(sinks, progress, policy)
+        self._lock = threading.Lock()
+        self._streams = 0
+
+    @override
+    def open(self) -> None:
+        """Open the sinks, unless another stream already did."""
+        with self._lock:
+            self._streams += 1
+            if self._streams > 1:
+                return
+            progress = self._progress is not None
+            self._decoder = LineDecoder(self._encoding, self._errors, progress)
+            if self._progress is None:
+                self._fanout = Fanout(self._sinks, self._policy)
+            else:
+                self._fanout = Fanout([self._progress])
+
+    @override
+    def write(self, data: bytes) -> None:
+        """Write the lines that are completed by `data` to the sinks.
+
+        Args:
+            data: The next chunk of bytes.
+        """
+        self._write(self._decoder.decode(data))
+
+    @override
+    def close(self) -> None:
+        """Write an incomplete last line after the last stream.
+
+        Pending data is then flushed, but the sinks themselves are not
+        closed.
+        """
+        with self._lock:
+            self._streams -= 1
+            if self._streams:
+                return
+            self._write(self._decoder.decode(b"", final=True))
+            self._fanout.close()
+
+    def _write(self, lines: list[str]) -> None:
+        """Write decoded lines to the sinks.
+
+        Args:
+            lines: The lines of a chunk.
+        """
+        if self._progress is not None:
+            self._progress.write_lines(lines)
+            return
+        for line in lines:
+            self._fanout.write(line)
+
+
+class ProgressSink(SinkWrapper):
+    r"""Coalesce progress updates before they are written to text sinks.
+
+    Tools like curl, pip and rsync redraw a progress line many times per
+    second by ending it with "\r" instead of "\n". Only the latest of these
+    updates is written to the sinks, at most once per `interval` seconds.
+    An update that was held back is written by the flush timer once the
+    interval has passed, or is discarded when a line that ends with "\n"
+    follows it, as that line overwrites it on a terminal. All such lines are
+    written. The lines must be decoded by a `LineDecoder` with `progress`.
+    Like a `LineSink`, it can be shared between streams.
+    """
+
+    interval: float
+    _sinks: list[Sink]
+    _policy: FlushPolicy | None
+    _fanout: Fanout
+    _lock: threading.Lock
+    _streams: int
+    _latest: str | None
+    _written: float
+    _error: Exception | None
+
+    def __init__(
+        self,
+        sinks: Sink | list[Sink],
+        interval: float = 0.1,
+        policy: FlushPolicy | None = None,
+    ) -> None:
+        """Initialize a progress sink.
+
+        Args:
+            sinks: Sinks that will receive the lines and progress updates.
+            interval: The least number of seconds between two progress
+                updates that are written.
+            policy: The flush policy of the sinks, see `Fanout`.
+
+        Raises:
+            ValueError: If `interval` is negative.
+        """
+        if interval < 0:
+            raise ValueError(f"interval must not be negative: {interval=}")
+        sinks = sinks if isinstance(sinks, list) else [sinks]
+        self.interval = interval
+        self._sinks = sinks
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._streams = 0
+        self._latest = None
+        self._written = float("-inf")
+        self._error = None
+
+    @override
+    def open(self) -> None:
+        """Open the sinks, unless another stream already did.
+
+        Held back updates are then written in time by the flush timer.
+        """
+        with self._lock:
+            self._streams += 1
+            if self._streams > 1:
+                return
+            self._error = None
+            self._fanout = Fanout(self._sinks, self._policy)
+        if self.interval:
+            flush_timer().register(self)
+
+    @override
+    def write(self, data: str) -> None:
+        r"""Write a line, or a progress update if it is due.
+
+        Args:
+            data: A line that ends with "\n", or a progress update that
+                ends with "\r".
+        """
+        self.write_lines([data])
+
+    def write_lines(self, lines: list[str]) -> None:
+        r"""Write the lines of a chunk, and its last update if it is due.
+
+        This is faster than writing the lines one by one, as updates that
+        are followed by a line or another update in the same chunk are
+        skipped right away.
+
+        Args:
+            lines: Lines that end with "\n" and progress updates that end
+                with "\r".
+        """
+        if not lines:
+            return
+        with self._lock:
+            for line in lines:
+                if not line.endswith("\r"):
+                    self._latest = None
+                    self._fanout.write(line)
+            if lines[-1].endswith("\r"):
+                now = time.monotonic()
+                if now - self._written >= self.interval:
+                    self._write(lines[-1], now)
+                else:
+                    self._latest = lines[-1]
+
+    def flush_due(self, now: float) -> None:
+        """Write the held back update if the interval has passed.
+
+        Args:
+            now: The current value of `time.monotonic`.
+        """
+        with self._lock:
+            latest = self._latest
+            if latest is not None and now - self._written >= self.interval:
+                self._write(latest, now)
+
+    def fail(self, error: Exception) -> None:
+        """Keep an error of the flush timer until the sink is closed.
+
+        Args:
+            error: The exception that a sink raised.
+        """
+        self._error = self._error or error
+
+    @override
+    def close(self) -> None:
+        """Write the held back update after the last stream.
+
+        The final state is then kept, and the sinks are flushed.
+
+        Raises:
+            Exception: The exception that a sink raised while an update
+                was written by the flush timer, if any.
+        """
+        with self._lock:
+            self._streams -= 1
+            if self._streams:
+                return
+        if self.interval:
+            flush_timer().unregister(self)
+        with self._lock:
+            if self._latest is not None:
+                self._write(self._latest, time.monotonic())
+        self._fanout.close()
+        if self._error is not None:
+            raise self._error
+
+    def _write(self, line: str, now: float) -> None:
+        """Write a progress update to the sinks.
+
+        Args:
+            line: The progress update.
+            now: The current value of `time.monotonic`.
+        """
+        self._latest = None
+        self._written = now
+        self._fanout.write(line)
+
+
+class QueuedSink(SinkWrapper):
+    """Write to a sink from a thread of its own, through a bounded queue.
+
+    A slow sink, like a network log shipper, then no longer slows down the
+    reading of the pipes, and thereby the subprocess. When the queue is full,
+    `overflow` decides what happens:
+
+    - "block": wait until the writer thread makes room.
+    - "drop_oldest": discard the oldest queued line or chunk.
+    - "drop_newest": discard the line or chunk that is written.
+
+    The number of discarded lines or chunks is counted by `dropped`. At the
+    end of the stream, the queue is drained before the stream returns. If
+    the sink raises an exception, the rest of the stream is discarded and
+    the exception is raised at the end of the stream.
+    """
+
+    flush_policy: FlushPolicy = FlushPolicy(size=None)
+
+    dropped: int
+    _sink: Sink | BinarySink
+    _policy: FlushPolicy | None
+    _overflow: Overflow
+    _queue: queue.Queue[Any]
+    _lock: threading.Lock
+    _streams: int
+    _thread: threading.Thread | None
+    _error: BaseException | None
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        sink: Sink | BinarySink,
+        maxsize: int = 1024,
+        overflow: Overflow = "block",
+        policy: FlushPolicy | None = None,
+    ) -> None:
+        """Initialize a queued sink.
+
+        Args:
+            sink: The sink that is written to by the writer thread.
+            maxsize: The maximum number of queued lines or chunks.
+            overflow: What to do when the queue is full, see above.
+            policy: The flush policy of `sink`, see `Fanout`.
+
+        Raises:
+            ValueError: If `maxsize` is not positive or `overflow` is not
+                one of the values above.
+        """
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive: {maxsize=}")
+        if overflow not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"Invalid overflow: {overflow=}")
+        self.dropped = 0
+        self._sink = sink
+        self._policy = policy
+        self._overflow = overflow
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._streams = 0
+        self._thread = None
+        self._error = None
+
+    @override
+    def open(self) -> None:
+        """Start the writer thread, unless another stream already did."""
+        with self._lock:
+            self._streams += 1
+            if self._thread is None:
+                self._error = None
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    @override
+    def write(self, data: str | bytes) -> None:
+        """Queue a line or chunk for the writer thread.
+
+        Args:
+            data: The line or chunk to write.
+        """
+        if self._overflow == "block":
+            self._queue.put(data)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(data)
+                return
+            except queue.Full:
+                if self._overflow == "drop_newest":
+                    self._count_drop()
+                    return
+            try:
+                self._queue.get_nowait()
+                self._count_drop()
+            except queue.Empty:
+                pass
+
+    @override
+    def close(self) -> None:
+        """Drain the queue and stop the writer thread after the last stream.
+
+        Raises:
+            Exception: The exception that the sink raised, if any.
+        """
+        with self._lock:
+            self._streams -= 1
+            if self._streams or self._thread is None:
+                return
+            thread, self._thread = self._thread, None
+            self._queue.put(self._STOP)
+            thread.join()
+            if self._error is not None:
+                raise self._error
+
+    def _count_drop(self) -> None:
+        """Count a discarded line or chunk."""
+        with self._lock:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        """Write the queued lines or chunks to the sink until stopped."""
+        fanout = Fanout(cast(list[Sink], [self._sink]), self._policy)
+        while (data := self._queue.get()) is not self._STOP:
+            if self._error is None:
+                try:
+                    fanout.write(data)
+                except Exception as error:
+                    self._error = error
+        try:
+            fanout.close()
+        except Exception as error:
+            self._error = self._error or error
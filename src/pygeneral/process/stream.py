@@ -0,0 +1,608 @@
+import os
+import subprocess
+import sys
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from typing import IO, Any, Literal, cast, overload
+
+from pygeneral.process.cache import ResultCache
+from pygeneral.process.cancel import CancelToken, Watchdog
+from pygeneral.process.filters import FilterSink, Stage
+from pygeneral.process.flush import FlushPolicy
+from pygeneral.process.forward import forwarder, pipe_reader
+from pygeneral.process.metrics import StreamMetrics, wait
+from pygeneral.process.result import Capture, StreamResult
+from pygeneral.process.selector import PumpThread, Reader, multiplex
+from pygeneral.process.sinks import (
+    BinarySink,
+    Fanout,
+    LineSink,
+    Sink,
+    sink_list,
+)
+from pygeneral.process.terminal import PtyReader, open_ptys
+
+Engine = Literal["thread", "selector"]
+
+
+@overload
+def stream_subprocess(
+    command: list[str],
+    stdout: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    stderr: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    *,
+    engine: Engine = "thread",
+    binary: bool = False,
+    flush: FlushPolicy | None = None,
+    metrics: Callable[[StreamMetrics], None] | None = None,
+    timeout: float | None = None,
+    cancel: CancelToken | None = None,
+    grace: float = 5.0,
+    zero_copy: bool = True,
+    pty: bool | Literal["merged"] = False,
+    progress: float | None = None,
+    filters: list[Stage] | None = None,
+    cache: ResultCache | None = None,
+    cache_inputs: list[str | os.PathLike[str]] | None = None,
+    result: Literal[False] = False,
+    **kwargs,
+) -> int: ...
+
+
+@overload
+def stream_subprocess(
+    command: list[str],
+    stdout: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    stderr: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    *,
+    engine: Engine = "thread",
+    binary: bool = False,
+    flush: FlushPolicy | None = None,
+    metrics: Callable[[StreamMetrics], None] | None = None,
+    timeout: float | None = None,
+    cancel: CancelToken | None = None,
+    grace: float = 5.0,
+    zero_copy: bool = True,
+    pty: bool | Literal["merged"] = False,
+    progress: float | None = None,
+    filters: list[Stage] | None = None,
+    cache: ResultCache | None = None,
+    cache_inputs: list[str | os.PathLike[str]] | None = None,
+    result: Literal[True],
+    capture_lines: int | None = None,
+    capture_size: int | None = None,
+    **kwargs,
+) -> StreamResult: ...
+
+
+def stream_subprocess(
+    command: list[str],
+    stdout: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    stderr: Sink | BinarySink | list[Sink] | list[BinarySink] | None = None,
+    *,
+    engine: Engine = "thread",
+    binary: bool = False,
+    flush: FlushPolicy | None = None,
+    metrics: Callable[[StreamMetrics], None] | None = None,
+    timeout: float | None = None,
+    cancel: CancelToken | None = None,
+    grace: float = 5.0,
+    zero_copy: bool = True,
+    pty: bool | Literal["merged"] = False,
+    progress: float | None = None,
+    filters: list[Stage] | None = None,
+    cache: ResultCache | None = None,
+    cache_inputs: list[str | os.PathLike[str]] | None = None,
+    result: bool = False,
+    capture_lines: int | None = None,
+    capture_size: int | None = None,
+    **kwargs,
+) -> int | StreamResult:
+    r"""Run `command` as a subprocess while streaming its stdout and stderr.
+
+    Args:
+        command: The command to execute.
+        stdout: Optional sinks or sink collections that receive stdout data.
+        stderr: Optional sinks or sink collections that receive stderr data.
+        engine: How the output is read:
+            - "thread": two threads read stdout and stderr line by line.
+            - "selector": the calling thread multiplexes stdout and stderr
+              using non-blocking reads, so no threads are started. This is
+              not supported on Windows.
+        binary: If True, the output is read in chunks of up to 64 KiB that
+            are passed to the sinks as bytes, without decoding or splitting
+            lines, and the sinks are flushed once per chunk. This is much
+            faster for children that write many lines. Wrap text sinks in a
+            `LineSink` to receive lines anyway. The default sinks are
+            `sys.stdout.buffer` and `sys.stderr.buffer`.
+        flush: When the sinks are flushed, see `FlushPolicy`. By default,
+            they are flushed after every line or chunk. Sinks can override
+            this with a `flush_policy` attribute.
+        metrics: Called with the `StreamMetrics` of the subprocess after it
+            has exited, which include its wall time, CPU times, maximum
+            resident set size, and the lines and bytes of each stream.
+        timeout: The number of seconds after which the subprocess is
+            stopped. It is sent SIGTERM, and SIGKILL if it is still running
+            after `grace` seconds. On POSIX, the signals are sent to its
+            process group: the subprocess is started in a new session, so
+            that its own children are stopped as well.
+        cancel: A token that stops the subprocess like `timeout` does, when
+            it is cancelled by another thread.
+        grace: The number of seconds between SIGTERM and SIGKILL.
+        zero_copy: If all sinks of a stream are binary file objects with a
+            file descriptor, like files opened by `open(path, "wb")`, the
+            data is copied to them unchanged by the kernel, without passing
+            it through Python, see `Forwarder`. Text files receive the
+            decoded lines, so that their encoding and newline translation
+            apply. Set this to False to always write the output through the
+            file objects. As with any
+            sink, an error of a write, like a closed pipe or a full disk,
+            closes the pipe of the stream, so that the subprocess gets
+            SIGPIPE, and is raised once the subprocess has exited.
+        pty: If True, stdout and stderr are pseudo-terminals instead of
+            pipes, so that the subprocess sees a terminal and writes its
+            output line by line instead of in blocks, like most programs
+            do. With "merged", stdout and stderr share a pseudo-terminal
+            and all output goes to the stdout sinks. The output is read in
+            chunks, like in binary mode. This is not supported on Windows.
+        progress: If set, output that ends with "\r" instead of "\n", like
+            the progress bars of curl or pip, is treated as updates of a
+            progress line. Only the latest update is written to the sinks,
+            at most once per this many seconds, while every line that ends
+            with "\n" is written. Streams are not forwarded to files then.
+            In binary mode, pass this to a `LineSink` instead.
+        filters: Stages that filter or transform each line once, before it
+            is written to the sinks, like `Exclude`, `Redact` or `Sample`.
+            The lines of `result` are filtered as well, but the lines and
+            bytes of `metrics` are those of the subprocess. Streams are not
+            forwarded to files then. This is not supported in binary mode.
+        cache: A cache of the output of previous runs, for commands whose
+            output only depends on the command, the environment variables
+            named by the cache and `cache_inputs`. On a hit, the recorded
+            stdout and stderr are written to the sinks in their original
+            order and the recorded return code is returned, without running
+            the command. Runs that were stopped or killed by a signal are
+            not stored. Streams are not forwarded to files on a miss.
+        cache_inputs: Files whose content the output depends on, see
+            `ResultCache.key`.
+        result: If True, a `StreamResult` is returned instead of the return
+            code. It holds the captured stdout and stderr, which are also
+            written to the sinks, the `StreamMetrics`, and whether the
+            subprocess was stopped by `timeout` or `cancel`. Unless a limit
+            is given, all output is kept in memory, see `Capture`.
+        capture_lines: Only keep the last lines of stdout and stderr.
+        capture_size: The number of bytes of stdout and stderr to keep in
+            memory before spilling them to a temporary file.
+        **kwargs: Additional keyword arguments to pass to `subprocess.Popen`.
+            The following kwargs cannot be overridden:
+            - stdout: Set to `subprocess.PIPE`.
+            - stderr: Set to `subprocess.PIPE`.
+            - text: Set to `True`.
+            - bufsize: Set to `1` (line-buffered).
+            Only stdout and stderr are set by the selector engine and the
+            binary mode, which decode the output themselves.
+
+    Returns:
+        The return code of the subprocess, or a `StreamResult` if `result`
+        is True. The return code of a stopped subprocess is the negative
+        number of the signal that stopped it, on POSIX.
+
+    Raises:
+        ValueError: If `pty` is used on Windows, or `progress` or `filters`
+            in binary mode.
+    """
+    if pty and sys.platform == "win32":
+        raise ValueError("Pseudo-terminals are not supported on Windows")
+    if binary and progress is not None:
+        raise ValueError("progress requires text mode, use a LineSink")
+    if binary and filters:
+        raise ValueError("filters require text mode")
+    if binary:
+        stdout = stdout or sys.stdout.buffer
+        stderr = stderr or sys.stderr.buffer
+    else:
+        stdout = stdout or sys.stdout
+        stderr = stderr or sys.stderr
+    if stdout is None or stderr is None:
+        raise ValueError(f"stdout and/or stderr is None: {stdout=}, {stderr=}")
+
+    stdout_sinks: list[Any] = sink_list(stdout)
+    stderr_sinks: list[Any] = sink_list(stderr)
+
+    captures = None
+    if result:
+        captures = (
+            Capture(capture_lines, capture_size),
+            Capture(capture_lines, capture_size),
+        )
+        if binary:
+            encoding = kwargs.get("encoding")
+            errors = kwargs.get("errors")
+            stdout_sinks.append(LineSink(captures[0].write, encoding, errors))
+            stderr_sinks.append(LineSink(captures[1].write, encoding, errors))
+        else:
+            stdout_sinks.append(captures[0])
+            stderr_sinks.append(captures[1])
+
+    if filters:
+        stdout_sinks = [FilterSink(filters, stdout_sinks, flush)]
+        stderr_sinks = [FilterSink(filters, stderr_sinks, flush)]
+
+    stats = None
+    if result or metrics is not None:
+        stats = StreamMetrics(command)
+        stdout_sinks.append(stats.stdout)
+        stderr_sinks.append(stats.stderr)
+
+    watchdog = None
+    if timeout is not None or cancel is not None:
+        watchdog = Watchdog(timeout, cancel, grace)
+        if sys.platform != "win32":
+            kwargs["start_new_session"] = True
+
+    return_code = None
+    recording = None
+    if cache is not None:
+        key = cache.key(
+            command,
+            cache_inputs or (),
+            kwargs.get("env"),
+            kwargs.get("cwd"),
+            binary=binary,
+            pty=pty,
+            progress=progress,
+            encoding=kwargs.get("encoding"),
+            errors=kwargs.get("errors"),
+        )
+        return_code = cache.replay(
+            key, stdout_sinks, stderr_sinks, binary, flush
+        )
+        if return_code is None:
+            recording = cache.record(key)
+            stdout_sinks.append(recording.sink(0))
+            stderr_sinks.append(recording.sink(1))
+
+    if return_code is not None:
+        if stats is not None:
+            stats.stop(return_code)
+    else:
+        try:
+            return_code = _run(
+                command,
+                stdout_sinks,
+                stderr_sinks,
+                engine,
+                binary,
+                flush,
+                stats,
+                watchdog,
+                zero_copy,
+                pty,
+                progress,
+                **kwargs,
+            )
+        except BaseException:
+            if recording is not None:
+                recording.discard()
+            raise
+        if recording is not None:
+            stopped = watchdog is not None and (
+                watchdog.timed_out or watchdog.cancelled
+            )
+            if stopped or return_code < 0:
+                recording.discard()
+            else:
+                recording.commit(return_code)
+    if metrics is not None and stats is not None:
+        metrics(stats)
+    if captures is None or stats is None:
+        return return_code
+    return StreamResult(
+        command,
+        return_code,
+        *captures,
+        stats,
+        timed_out=watchdog is not None and watchdog.timed_out,
+        cancelled=watchdog is not None and watchdog.cancelled,
+    )
+
+
+def _run(
+    command: list[str],
+    stdout: list[Sink] | list[BinarySink],
+    stderr: list[Sink] | list[BinarySink],
+    engine: Engine,
+    binary: bool,
+    flush: FlushPolicy | None,
+    metrics: StreamMetrics | None,
+    watchdog: Watchdog | None,
+    zero_copy: bool,
+    pty: bool | Literal["merged"],
+    progress: float | None,
+    **kwargs,
+) -> int:
+    """Run `command` with the engine and mode of `stream_subprocess`.
+
+    Args:
+        command: The command to execute.
+        stdout: Targets that receive stdout data.
+        stderr: Targets that receive stderr data.
+        engine: Whether to read the pipes using threads or a selector.
+        binary: Whether the targets receive chunks instead of lines.
+        flush: The flush policy of the targets.
+        metrics: The metrics to record the resource usage in, if any.
+        watchdog: The watchdog that stops the subprocess, if any.
+        zero_copy: Whether to forward streams to files in the kernel.
+        pty: Whether to use pseudo-terminals, and whether to merge them.
+        progress: The interval of progress updates, if they are coalesced.
+        **kwargs: Additional keyword arguments to pass to `subprocess.Popen`.
+
+    Returns:
+        The subprocess return code.
+    """
+    if binary or pty or progress is not None or engine == "selector":
+        return _stream_chunks(
+            command,
+            stdout,
+            stderr,
+            engine,
+            binary,
+            flush,
+            metrics,
+            watchdog,
+            zero_copy,
+            pty,
+            progress,
+            **kwargs,
+        )
+
+    kwargs["bufsize"] = 1
+    kwargs["stderr"] = subprocess.PIPE
+    kwargs["stdout"] = subprocess.PIPE
+    kwargs["text"] = True
+    with subprocess.Popen(command, **kwargs) as process:
+        return _stream(
+            process,
+            cast(list[Sink], stdout),
+            cast(list[Sink], stderr),
+            flush,
+            metrics,
+            watchdog,
+            zero_copy,
+        )
+
+
+def _stream_chunks(
+    command: list[str],
+    stdout: list[Sink] | list[BinarySink],
+    stderr: list[Sink] | list[BinarySink],
+    engine: Engine,
+    binary: bool,
+    flush: FlushPolicy | None,
+    metrics: StreamMetrics | None,
+    watchdog: Watchdog | None,
+    zero_copy: bool,
+    pty: bool | Literal["merged"],
+    progress: float | None,
+    **kwargs,
+) -> int:
+    """Run `command` and copy its output in chunks of bytes.
+
+    The pipes are opened in binary mode. Unless `binary` is True, the chunks
+    are decoded into lines using the `encoding` and `errors` kwargs, like
+    `subprocess.Popen` would.
+
+    Args:
+        command: The command to execute.
+        stdout: Targets that receive stdout data.
+        stderr: Targets that receive stderr data.
+        engine: Whether to read the pipes using threads or a selector.
+        binary: Whether the targets receive chunks instead of lines.
+        flush: The flush policy of the targets.
+        metrics: The metrics to record the resource usage in, if any.
+        watchdog: The watchdog that stops the subprocess, if any.
+        zero_copy: Whether to forward streams to files in the kernel.
+        pty: Whether to use pseudo-terminals, and whether to merge them.
+        progress: The interval of progress updates, if they are coalesced.
+        **kwargs: Additional keyword arguments to pass to `subprocess.Popen`.
+
+    Returns:
+        The subprocess return code.
+    """
+    encoding: str | None = kwargs.pop("encoding", None)
+    errors: str | None = kwargs.pop("errors", None)
+    kwargs.pop("universal_newlines", None)
+    kwargs["stderr"] = subprocess.PIPE
+    kwargs["stdout"] = subprocess.PIPE
+    kwargs["text"] = False
+    options = (binary, flush, zero_copy, encoding, errors, progress)
+
+    ptys = open_ptys(1 if pty == "merged" else 2) if pty else []
+    try:
+        with _popen(command, ptys, **kwargs) as process:
+            sources: list[tuple[int, Reader]]
+            if ptys:
+                sources = [
+                    (master, PtyReader(pipe_reader(sinks, *options)))
+                    for (master, _), sinks in zip(ptys, (stdout, stderr))
+                ]
+            elif process.stdout is None or process.stderr is None:
+                raise RuntimeError(
+                    "Stdout and/or stderr cannot be None"
+                    f"{process.stdout=}, {process.stderr=}"
+                )
+            else:
+                sources = [
+                    (process.stdout.fileno(), pipe_reader(stdout, *options)),
+                    (process.stderr.fileno(), pipe_reader(stderr, *options)),
+                ]
+            if engine == "selector":
+                with _watch(watchdog, process):
+                    multiplex(sources)
+                    return wait(process, metrics)
+
+            threads = [PumpThread(*source) for source in sources]
+            return _wait(process, threads, metrics, watchdog)
+    finally:
+        for master, _ in ptys:
+            os.close(master)
+
+
+def _popen(
+    command: list[str], ptys: list[tuple[int, int]], **kwargs
+) -> subprocess.Popen[bytes]:
+    """Start `command`, writing its output to pseudo-terminals if any.
+
+    Args:
+        command: The command to execute.
+        ptys: The master and slave ends of the pseudo-terminals of stdout
+            and stderr, or of both if there is only one.
+        **kwargs: Additional keyword arguments to pass to `subprocess.Popen`.
+
+    Returns:
+        The subprocess.
+    """
+    if ptys:
+        kwargs["stdout"] = ptys[0][1]
+        kwargs["stderr"] = ptys[-1][1]
+    try:
+        # The output is bytes, as text is False.
+        return cast(
+            subprocess.Popen[bytes], subprocess.Popen(command, **kwargs)
+        )
+    finally:
+        # The subprocess holds the slave ends, so that reading from the
+        # master ends stops when it exits.
+        for _, slave in ptys:
+            os.close(slave)
+
+
+def _watch(
+    watchdog: Watchdog | None, process: subprocess.Popen[Any]
+) -> AbstractContextManager[None]:
+    """Return a context in which `watchdog` watches `process`, if any.
+
+    Args:
+        watchdog: The watchdog, or None.
+        process: The subprocess to watch.
+
+    Returns:
+        The context of the watchdog, or an empty context.
+    """
+    return nullcontext() if watchdog is None else watchdog.watch(process)
+
+
+def _stream(
+    process: subprocess.Popen[str],
+    stdout: list[Sink],
+    stderr: list[Sink],
+    flush: FlushPolicy | None = None,
+    metrics: StreamMetrics | None = None,
+    watchdog: Watchdog | None = None,
+    zero_copy: bool = False,
+) -> int:
+    """Stream stdout and stderr from a subprocess to standard streams.
+
+    Args:
+        process: The subprocess instance whose output will be streamed.
+        stdout: Targets that receive stdout data.
+        stderr: Targets that receive stderr data.
+        flush: The flush policy of the targets.
+        metrics: The metrics to record the resource usage in, if any.
+        watchdog: The watchdog that stops the subprocess, if any.
+        zero_copy: Whether to forward streams to files in the kernel.
+
+    Returns:
+        The subprocess return code.
+    """
+    if process.stdout is None or process.stderr is None:
+        raise RuntimeError(
+            "Stdout and/or stderr cannot be None"
+            f"{process.stdout=}, {process.stderr=}"
+        )
+
+    threads: list[PumpThread] = []
+    for source, targets in ((process.stdout, stdout), (process.stderr, stderr)):
+        forward = forwarder(targets) if zero_copy else None
+        reader = forward or _LineReader(source, targets, flush)
+        threads.append(PumpThread(source.fileno(), reader))
+
+    return _wait(process, threads, metrics, watchdog)
+
+
+def _wait(
+    process: subprocess.Popen[Any],
+    threads: list[PumpThread],
+    metrics: StreamMetrics | None,
+    watchdog: Watchdog | None,
+) -> int:
+    """Start the threads that read the output of `process` and wait.
+
+    Args:
+        process: The subprocess.
+        threads: The threads that read its stdout and stderr.
+        metrics: The metrics to record the resource usage in, if any.
+        watchdog: The watchdog that stops the subprocess, if any.
+
+    Returns:
+        The subprocess return code.
+    """
+    for thread in threads:
+        thread.start()
+    try:
+        with _watch(watchdog, process):
+            return_code = wait(process, metrics)
+            for thread in threads:
+                thread.join()
+    finally:
+        # If waiting fails, the readers are joined after the watchdog has
+        # stopped the subprocess, as they only finish once it has exited.
+        for thread in threads:
+            thread.join()
+    for thread in threads:
+        thread.check()
+    return return_code
+
+
+class _LineReader:
+    """Read lines from a text source into one or more targets."""
+
+    _source: IO[str]
+    _fanout: Fanout
+
+    def __init__(
+        self,
+        source: IO[str],
+        targets: list[Sink],
+        flush: FlushPolicy | None = None,
+    ) -> None:
+        """Initialize a line reader.
+
+        Args:
+            source: The subprocess stream to read from.
+            targets: Sinks that will receive the streamed text.
+            flush: The flush policy of the targets.
+        """
+        self._source = source
+        self._fanout = Fanout(targets, flush)
+
+    def read(self, fd: int) -> bool:
+        """Copy the lines of the source to each target until end of file.
+
+        The lines are read in one call, as the source is blocking.
+
+        Args:
+            fd: The file descriptor of the source, which is read through
+                the source itself.
+
+        Returns:
+            False, as the end of file is reached.
+        """
+        write = self._fanout.write
+        for line in self._source:
+            write(line)
+        return False
+
+    def close(self) -> None:
+        """Close the targets."""
+        self._fanout.close()
@@ -0,0 +1,73 @@
+import errno
+import os
+
+from pygeneral.process.selector import Reader
+
+
+def open_ptys(count: int) -> list[tuple[int, int]]:
+    """Open pseudo-terminals for the output of a subprocess.
+
+    The terminals do not translate newlines into carriage return and newline
+    pairs, so the output is the same as it would be through a pipe.
+
+    Args:
+        count: The number of pseudo-terminals to open.
+
+    Returns:
+        Pairs of the file descriptors of the master and the slave end.
+    """
+    import termios
+
+    ptys: list[tuple[int, int]] = []
+    try:
+        for _ in range(count):
+            master, slave = os.openpty()
+            ptys.append((master, slave))
+            attributes = termios.tcgetattr(slave)
+            attributes[1] &= ~termios.ONLCR
+            termios.tcsetattr(slave, termios.TCSANOW, attributes)
+    except BaseException:
+        for fds in ptys:
+            for fd in fds:
+                os.close(fd)
+        raise
+    return ptys
+
+
+class PtyReader:
+    """Read from the master end of a pseudo-terminal.
+
+    Reading from a master whose slave ends are all closed fails with EIO on
+    Linux, instead of returning an empty chunk. This is treated as the end
+    of file.
+    """
+
+    _reader: Reader
+
+    def __init__(self, reader: Reader) -> None:
+        """Initialize a pseudo-terminal reader.
+
+        Args:
+            reader: The reader of the data.
+        """
+        self._reader = reader
+
+    def read(self, fd: int) -> bool:
+        """Read from `fd` once.
+
+        Args:
+            fd: The master end of a pseudo-terminal.
+
+        Returns:
+            False at end of file, True otherwise.
+        """
+        try:
+            return self._reader.read(fd)
+        except OSError as error:
+            if error.errno == errno.EIO:
+                return False
+            raise
+
+    def close(self) -> None:
+        """Close the reader."""
+        self._reader.close()
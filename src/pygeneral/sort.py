@@ -1,8 +1,25 @@
+import heapq
+import mmap
 import re
-from typing import Callable
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor
+from itertools import chain, repeat
+from operator import sub
+from typing import IO
 
+_BUFFER_SIZE: int = 64 * 1024 * 1024
+_MAX_RUNS: int = 64
+_PARALLEL_THRESHOLD: int = 4 * 1024 * 1024
+_SMALL_INPUT: int = 64
+_LINE_BREAK: re.Pattern[bytes] = re.compile(rb"\r?\n")
 
-def lensort(lines: str, regex: str) -> str:
+
+def lensort(
+    lines: str, regex: str, workers: int = 1, limit: int | None = None
+) -> str:
     r"""
     Sort the lines based on the number of characters before the regular
     expression match is found. The lines with the least number of characters
@@ -10,33 +27,549 @@ def lensort(lines: str, regex: str) -> str:
     with the most number of characters before the regular expression match are
     moved to the bottom. Lines with no match are moved to the top.
 
-    The lines are first sorted based on the total number of characters. This
-    ensures that lines with the same number of characters are sorted based on
-    their total length.
+    Lines with the same number of characters before the match are sorted
+    based on their total length. Lines for which both are equal keep their
+    original order.
+
+    The regular expression is compiled once, after which a single composite
+    key is computed for each line, such that only one sort is needed.
+
+    When `workers` is larger than 1 and `lines` is large enough to make up for
+    the cost of starting a process pool, the lines are split into `workers`
+    chunks that are sorted in parallel, after which the sorted chunks are
+    merged. The result is the same as sorting serially.
+
+    When `limit` is given, only the first `limit` lines of the result are
+    returned. These are selected with a heap in O(n log limit) time, instead
+    of sorting all lines.
 
     Args:
     ----
         lines: lines of text separated by a newline.
         regex: the regular expression
+        workers: the maximum number of processes to sort with.
+        limit: the maximum number of lines to return.
 
     Returns:
     -------
         sorted variable definitions separated by a newline.
 
     """
-    len_to_match: Callable[[str], int] = _make_len_to_match(regex)
+    if limit is None and workers > 1 and len(lines) >= _PARALLEL_THRESHOLD:
+        return _lensort_parallel(lines, regex, workers)
+
+    return _lensort(lines, re.compile(regex), limit)
+
+
+def lensort_many(
+    texts: Iterable[str],
+    regex: str,
+    executor: Executor | None = None,
+    chunksize: int = 1,
+) -> list[str]:
+    """
+    Sort each text in `texts` like `lensort`, see `LenSorter.sort_many`.
+
+    Args:
+    ----
+        texts: the texts to sort.
+        regex: the regular expression.
+        executor: an optional thread or process pool to sort the texts with.
+        chunksize: the number of texts that are sent to a process at once.
+
+    Returns:
+    -------
+        the sorted texts, in the same order as `texts`.
+
+    """
+    return LenSorter(regex).sort_many(texts, executor, chunksize)
+
+
+def lensort_stream(
+    lines: Iterable[str],
+    regex: str,
+    buffer_size: int = _BUFFER_SIZE,
+    limit: int | None = None,
+) -> Iterator[str]:
+    r"""
+    Sort `lines` in the same order as `lensort`, without holding all of them
+    in memory.
+
+    The lines are collected in chunks of at most `buffer_size` bytes. Each
+    chunk is sorted in memory and spilled to a temporary file as a sorted run,
+    after which the runs are k-way merged. As the merge is stable and the runs
+    are merged in the order in which they were read, the result is identical
+    to that of `lensort`. If the input fits in a single chunk, nothing is
+    written to disk.
+
+    When `limit` is given, only the first `limit` lines of the result are
+    returned. These are selected with a heap that holds at most `limit`
+    lines, so nothing is written to disk and `buffer_size` is ignored.
+
+    Args:
+    ----
+        lines: an iterable of text, such as an open file. Each item is split
+            into lines in the same way as `str.splitlines`.
+        regex: the regular expression.
+        buffer_size: the approximate number of bytes of lines that are kept
+            in memory at once.
+        limit: the maximum number of lines to return.
+
+    Returns:
+    -------
+        an iterator over the sorted lines, without line endings.
+
+    """
+    key: Callable[[str], tuple[int, int]] = _make_key(regex)
+    if limit is not None:
+        yield from heapq.nsmallest(limit, _split_items(lines), key=key)
+        return
+
+    runs: list[IO[str]] = []
+    try:
+        chunk: list[str] = []
+        size: int = 0
+        for line in _split_items(lines):
+            chunk.append(line)
+            size += sys.getsizeof(line) + 8
+            if size >= buffer_size:
+                chunk.sort(key=key)
+                runs.append(_write_run(chunk))
+                chunk.clear()
+                size = 0
+                if len(runs) >= _MAX_RUNS:
+                    merged = heapq.merge(*map(_read_run, runs), key=key)
+                    run = _write_run(merged)
+                    _close_runs(runs)
+                    runs.append(run)
+
+        chunk.sort(key=key)
+        yield from heapq.merge(*map(_read_run, runs), chunk, key=key)
+    finally:
+        _close_runs(runs)
+
+
+def lensort_bytes(
+    data: bytes | bytearray | mmap.mmap,
+    regex: bytes,
+    limit: int | None = None,
+) -> Iterator[bytes]:
+    r"""
+    Sort the lines in `data` in the same order as `lensort`, without creating
+    a string object for each line.
+
+    Only the start and end offset and the sort key of each line are kept, in
+    arrays of 64 bit integers. The permutation that sorts the keys is then
+    used to slice the lines from `data` in sorted order. As `data` may be a
+    memory-mapped file, this needs memory proportional to the number of lines
+    instead of the size of the text.
+
+    Lines are separated by "\n" or "\r\n". Contrary to `lensort`, the number
+    of characters before the match and the line length are counted in bytes.
+
+    Args:
+    ----
+        data: lines of text separated by a newline.
+        regex: the regular expression.
+        limit: the maximum number of lines to return, see `lensort`.
+
+    Returns:
+    -------
+        an iterator over the sorted lines, without line endings.
+
+    """
+    starts, ends = _index_lines(data)
+    keys: array[int] = _make_byte_keys(data, starts, ends, re.compile(regex))
+    for index in _argsort(keys, limit):
+        # Slices of bytes and memory maps are bytes, so only bytearrays copy.
+        yield bytes(data[starts[index] : ends[index]])
+
+
+class LenSorter:
+    r"""
+    Sort many texts with the same regular expression.
+
+    The regular expression and its key function are created once, when the
+    sorter is created, so sorting a text only computes the keys and sorts
+    them. A sorter can be pickled, so it can be sent to a process pool.
+
+    Examples:
+    --------
+        >>> sorter = LenSorter("=")
+        >>> sorter.sort_many(["abc = 1\nx = 2", "yy = 3\nz = 4"])
+        ['x = 2\nabc = 1', 'z = 4\nyy = 3']
+
+    """
+
+    _pattern: re.Pattern[str]
+    _key: Callable[[str], tuple[int, int]]
+
+    def __init__(self, regex: str | re.Pattern[str]) -> None:
+        """
+        Initialize the sorter.
+
+        Args:
+        ----
+            regex: the regular expression, which may already be compiled.
+
+        """
+        self._pattern = re.compile(regex)
+        self._key = _make_key(self._pattern)
+
+    def sort(self, lines: str, limit: int | None = None) -> str:
+        """
+        Sort a single text, see `lensort`.
+
+        Args:
+        ----
+            lines: lines of text separated by a newline.
+            limit: the maximum number of lines to return.
+
+        Returns:
+        -------
+            sorted lines separated by a newline.
+
+        """
+        return _lensort(lines, self._pattern, limit, self._key)
+
+    def sort_many(
+        self,
+        texts: Iterable[str],
+        executor: Executor | None = None,
+        chunksize: int = 1,
+    ) -> list[str]:
+        """
+        Sort each text in `texts`.
+
+        As the regular expression holds the GIL while matching, a thread pool
+        only helps when `texts` is produced lazily by blocking I/O. A process
+        pool sorts the texts in parallel; in that case, a `chunksize` of a
+        few hundred avoids sending each small text to a process separately.
+
+        Args:
+        ----
+            texts: the texts to sort.
+            executor: an optional thread or process pool to sort the texts
+                with. If omitted, the texts are sorted in the current thread.
+            chunksize: the number of texts that are sent to a process at
+                once. It is ignored by a thread pool.
+
+        Returns:
+        -------
+            the sorted texts, in the same order as `texts`.
+
+        """
+        if executor is None:
+            return list(map(self.sort, texts))
+        return list(executor.map(self.sort, texts, chunksize=chunksize))
+
+    def __reduce__(self) -> tuple[type["LenSorter"], tuple[re.Pattern[str]]]:
+        return LenSorter, (self._pattern,)
+
+
+class LenSortedBuffer:
+    r"""
+    A collection of lines that is kept in the same order as `lensort` would
+    sort them, while lines are added one by one.
+
+    The lines are stored in blocks of sorted lines, together with their cached
+    sort keys and the largest key of each block. Adding a line bisects the
+    largest keys to find its block and then bisects the block, after which it
+    is inserted into a list of at most `2 * load` lines. This keeps adding a
+    line cheap, also when many lines have been added. Lines with equal keys
+    are kept in the order in which they were added.
+
+    Examples:
+    --------
+        >>> buffer = LenSortedBuffer("=", ["abc = 1", "x = 2"])
+        >>> buffer.add("yy = 3")
+        >>> buffer.render()
+        'x = 2\nyy = 3\nabc = 1'
+
+    """
+
+    _key: Callable[[str], tuple[int, int]]
+    _load: int
+    _keys: list[list[tuple[int, int]]]
+    _lines: list[list[str]]
+    _maxes: list[tuple[int, int]]
+    _len: int
+
+    def __init__(
+        self, regex: str, lines: Iterable[str] = (), load: int = 1000
+    ) -> None:
+        """
+        Initialize the buffer.
+
+        Args:
+        ----
+            regex: the regular expression.
+            lines: an iterable of text to add, see `extend`.
+            load: the number of lines per block.
+
+        """
+        self._key = _make_key(regex)
+        self._load = load
+        self._keys = []
+        self._lines = []
+        self._maxes = []
+        self._len = 0
+        self.extend(lines)
+
+    def add(self, line: str) -> None:
+        """
+        Add a single line, which should not contain any line breaks.
+
+        Args:
+        ----
+            line: the line to add.
+
+        """
+        key: tuple[int, int] = self._key(line)
+        self._len += 1
+        if not self._maxes:
+            self._keys.append([key])
+            self._lines.append([line])
+            self._maxes.append(key)
+            return
+
+        block: int = bisect_right(self._maxes, key)
+        if block == len(self._maxes):
+            block -= 1
+            self._keys[block].append(key)
+            self._lines[block].append(line)
+            self._maxes[block] = key
+        else:
+            index: int = bisect_right(self._keys[block], key)
+            self._keys[block].insert(index, key)
+            self._lines[block].insert(index, line)
+
+        if len(self._keys[block]) > 2 * self._load:
+            self._split(block)
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """
+        Add lines of text. Each item is split into lines in the same way as
+        `str.splitlines`, such that both lines read from a file and text that
+        contains multiple lines can be added.
+
+        Args:
+        ----
+            lines: an iterable of text.
+
+        """
+        for line in _split_items(lines):
+            self.add(line)
+
+    def clear(self) -> None:
+        """Remove all lines."""
+        self._keys.clear()
+        self._lines.clear()
+        self._maxes.clear()
+        self._len = 0
+
+    def render(self) -> str:
+        """
+        Return the lines in the same way as `lensort` does.
+
+        Returns:
+        -------
+            sorted lines separated by a newline.
+
+        """
+        return "\n".join(self)
+
+    def _split(self, block: int) -> None:
+        """
+        Split a block that has grown too large into two blocks.
+
+        Args:
+        ----
+            block: the index of the block to split.
+
+        """
+        keys: list[tuple[int, int]] = self._keys[block]
+        lines: list[str] = self._lines[block]
+        self._keys.insert(block + 1, keys[self._load :])
+        self._lines.insert(block + 1, lines[self._load :])
+        self._maxes.insert(block + 1, keys[-1])
+        del keys[self._load :]
+        del lines[self._load :]
+        self._maxes[block] = keys[-1]
+
+    def __iter__(self) -> Iterator[str]:
+        return chain.from_iterable(self._lines)
+
+    def __len__(self) -> int:
+        return self._len
+
+
+def _lensort(
+    lines: str,
+    pattern: re.Pattern[str],
+    limit: int | None,
+    key: Callable[[str], tuple[int, int]] | None = None,
+) -> str:
+    """
+    Sort `lines` in a single thread, see `lensort`.
+
+    Small inputs are sorted directly with a key function, as computing the
+    composite keys of `_make_keys` only pays off for larger inputs.
+
+    Args:
+    ----
+        lines: lines of text separated by a newline.
+        pattern: the compiled regular expression.
+        limit: the maximum number of lines to return.
+        key: the key function of `pattern` made by `_make_key`, if it is
+            already available.
+
+    Returns:
+    -------
+        sorted lines separated by a newline.
+    """
+    as_list: list[str] = lines.splitlines()
+    if limit is None and len(as_list) <= _SMALL_INPUT:
+        as_list.sort(key=key or _make_key(pattern))
+        return "\n".join(as_list)
+
+    keys: list[int] = _make_keys(as_list, pattern)
+    order: list[int] = _argsort(keys, limit)
+    return "\n".join(map(as_list.__getitem__, order))
+
+
+def _lensort_parallel(lines: str, regex: str, workers: int) -> str:
+    """
+    Sort `lines` like `lensort` using a process pool.
+
+    Each chunk is sorted by `_sort_chunk`. The keys of all chunks share the
+    same stride, so they can be compared with each other. The sorted chunks
+    are merged by sorting their concatenation once more: timsort detects the
+    sorted runs and merges them in C, which is faster than `heapq.merge`. As
+    the merge is stable and the chunks are concatenated in order, the result
+    is identical to the serial sort.
+
+    Args:
+    ----
+        lines: lines of text separated by a newline.
+        regex: the regular expression.
+        workers: the number of processes to sort with.
+
+    Returns:
+    -------
+        sorted lines separated by a newline.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks: list[str] = _split_chunks(lines, workers)
+    stride: int = len(lines) + 1
+    keys: list[int] = []
+    sorted_lines: list[str] = []
+    with ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+        runs = executor.map(_sort_chunk, chunks, repeat(regex), repeat(stride))
+        for run_keys, run_lines in runs:
+            keys += run_keys
+            sorted_lines += run_lines
+
+    order: list[int] = sorted(range(len(keys)), key=keys.__getitem__)
+    return "\n".join(map(sorted_lines.__getitem__, order))
+
+
+def _split_chunks(lines: str, count: int) -> list[str]:
+    """
+    Split `lines` into at most `count` chunks of about the same size. Each
+    chunk ends directly after a newline, or at the end of `lines`, so that
+    splitting the chunks into lines gives the same lines as splitting
+    `lines`.
+
+    Args:
+    ----
+        lines: lines of text separated by a newline.
+        count: the number of chunks to aim for.
 
-    as_list = lines.splitlines()
-    as_list.sort(key=len)
-    as_list.sort(key=len_to_match)
-    return "\n".join(as_list)
+    Returns:
+    -------
+        the chunks in their original order.
+    """
+    size: int = len(lines) // count + 1
+    chunks: list[str] = []
+    start: int = 0
+    while start < len(lines):
+        end: int = lines.find("\n", start + size)
+        end = len(lines) if end == -1 else end + 1
+        chunks.append(lines[start:end])
+        start = end
+    return chunks
 
 
-def _make_len_to_match(regex: str) -> Callable[[str], int]:
+def _sort_chunk(
+    chunk: str, regex: str, stride: int
+) -> tuple[list[int], list[str]]:
     """
-    Return a function that takes a line of text and returns the number of
-    characters before a match with `regex` is found. If no match is found, 0
-    is returned.
+    Sort a chunk of lines in a worker process of `_lensort_parallel`.
+
+    Args:
+    ----
+        chunk: lines of text separated by a newline.
+        regex: the regular expression.
+        stride: the stride of the composite keys, see `_make_keys`.
+
+    Returns:
+    -------
+        the sorted keys and the lines in the same order.
+    """
+    as_list: list[str] = chunk.splitlines()
+    keys: list[int] = _make_keys(as_list, re.compile(regex), stride)
+    order: list[int] = sorted(range(len(as_list)), key=keys.__getitem__)
+    return (
+        list(map(keys.__getitem__, order)),
+        list(map(as_list.__getitem__, order)),
+    )
+
+
+def _argsort(keys: Sequence[int], limit: int | None = None) -> list[int]:
+    """
+    Return the indices that sort `keys` in a stable manner.
+
+    Args:
+    ----
+        keys: the sort keys.
+        limit: if given, only the indices of the `limit` smallest keys are
+            returned, which are selected with a heap instead of a full sort.
+
+    Returns:
+    -------
+        the indices of `keys` in sorted order.
+    """
+    if limit is None:
+        return sorted(range(len(keys)), key=keys.__getitem__)
+    return heapq.nsmallest(limit, range(len(keys)), key=keys.__getitem__)
+
+
+def _split_items(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Split each item of `lines` into lines, like `str.splitlines`. An empty
+    item is an empty line.
+
+    Args:
+    ----
+        lines: an iterable of text, such as an open file.
+
+    Returns:
+    -------
+        an iterator over the lines, without line endings.
+    """
+    for item in lines:
+        yield from item.splitlines() or [item]
+
+
+def _make_key(
+    regex: str | re.Pattern[str],
+) -> Callable[[str], tuple[int, int]]:
+    """
+    Return a function that maps a line to its `lensort` sort key, i.e., the
+    number of characters before a match with `regex` is found, or 0 if no
+    match is found, followed by the line length.
 
     Args:
     ----
@@ -44,12 +577,157 @@ def _make_len_to_match(regex: str) -> Callable[[str], int]:
 
     Returns:
     -------
-        a function that takes a line of text and returns the number of
-        characters before a match with `regex` is found.
+        a function that returns the sort key of a line.
+    """
+    search = re.compile(regex).search
+
+    def key(line: str) -> tuple[int, int]:
+        match = search(line)
+        return match.start() if match else 0, len(line)
+
+    return key
+
+
+def _make_keys(
+    lines: list[str], pattern: re.Pattern[str], stride: int = 0
+) -> list[int]:
+    """
+    Return the composite `lensort` sort key of each line in `lines`.
+
+    The key combines the number of characters before the match and the line
+    length into a single integer, which sorts faster than a tuple. The stride
+    between both parts must be larger than the length of the longest line.
+
+    Args:
+    ----
+        lines: the lines to compute the keys for.
+        pattern: the compiled regular expression to match.
+        stride: the stride between both parts of the key. If 0, the length of
+            the longest line plus 1 is used, which keeps the keys small.
+
+    Returns:
+    -------
+        the sort key of each line.
+    """
+    stride = stride or max(map(len, lines), default=0) + 1
+    offsets: list[int] = [
+        match.start() * stride if match else 0
+        for match in map(pattern.search, lines)
+    ]
+    return list(map(int.__add__, offsets, map(len, lines)))
+
+
+def _index_lines(
+    data: bytes | bytearray | mmap.mmap,
+) -> tuple[array[int], array[int]]:
+    """
+    Return the start and end offset of each line in `data`, where the end
+    offset excludes the line break.
+
+    Args:
+    ----
+        data: lines of text separated by a newline.
+
+    Returns:
+    -------
+        the start offsets and the end offsets.
+    """
+    starts: array[int] = array("q", [0])
+    starts.extend(map(re.Match.end, _LINE_BREAK.finditer(data)))
+    ends: array[int] = array("q")
+    ends.extend(map(re.Match.start, _LINE_BREAK.finditer(data)))
+    if starts[-1] == len(data):
+        starts.pop()
+    else:
+        ends.append(len(data))
+    return starts, ends
+
+
+def _make_byte_keys(
+    data: bytes | bytearray | mmap.mmap,
+    starts: array[int],
+    ends: array[int],
+    pattern: re.Pattern[bytes],
+) -> array[int]:
     """
+    Return the composite sort key of each line in `data`, like `_make_keys`.
 
-    def len_to_match(line: str) -> int:
-        match = re.search(regex, line)
-        return match.start() if match else 0
+    Each line is searched through a slice of a `memoryview`, so the lines are
+    never copied.
+
+    Args:
+    ----
+        data: lines of text separated by a newline.
+        starts: the start offset of each line.
+        ends: the end offset of each line.
+        pattern: the compiled regular expression to match.
+
+    Returns:
+    -------
+        the sort key of each line.
+    """
+    lengths: array[int] = array("q", map(sub, ends, starts))
+    stride: int = max(lengths, default=0) + 1
+    with memoryview(data) as view:
+        lines = map(view.__getitem__, map(slice, starts, ends))
+        matches = map(pattern.search, lines)
+        return array(
+            "q",
+            (
+                (match.start() * stride if match else 0) + length
+                for match, length in zip(matches, lengths)
+            ),
+        )
 
-    return len_to_match
+
+def _write_run(lines: Iterable[str]) -> IO[str]:
+    """
+    Write sorted lines to an anonymous temporary file.
+
+    Args:
+    ----
+        lines: the lines to write. They may not contain line breaks.
+
+    Returns:
+    -------
+        the temporary file, positioned at its start.
+    """
+    import tempfile
+
+    run = tempfile.TemporaryFile(
+        "w+", encoding="utf-8", errors="surrogatepass", newline="\n"
+    )
+    for line in lines:
+        run.write(line)
+        run.write("\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run: IO[str]) -> Iterator[str]:
+    """
+    Read the lines that were written by `_write_run`.
+
+    Args:
+    ----
+        run: the temporary file holding the run.
+
+    Returns:
+    -------
+        an iterator over the lines, without line endings.
+    """
+    for line in run:
+        yield line[:-1]
+
+
+def _close_runs(runs: list[IO[str]]) -> None:
+    """
+    Close and forget all runs, which removes their temporary files.
+
+    Args:
+    ----
+        runs: the runs to close.
+    """
+    for run in runs:
+        run.close()
+    runs.clear()
@@ -1,7 +1,12 @@
-from os.path import join
-from subprocess import check_output
-from unittest import TestCase
+import os
+import sys
+from os.path import dirname, join
+from shutil import copy
+from subprocess import check_output, run
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
 
+import pygeneral
 from tests import paths
 
 
@@ -13,3 +18,177 @@ class TestLenSort(TestCase):
         test_lines_file: str = join(paths.static, "test_lines.txt")
         stdout = check_output(["lensort", "=", "-f", test_lines_file])
         self.assertEqual(self.EXPECTED, stdout)
+
+    def test_stream(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        stdout = check_output(
+            ["lensort", "=", "-f", test_lines_file, "--stream", "-S", "64"]
+        )
+        self.assertEqual(self.EXPECTED, stdout)
+
+    def test_jobs(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        stdout = check_output(
+            ["lensort", "=", "-f", test_lines_file, "-j", "2"]
+        )
+        self.assertEqual(self.EXPECTED, stdout)
+
+    def test_bytes(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        stdout = check_output(["lensort", "=", "-f", test_lines_file, "-b"])
+        self.assertEqual(self.EXPECTED, stdout)
+
+    @skipIf(sys.platform == "win32", "/dev/stdin is POSIX only")
+    def test_bytes_pipe(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        with open(test_lines_file, "rb") as file:
+            data: bytes = file.read()
+        stdout = check_output(
+            ["lensort", "=", "-b", "-f", "/dev/stdin"], input=data
+        )
+        self.assertEqual(self.EXPECTED, stdout)
+
+    def test_head(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        expected = b"\n".join(self.EXPECTED.split(b"\n")[:3]) + b"\n"
+        for flags in [[], ["--stream"], ["--bytes"]]:
+            stdout = check_output(
+                ["lensort", "=", "-f", test_lines_file, "--head", "3", *flags]
+            )
+            self.assertEqual(expected, stdout)
+
+    def test_paths(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        stdout = check_output(
+            ["lensort", "=", test_lines_file, test_lines_file]
+        )
+        self.assertEqual(self.EXPECTED * 2, stdout)
+
+    def test_in_place(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        with TemporaryDirectory() as tempdir:
+            for name in ["a.txt", "b.txt"]:
+                copy(test_lines_file, join(tempdir, name))
+            with open(join(tempdir, "c.txt"), "w") as file:
+                file.write("x = 1\nxx = 2\n")
+            pattern = join(tempdir, "*.txt")
+
+            check = run(["lensort", "=", "--check", pattern, "-j", "2"])
+            self.assertEqual(1, check.returncode)
+            with open(join(tempdir, "a.txt"), "rb") as file:
+                with open(test_lines_file, "rb") as original:
+                    self.assertEqual(original.read(), file.read())
+
+            mtime = os.stat(join(tempdir, "c.txt")).st_mtime_ns
+            check_output(["lensort", "=", "--in-place", pattern, "-j", "2"])
+            for name in ["a.txt", "b.txt"]:
+                with open(join(tempdir, name), "rb") as file:
+                    self.assertEqual(self.EXPECTED, file.read())
+            self.assertEqual(
+                mtime, os.stat(join(tempdir, "c.txt")).st_mtime_ns
+            )
+            hidden = [x for x in os.listdir(tempdir) if x.startswith(".")]
+            self.assertEqual([], hidden)
+
+            check = run(["lensort", "=", "--check", pattern])
+            self.assertEqual(0, check.returncode)
+
+    @skipIf(sys.platform == "win32", "symbolic links need privileges")
+    def test_in_place_newlines(self) -> None:
+        """"""
+        with TemporaryDirectory() as tempdir:
+            path: str = join(tempdir, "a.txt")
+            link: str = join(tempdir, "link.txt")
+            with open(path, "wb") as file:
+                file.write(b"xx = 2\r\nx = 1\r\n")
+            os.symlink(path, link)
+
+            check_output(["lensort", "=", "--in-place", link])
+            self.assertTrue(os.path.islink(link))
+            with open(path, "rb") as file:
+                self.assertEqual(b"x = 1\r\nxx = 2\r\n", file.read())
+
+    def test_in_place_options(self) -> None:
+        """"""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        with TemporaryDirectory() as tempdir:
+            path: str = join(tempdir, "a.txt")
+            copy(test_lines_file, path)
+            for mode in ["--check", "--in-place"]:
+                for flags in [["--head", "3"], ["--bytes"], ["--stream"]]:
+                    process = run(
+                        ["lensort", "=", mode, path, *flags],
+                        capture_output=True,
+                    )
+                    self.assertEqual(2, process.returncode)
+                    self.assertIn(b"cannot be combined", process.stderr)
+            with open(path, "rb") as file:
+                with open(test_lines_file, "rb") as original:
+                    self.assertEqual(original.read(), file.read())
+
+
+class TestStartup(TestCase):
+    """Guards the start-up time of the lensort command."""
+
+    BUDGET_US = 50_000
+    LAZY = [
+        "concurrent.futures.process",
+        "glob",
+        "logging.handlers",
+        "multiprocessing",
+        "platform",
+        "pygeneral.log",
+        "shutil",
+        "tempfile",
+    ]
+
+    def python(self, *args: str) -> str:
+        """Run python with pygeneral importable and return its stderr."""
+        src = dirname(dirname(pygeneral.__file__))
+        env = {**os.environ, "PYTHONPATH": src}
+        result = run([sys.executable, *args], env=env, capture_output=True)
+        self.assertEqual(0, result.returncode, result.stderr)
+        return result.stderr.decode()
+
+    def test_lazy_imports(self) -> None:
+        """Modules that only some options need are not imported up front."""
+        code = (
+            "import sys, pygeneral._cli.lensort; "
+            "sys.stderr.write(' '.join(sys.modules))"
+        )
+        modules = self.python("-c", code).split()
+        for module in self.LAZY:
+            self.assertNotIn(module, modules)
+
+    def test_import_time(self) -> None:
+        """The cumulative import time, measured with -X importtime."""
+        timings = []
+        for _ in range(3):
+            stderr = self.python(
+                "-X", "importtime", "-c", "import pygeneral._cli.lensort"
+            )
+            for line in stderr.splitlines():
+                _, cumulative, name = line.split("|")
+                if name.strip() == "pygeneral._cli.lensort":
+                    timings.append(int(cumulative))
+        self.assertLess(min(timings), self.BUDGET_US)
+
+    def test_no_log_file(self) -> None:
+        """Nothing is written to the file system unless logging is requested."""
+        test_lines_file: str = join(paths.static, "test_lines.txt")
+        with TemporaryDirectory() as home:
+            env = {**os.environ, "HOME": home, "APPDATA": home}
+            run(["lensort", "=", "-f", test_lines_file], env=env, check=True)
+            self.assertEqual([], os.listdir(home))
+
+            log_file = join(home, "lensort.log")
+            command = ["lensort", "=", "-f", test_lines_file]
+            run([*command, "--log-file", log_file, "-l", "DEBUG"], check=True)
+            self.assertTrue(os.path.isfile(log_file))
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import unittest
+from io import StringIO
+
+from pygeneral.process import async_stream_subprocess
+
+
+class AsyncStreamSubprocessTests(unittest.IsolatedAsyncioTestCase):
+    """Tests for async_stream_subprocess."""
+
+    async def test_custom_sinks(self) -> None:
+        """Test that stdout and stderr sinks receive the output."""
+        stdout_buffer = StringIO()
+        stderr_buffer = StringIO()
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys; print('custom stdout'); "
+                "sys.stderr.write('custom stderr\\n'); sys.exit(3)"
+            ),
+        ]
+
+        return_code = await async_stream_subprocess(
+            command, stdout=stdout_buffer, stderr=stderr_buffer
+        )
+
+        self.assertEqual(return_code, 3)
+        self.assertEqual(stdout_buffer.getvalue(), "custom stdout\n")
+        self.assertEqual(stderr_buffer.getvalue(), "custom stderr\n")
+
+    async def test_async_sink(self) -> None:
+        """Test that async and sync callables can be mixed as sinks."""
+        captured: list[str] = []
+        synchronous: list[str] = []
+
+        async def sink(line: str) -> None:
+            await asyncio.sleep(0)
+            captured.append(line)
+
+        command = [sys.executable, "-c", "print('a'); print('b')"]
+
+        return_code = await async_stream_subprocess(
+            command, stdout=[sink, synchronous.append]
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(captured, ["a\n", "b\n"])
+        self.assertEqual(synchronous, captured)
+
+    async def test_concurrent(self) -> None:
+        """Test that many subprocesses are streamed from one event loop."""
+        outputs = [StringIO() for _ in range(50)]
+        commands = [
+            [sys.executable, "-c", f"print({index})"]
+            for index in range(len(outputs))
+        ]
+
+        return_codes = await asyncio.gather(
+            *(
+                async_stream_subprocess(command, stdout=output)
+                for command, output in zip(commands, outputs)
+            )
+        )
+
+        self.assertEqual(return_codes, [0] * len(outputs))
+        for index, output in enumerate(outputs):
+            self.assertEqual(output.getvalue(), f"{index}\n")
+
+    @unittest.skipIf(sys.platform == "win32", "signal 0 terminates on Windows")
+    async def test_cancel(self) -> None:
+        """Test that cancelling the task kills the subprocess."""
+        started = asyncio.Event()
+        pids: list[int] = []
+
+        def sink(line: str) -> None:
+            pids.append(int(line))
+            started.set()
+
+        command = [
+            sys.executable,
+            "-c",
+            "import os, time; print(os.getpid(), flush=True); time.sleep(60)",
+        ]
+        task = asyncio.create_task(async_stream_subprocess(command, sink))
+        await asyncio.wait_for(started.wait(), 10)
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pids[0], 0)
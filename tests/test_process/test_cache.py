@@ -0,0 +1,196 @@
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from pygeneral.process import ResultCache, stream_subprocess
+
+SCRIPT = (
+    "import sys\n"
+    "with open(sys.argv[1], 'a') as runs: runs.write('run\\n')\n"
+    "for i in range(3):\n"
+    "    print(f'out {i}', flush=True)\n"
+    "    print(f'err {i}', file=sys.stderr, flush=True)\n"
+    "print(sys.argv[2] * 100)\n"
+    "sys.exit(3)"
+)
+
+
+class ResultCacheTests(unittest.TestCase):
+    """Tests for the result cache of stream_subprocess."""
+
+    ENGINE = "thread"
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.runs = self.directory / "runs"
+        self.cache = ResultCache(self.directory / "cache")
+
+    def command(self, name: str = "x") -> list[str]:
+        """Return a command that counts its runs in `self.runs`."""
+        return [sys.executable, "-c", SCRIPT, str(self.runs), name]
+
+    def count(self) -> int:
+        """Return the number of times that a command ran."""
+        return len(self.runs.read_text().splitlines())
+
+    def stream(self, command: list[str], **kwargs) -> tuple[int, list[str]]:
+        """Stream `command` to one list and return its code and lines."""
+        lines: list[str] = []
+        kwargs.setdefault("cache", self.cache)
+        return_code = stream_subprocess(
+            command, lines.append, lines.append, engine=self.ENGINE, **kwargs
+        )
+        return return_code, lines
+
+    def test_hit(self) -> None:
+        """Test that a stored run is replayed in order without running."""
+        first = self.stream(self.command())
+        second = self.stream(self.command())
+
+        self.assertEqual(first[0], 3)
+        self.assertEqual(second, first)
+        self.assertEqual(len(first[1]), 7)
+        self.assertEqual(self.count(), 1)
+
+    def test_result(self) -> None:
+        """Test that a replayed run has a result and metrics."""
+        self.stream(self.command())
+
+        result = stream_subprocess(
+            self.command(),
+            StringIO(),
+            StringIO(),
+            engine=self.ENGINE,
+            cache=self.cache,
+            result=True,
+        )
+
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stderr.getvalue(), "err 0\nerr 1\nerr 2\n")
+        self.assertEqual(result.metrics.stdout.lines, 4)
+        self.assertEqual(self.count(), 1)
+
+    def test_binary(self) -> None:
+        """Test that chunks of bytes are replayed in binary mode."""
+        outputs = []
+        for _ in range(2):
+            stdout = BytesIO()
+            stream_subprocess(
+                self.command(),
+                stdout,
+                BytesIO(),
+                engine=self.ENGINE,
+                binary=True,
+                cache=self.cache,
+            )
+            outputs.append(stdout.getvalue())
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertTrue(outputs[0].startswith(b"out 0\n"))
+        self.assertEqual(self.count(), 1)
+
+    def test_inputs(self) -> None:
+        """Test that changing an input file is a miss."""
+        path = self.directory / "input"
+        path.write_text("1")
+        self.stream(self.command(), cache_inputs=[path])
+        self.stream(self.command(), cache_inputs=[path])
+        path.write_text("2")
+        self.stream(self.command(), cache_inputs=[path])
+
+        self.assertEqual(self.count(), 2)
+
+    def test_env(self) -> None:
+        """Test that the selected environment variables are in the key."""
+        cache = ResultCache(self.directory / "cache", env=["LEVEL"])
+        for level in ["1", "1", "2"]:
+            env = {**os.environ, "LEVEL": level, "OTHER": level}
+            self.stream(self.command(), cache=cache, env=env)
+
+        self.assertEqual(self.count(), 2)
+
+    def age(self, seconds: float = 10) -> None:
+        """Make the files in the cache directory older."""
+        for path in self.cache.directory.iterdir():
+            stat = path.stat()
+            os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+    def test_eviction(self) -> None:
+        """Test that the least recently used runs are evicted."""
+        self.stream(self.command("a"))
+        size = sum(
+            path.stat().st_size for path in self.cache.directory.iterdir()
+        )
+        self.cache.max_size = size * 2
+
+        self.age()
+        self.stream(self.command("b"))
+        self.age()
+        self.stream(self.command("a"))
+        self.age()
+        self.stream(self.command("c"))
+        self.assertEqual(self.count(), 3)
+
+        self.stream(self.command("a"))
+        self.stream(self.command("c"))
+        self.assertEqual(self.count(), 3)
+        self.stream(self.command("b"))
+        self.assertEqual(self.count(), 4)
+
+    def test_corrupt(self) -> None:
+        """Test that a truncated run is a miss and nothing is replayed."""
+        return_code, lines = self.stream(self.command())
+        (path,) = self.cache.directory.iterdir()
+        data = path.read_bytes()
+
+        for end in [len(data) - 1, len(data) // 2, 3]:
+            path.write_bytes(data[:end])
+            rerun = self.stream(self.command())
+            self.assertEqual(rerun[0], return_code)
+            self.assertEqual(sorted(rerun[1]), sorted(lines))
+            self.assertEqual(len(path.read_bytes()), len(data))
+
+        self.assertEqual(self.count(), 4)
+
+    def test_recordings(self) -> None:
+        """Test that recordings left behind by crashes are deleted."""
+        stale = self.cache.directory / "stale.tmp"
+        fresh = self.cache.directory / "fresh.tmp"
+        stale.write_bytes(b"")
+        fresh.write_bytes(b"")
+        self.age(2 * 24 * 60 * 60)
+        fresh.write_bytes(b"")
+
+        self.cache.evict()
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+        self.cache.clear()
+        self.assertEqual(list(self.cache.directory.iterdir()), [])
+
+    def test_too_large(self) -> None:
+        """Test that a run that does not fit in the cache is not stored."""
+        cache = ResultCache(self.directory / "cache", max_size=100)
+
+        self.stream(self.command(), cache=cache)
+        self.stream(self.command(), cache=cache)
+
+        self.assertEqual(self.count(), 2)
+        self.assertEqual(list(cache.directory.iterdir()), [])
+
+    def test_invalid(self) -> None:
+        """Test that invalid arguments are rejected."""
+        with self.assertRaises(ValueError):
+            ResultCache(self.directory / "cache", max_size=0)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorResultCacheTests(ResultCacheTests):
+    """Tests for the result cache using the selector engine."""
+
+    ENGINE = "selector"
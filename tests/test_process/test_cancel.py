@@ -0,0 +1,144 @@
+import signal
+import sys
+import threading
+import time
+import unittest
+from io import StringIO
+
+from pygeneral.process import CancelToken, stream_subprocess
+
+SLEEP = [sys.executable, "-c", "import time; print('start'); time.sleep(60)"]
+
+
+class CancelTokenTests(unittest.TestCase):
+    """Tests for CancelToken."""
+
+    def test_callbacks(self) -> None:
+        """Test that callbacks run once, also when added after cancelling."""
+        calls: list[str] = []
+
+        def removed() -> None:
+            calls.append("removed")
+
+        token = CancelToken()
+        token.add_callback(lambda: calls.append("first"))
+        token.add_callback(removed)
+        token.remove_callback(removed)
+
+        token.cancel()
+        token.cancel()
+        token.add_callback(lambda: calls.append("late"))
+
+        self.assertTrue(token.cancelled)
+        self.assertEqual(calls, ["first", "late"])
+
+
+@unittest.skipIf(sys.platform == "win32", "process groups are POSIX only")
+class StreamSubprocessTimeoutTests(unittest.TestCase):
+    """Tests for the timeout and cancellation of stream_subprocess."""
+
+    ENGINE = "thread"
+
+    def stream(self, command: list[str], **kwargs):
+        """Stream `command` and return its result and duration."""
+        stdout = StringIO()
+        start = time.monotonic()
+        result = stream_subprocess(
+            command,
+            stdout,
+            StringIO(),
+            engine=self.ENGINE,
+            result=True,
+            **kwargs,
+        )
+        return result, time.monotonic() - start
+
+    def test_no_timeout(self) -> None:
+        """Test that a subprocess within its timeout is not stopped."""
+        result, _ = self.stream([sys.executable, "-c", "pass"], timeout=10)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertFalse(result.timed_out)
+        self.assertFalse(result.cancelled)
+
+    def test_timeout(self) -> None:
+        """Test that a subprocess is terminated after its timeout."""
+        result, elapsed = self.stream(SLEEP, timeout=0.5)
+
+        self.assertTrue(result.timed_out)
+        self.assertFalse(result.cancelled)
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+        self.assertEqual(result.stdout.getvalue(), "start\n")
+        self.assertLess(elapsed, 5)
+
+    def test_grace(self) -> None:
+        """Test that a subprocess that ignores SIGTERM is killed."""
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import signal, time\n"
+                "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+                "print('start', flush=True)\n"
+                "time.sleep(60)"
+            ),
+        ]
+
+        result, elapsed = self.stream(command, timeout=0.5, grace=0.2)
+
+        self.assertTrue(result.timed_out)
+        self.assertEqual(result.returncode, -signal.SIGKILL)
+        self.assertLess(elapsed, 5)
+
+    def test_process_group(self) -> None:
+        """Test that children that hold the pipes are stopped as well."""
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import subprocess, sys\n"
+                "subprocess.Popen([sys.executable, '-c', "
+                "'import time; time.sleep(60)'])\n"
+                "print('start', flush=True)"
+            ),
+        ]
+
+        result, elapsed = self.stream(command, timeout=0.5)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(result.timed_out)
+        self.assertLess(elapsed, 5)
+
+    def test_cancel(self) -> None:
+        """Test that cancelling a token stops the subprocess."""
+        token = CancelToken()
+        timer = threading.Timer(0.5, token.cancel)
+        timer.start()
+
+        result, elapsed = self.stream(SLEEP, cancel=token)
+
+        self.assertTrue(result.cancelled)
+        self.assertFalse(result.timed_out)
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+        self.assertLess(elapsed, 5)
+
+    def test_interrupt(self) -> None:
+        """Test that Ctrl-C stops a subprocess in its own session."""
+        handler = signal.getsignal(signal.SIGINT)
+        self.addCleanup(signal.signal, signal.SIGINT, handler)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        main = threading.main_thread().ident
+        timer = threading.Timer(0.5, signal.pthread_kill, [main, signal.SIGINT])
+        timer.start()
+        start = time.monotonic()
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.stream(SLEEP, timeout=30)
+
+        self.assertLess(time.monotonic() - start, 5)
+
+
+class SelectorStreamSubprocessTimeoutTests(StreamSubprocessTimeoutTests):
+    """Tests for the timeout and cancellation using the selector engine."""
+
+    ENGINE = "selector"
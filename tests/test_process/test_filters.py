@@ -0,0 +1,160 @@
+import sys
+import time
+import unittest
+from io import StringIO
+
+from pygeneral.process import (
+    Exclude,
+    Include,
+    QueuedSink,
+    Redact,
+    Sample,
+    StreamMetrics,
+    stream_subprocess,
+)
+from pygeneral.process.filters import FilterSink
+
+COMMAND = [
+    sys.executable,
+    "-c",
+    (
+        "for i in range(100):\n"
+        "    print(f'DEBUG {i}')\n"
+        "    print(f'INFO {i} token=secret{i}')"
+    ),
+]
+
+
+class StageTests(unittest.TestCase):
+    """Tests for the filter stages."""
+
+    def apply(self, stage, lines: list[str]) -> list[str]:
+        """Write `lines` through `stage` and return the remaining lines."""
+        output: list[str] = []
+        sink = FilterSink([stage], output.append)
+        sink.open()
+        for line in lines:
+            sink.write(line)
+        sink.close()
+        return output
+
+    def test_include(self) -> None:
+        """Test that only lines that match any pattern are kept."""
+        stage = Include("^a", "c$")
+
+        self.assertEqual(self.apply(stage, ["ab", "b", "bc"]), ["ab", "bc"])
+        self.assertEqual((stage.lines, stage.dropped), (3, 1))
+        self.assertGreater(stage.seconds, 0)
+
+    def test_exclude(self) -> None:
+        """Test that lines that match any pattern are dropped."""
+        stage = Exclude("^a", "c$")
+
+        self.assertEqual(self.apply(stage, ["ab", "b", "bc"]), ["b"])
+        self.assertEqual((stage.lines, stage.dropped), (3, 2))
+
+    def test_redact(self) -> None:
+        """Test that matches are replaced literally."""
+        stage = Redact(r"key=\w+", r"\d+", replacement=r"\1")
+
+        self.assertEqual(self.apply(stage, ["key=abc 42"]), [r"\1 \1"])
+        self.assertEqual((stage.lines, stage.dropped), (1, 0))
+
+    def test_sample(self) -> None:
+        """Test that lines are sampled evenly, starting with the first."""
+        lines = [str(i) for i in range(10)]
+
+        self.assertEqual(self.apply(Sample(0.25), lines), ["0", "4", "8"])
+        self.assertEqual(self.apply(Sample(1), lines), lines)
+
+    def test_order(self) -> None:
+        """Test that a dropped line does not reach the following stages."""
+        exclude, include = Exclude("b"), Include("a")
+        output: list[str] = []
+        sink = FilterSink([exclude, include], output.append)
+
+        sink.open()
+        for line in ["a", "b", "c"]:
+            sink.write(line)
+        sink.close()
+
+        self.assertEqual(output, ["a"])
+        self.assertEqual((exclude.lines, exclude.dropped), (3, 1))
+        self.assertEqual((include.lines, include.dropped), (2, 1))
+
+    def test_invalid(self) -> None:
+        """Test that invalid arguments are rejected."""
+        with self.assertRaises(ValueError):
+            Include()
+        with self.assertRaises(ValueError):
+            Sample(0)
+        with self.assertRaises(ValueError):
+            Sample(1.5)
+
+
+class StreamSubprocessFilterTests(unittest.TestCase):
+    """Tests for the filters of stream_subprocess."""
+
+    ENGINE = "thread"
+
+    def test_filters(self) -> None:
+        """Test that each line is filtered once for all sinks."""
+        first, second = StringIO(), StringIO()
+        stages = [
+            Exclude("^DEBUG"),
+            Redact(r"secret\d+"),
+            Sample(0.5),
+        ]
+        collected: list[StreamMetrics] = []
+
+        result = stream_subprocess(
+            COMMAND,
+            [first, second],
+            StringIO(),
+            engine=self.ENGINE,
+            filters=stages,
+            metrics=collected.append,
+            result=True,
+        )
+
+        expected = "".join(f"INFO {i} token=***\n" for i in range(0, 100, 2))
+        self.assertEqual(first.getvalue(), expected)
+        self.assertEqual(second.getvalue(), expected)
+        self.assertEqual(result.stdout.getvalue(), expected)
+        self.assertEqual(collected[0].stdout.lines, 200)
+        self.assertEqual([stage.lines for stage in stages], [200, 100, 100])
+        self.assertEqual([stage.dropped for stage in stages], [100, 0, 50])
+
+    def test_spawn_error(self) -> None:
+        """Test that the sinks are not opened if the command fails."""
+        lines: list[str] = []
+
+        def sink(line: str) -> None:
+            time.sleep(0.001)
+            lines.append(line)
+
+        queued = QueuedSink(sink)
+        with self.assertRaises(FileNotFoundError):
+            stream_subprocess(
+                ["/nonexistent"],
+                queued,
+                engine=self.ENGINE,
+                filters=[Exclude("^DEBUG")],
+            )
+        stream_subprocess(
+            COMMAND, queued, engine=self.ENGINE, filters=[Exclude("^DEBUG")]
+        )
+
+        self.assertEqual(len(lines), 100)
+
+    def test_binary(self) -> None:
+        """Test that filters are rejected in binary mode."""
+        with self.assertRaises(ValueError):
+            stream_subprocess(["true"], binary=True, filters=[Sample(0.5)])
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorStreamSubprocessFilterTests(StreamSubprocessFilterTests):
+    """Tests for the filters of stream_subprocess using a selector."""
+
+    ENGINE = "selector"
@@ -0,0 +1,119 @@
+import sys
+import unittest
+from io import StringIO
+
+from pygeneral.process import FlushPolicy, stream_subprocess
+
+LINES = [sys.executable, "-c", "for i in range(100): print('x' * 9)"]
+QUIET = [
+    sys.executable,
+    "-c",
+    "import time; print('a', flush=True); time.sleep(1); print('b')",
+]
+
+
+class RecordingSink(StringIO):
+    """A text sink that records its content at each flush."""
+
+    flushes: list[str]
+
+    def __init__(self, policy: FlushPolicy | None = None) -> None:
+        super().__init__()
+        self.flushes = []
+        if policy is not None:
+            self.flush_policy = policy
+
+    def flush(self) -> None:
+        self.flushes.append(self.getvalue())
+
+
+class FailingSink(StringIO):
+    """A text sink whose flush fails."""
+
+    def flush(self) -> None:
+        raise OSError("flush failed")
+
+
+class FlushPolicyTests(unittest.TestCase):
+    """Tests for the flush policies of stream_subprocess."""
+
+    ENGINE = "thread"
+
+    def stream(
+        self,
+        command: list[str],
+        sink: RecordingSink,
+        flush: FlushPolicy | None = None,
+    ) -> None:
+        """Stream the stdout of `command` to `sink`."""
+        stream_subprocess(
+            command, sink, StringIO(), engine=self.ENGINE, flush=flush
+        )
+
+    def test_every_line(self) -> None:
+        """Test that sinks are flushed after every line by default."""
+        sink = RecordingSink()
+
+        self.stream(LINES, sink)
+
+        self.assertEqual(len(sink.flushes), 100)
+
+    def test_size(self) -> None:
+        """Test that sinks are flushed once enough data is pending."""
+        sink = RecordingSink()
+
+        self.stream(LINES, sink, FlushPolicy(size=250))
+
+        self.assertEqual(len(sink.flushes), 4)
+        self.assertEqual(len(sink.flushes[0]), 250)
+
+    def test_exit(self) -> None:
+        """Test that sinks can be flushed only at the end of the stream."""
+        sink = RecordingSink()
+
+        self.stream(LINES, sink, FlushPolicy(size=None))
+
+        self.assertEqual(sink.flushes, [sink.getvalue()])
+
+    def test_sink_policy(self) -> None:
+        """Test that the policy of a sink takes precedence."""
+        sink = RecordingSink(FlushPolicy(size=None))
+
+        self.stream(LINES, sink, FlushPolicy())
+
+        self.assertEqual(len(sink.flushes), 1)
+
+    def test_interval(self) -> None:
+        """Test that pending data is flushed while the child is quiet."""
+        sink = RecordingSink()
+
+        self.stream(QUIET, sink, FlushPolicy(size=None, interval=0.05))
+
+        self.assertEqual(sink.flushes, ["a\n", "a\nb\n"])
+
+    def test_interval_error(self) -> None:
+        """Test that an error of a timed flush does not stop the timer."""
+        policy = FlushPolicy(size=None, interval=0.05)
+        sink = RecordingSink()
+
+        with self.assertRaisesRegex(OSError, "flush failed"):
+            stream_subprocess(
+                QUIET, FailingSink(), engine=self.ENGINE, flush=policy
+            )
+        self.stream(QUIET, sink, policy)
+
+        self.assertEqual(sink.flushes, ["a\n", "a\nb\n"])
+
+    def test_invalid(self) -> None:
+        """Test that invalid policies are rejected."""
+        with self.assertRaises(ValueError):
+            FlushPolicy(size=-1)
+        with self.assertRaises(ValueError):
+            FlushPolicy(interval=0)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorFlushPolicyTests(FlushPolicyTests):
+    """Tests for the flush policies using the selector engine."""
+
+    ENGINE = "selector"
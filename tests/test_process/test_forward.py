@@ -0,0 +1,161 @@
+import errno
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pygeneral.process import stream_subprocess
+
+OUTPUT = b"".join(b"line %d\r\n" % i for i in range(10000))
+COMMAND = [
+    sys.executable,
+    "-c",
+    f"import sys; sys.stdout.buffer.write({OUTPUT!r}); sys.exit(3)",
+]
+
+
+class ForwardTests(unittest.TestCase):
+    """Tests for forwarding streams to files without Python objects."""
+
+    ENGINE = "thread"
+    BINARY = False
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def stream(self, stdout: list, **kwargs) -> int:
+        """Stream the stdout of `COMMAND` to `stdout`."""
+        with open(os.devnull, "wb" if self.BINARY else "w") as stderr:
+            return stream_subprocess(
+                COMMAND,
+                stdout,
+                stderr,
+                engine=self.ENGINE,
+                binary=self.BINARY,
+                **kwargs,
+            )
+
+    def open(self, path: Path):
+        """Open `path` for writing in the mode of the stream."""
+        if self.BINARY:
+            return open(path, "wb")
+        return open(path, "w", newline="")
+
+    def test_file(self) -> None:
+        """Test that a binary file receives the output unchanged."""
+        path = self.directory / "out"
+        with open(path, "wb") as file:
+            file.write(b"head\n")
+
+            return_code = self.stream([file])
+            file.write(b"tail\n")
+
+        self.assertEqual(return_code, 3)
+        self.assertEqual(path.read_bytes(), b"head\n" + OUTPUT + b"tail\n")
+
+    def test_text_file(self) -> None:
+        """Test that a text file receives decoded lines instead."""
+        if self.BINARY:
+            self.skipTest("text files require text mode")
+        path = self.directory / "out"
+        with open(path, "w") as file:
+            file.write("head\n")
+
+            self.stream([file])
+            file.write("tail\n")
+
+        expected = OUTPUT.replace(b"\r\n", b"\n")
+        self.assertEqual(path.read_bytes(), b"head\n" + expected + b"tail\n")
+
+    def test_encoding(self) -> None:
+        """Test that a text file encodes the lines with its own encoding."""
+        if self.BINARY:
+            self.skipTest("text files require text mode")
+        path = self.directory / "out"
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.buffer.write(b'h\\xe9llo\\r\\n')",
+        ]
+        with open(path, "w", encoding="utf-16") as file:
+            stream_subprocess(
+                command, [file], engine=self.ENGINE, encoding="latin-1"
+            )
+
+        self.assertEqual(path.read_text(encoding="utf-16"), "h\xe9llo\n")
+
+    @unittest.skipUnless(hasattr(os, "splice"), "os.splice is not available")
+    def test_splice(self) -> None:
+        """Test that a single file is written using os.splice."""
+        path = self.directory / "out"
+        with (
+            open(path, "wb") as file,
+            mock.patch("os.splice", wraps=os.splice) as splice,
+        ):
+            self.stream([file])
+
+        self.assertTrue(splice.called)
+        self.assertEqual(path.read_bytes(), OUTPUT)
+
+    def test_files(self) -> None:
+        """Test that multiple files each receive the output."""
+        paths = [self.directory / "first", self.directory / "second"]
+        with open(paths[0], "wb") as first, open(paths[1], "ab") as second:
+            self.stream([first, second])
+
+        for path in paths:
+            self.assertEqual(path.read_bytes(), OUTPUT)
+
+    def test_mixed(self) -> None:
+        """Test that a sink without a file descriptor disables forwarding."""
+        path = self.directory / "out"
+        captured: list = []
+        with self.open(path) as file:
+            self.stream([file, captured.append])
+
+        expected = OUTPUT if self.BINARY else OUTPUT.replace(b"\r\n", b"\n")
+        self.assertEqual(path.read_bytes(), expected)
+
+    def test_disabled(self) -> None:
+        """Test that forwarding can be disabled."""
+        path = self.directory / "out"
+        with self.open(path) as file:
+            self.stream([file], zero_copy=False)
+
+        expected = OUTPUT if self.BINARY else OUTPUT.replace(b"\r\n", b"\n")
+        self.assertEqual(path.read_bytes(), expected)
+
+    @unittest.skipIf(sys.platform == "win32", "SIGPIPE is POSIX only")
+    def test_closed_pipe(self) -> None:
+        """Test that writing to a closed pipe raises instead of blocking."""
+        read_fd, write_fd = os.pipe()
+        os.close(read_fd)
+        with open(write_fd, "wb") as pipe:
+            with self.assertRaises(BrokenPipeError):
+                self.stream([pipe])
+
+    @unittest.skipUnless(os.path.exists("/dev/full"), "/dev/full is missing")
+    def test_full_disk(self) -> None:
+        """Test that writing to a full disk raises instead of blocking."""
+        with open("/dev/full", "wb") as full:
+            with self.assertRaises(OSError) as context:
+                self.stream([full])
+
+        self.assertEqual(context.exception.errno, errno.ENOSPC)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorForwardTests(ForwardTests):
+    """Tests for forwarding using the selector engine."""
+
+    ENGINE = "selector"
+
+
+class BinaryForwardTests(ForwardTests):
+    """Tests for forwarding in binary mode."""
+
+    BINARY = True
@@ -0,0 +1,136 @@
+import sys
+import time
+import unittest
+from io import StringIO
+
+from pygeneral.process import FlushPolicy, QueuedSink, stream_many
+
+
+def python(code: str) -> list[str]:
+    """Return a command that runs `code` with the current interpreter."""
+    return [sys.executable, "-c", code]
+
+
+class StreamManyTests(unittest.TestCase):
+    """Tests for stream_many."""
+
+    def test_return_codes(self) -> None:
+        """Test that the return code of each command is returned by id."""
+        commands = {"ok": python("pass"), "bad": python("exit(2)")}
+
+        results = stream_many(commands, StringIO(), StringIO())
+
+        self.assertEqual(results, {"ok": 0, "bad": 2})
+
+    def test_tag(self) -> None:
+        """Test that lines are tagged with the index of their command."""
+        stdout = StringIO()
+        stderr = StringIO()
+        commands = [
+            python("print('a'); print('b')"),
+            python("import sys; sys.stderr.write('c\\n')"),
+        ]
+
+        results = stream_many(commands, stdout, stderr)
+
+        self.assertEqual(results, {"0": 0, "1": 0})
+        self.assertEqual(stdout.getvalue(), "[0] a\n[0] b\n")
+        self.assertEqual(stderr.getvalue(), "[1] c\n")
+
+    def test_no_tag(self) -> None:
+        """Test that lines are left untouched if tag is None."""
+        captured: list[str] = []
+
+        stream_many([python("print('a')")], captured.append, tag=None)
+
+        self.assertEqual(captured, ["a\n"])
+
+    def test_shared_sink(self) -> None:
+        """Test that concurrent commands write whole lines to a shared sink."""
+        captured: list[str] = []
+        code = "for i in range(1000): print('x' * 100)"
+        commands = {f"c{i}": python(code) for i in range(8)}
+
+        stream_many(commands, captured.append, max_parallel=8)
+
+        self.assertEqual(len(captured), 8000)
+        for i in range(8):
+            expected = f"[c{i}] " + "x" * 100 + "\n"
+            self.assertEqual(captured.count(expected), 1000)
+
+    def test_tag_flush(self) -> None:
+        """Test that tagged sinks are flushed at the end of each stream."""
+        flushes: list[str] = []
+
+        class Sink(StringIO):
+            flush_policy = FlushPolicy(size=None)
+
+            def flush(self) -> None:
+                flushes.append(self.getvalue())
+
+        sink = Sink()
+
+        stream_many([python("print('a')"), python("print('b')")], sink)
+
+        self.assertEqual(len(flushes), 2)
+        lines = sorted(sink.getvalue().splitlines())
+        self.assertEqual(lines, ["[0] a", "[1] b"])
+
+    def test_tag_queued_sink(self) -> None:
+        """Test that a shared queued sink is drained before returning."""
+        captured: list[str] = []
+
+        def slow(line: str) -> None:
+            time.sleep(0.001)
+            captured.append(line)
+
+        queued = QueuedSink(slow)
+        commands = [python("for i in range(100): print(i)")] * 4
+
+        stream_many(commands, queued)
+
+        self.assertEqual(len(captured), 400)
+
+    def test_keep_going(self) -> None:
+        """Test that all commands run if a command fails."""
+        commands = [python("exit(1)"), python("pass"), python("pass")]
+
+        results = stream_many(commands, StringIO(), max_parallel=1)
+
+        self.assertEqual(results, {"0": 1, "1": 0, "2": 0})
+
+    def test_fail_fast(self) -> None:
+        """Test that a failing command stops the other commands."""
+        commands = {
+            "fail": python("exit(1)"),
+            "slow": python("import time; time.sleep(60)"),
+            "pending": python("pass"),
+        }
+
+        results = stream_many(
+            commands, StringIO(), max_parallel=2, fail_fast=True
+        )
+
+        self.assertEqual(results, {"fail": 1, "slow": None, "pending": None})
+
+    def test_start_error(self) -> None:
+        """Test that a command that cannot be started does not stop others."""
+        commands = {
+            "missing": ["/nonexistent/command"],
+            "slow": python("import time; time.sleep(1)"),
+        }
+
+        results = stream_many(commands, StringIO())
+
+        self.assertEqual(results, {"missing": None, "slow": 0})
+
+    def test_error(self) -> None:
+        """Test that an error of a command is raised in fail-fast mode."""
+        commands = [python("pass"), ["/nonexistent/command"]]
+
+        with self.assertRaises(FileNotFoundError):
+            stream_many(commands, StringIO(), fail_fast=True)
+
+    def test_empty(self) -> None:
+        """Test that no commands give no results."""
+        self.assertEqual(stream_many([]), {})
@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+from io import BytesIO, StringIO
+
+from pygeneral.process import StreamMetrics, stream_subprocess
+
+COMMAND = [
+    sys.executable,
+    "-c",
+    (
+        "import sys, time\n"
+        "data = bytearray(64 * 1024 * 1024)\n"
+        "time.sleep(0.1)\n"
+        "for i in range(1000): print('é' * 9)\n"
+        "sys.stderr.write('x')\n"
+        "sys.exit(2)"
+    ),
+]
+
+
+class StreamMetricsTests(unittest.TestCase):
+    """Tests for the metrics of stream_subprocess."""
+
+    ENGINE = "thread"
+    BINARY = False
+
+    def stream(self, command: list[str]) -> StreamMetrics:
+        """Stream `command` and return the metrics passed to the callback."""
+        collected: list[StreamMetrics] = []
+        sink = BytesIO if self.BINARY else StringIO
+        stream_subprocess(
+            command,
+            sink(),
+            sink(),
+            engine=self.ENGINE,
+            binary=self.BINARY,
+            metrics=collected.append,
+        )
+        self.assertEqual(len(collected), 1)
+        return collected[0]
+
+    def test_metrics(self) -> None:
+        """Test that the throughput and resource usage are collected."""
+        metrics = self.stream(COMMAND)
+
+        self.assertEqual(metrics.args, COMMAND)
+        self.assertEqual(metrics.returncode, 2)
+        self.assertEqual(metrics.stdout.lines, 1000)
+        self.assertEqual(metrics.stdout.nbytes, 1000 * 19)
+        self.assertEqual(metrics.stderr.nbytes, 1)
+        first_output = metrics.first_output
+        assert first_output is not None
+        self.assertGreater(first_output, 0.1)
+        self.assertGreaterEqual(metrics.wall_time, first_output)
+        if hasattr(os, "wait4"):
+            user_time, system_time = metrics.user_time, metrics.system_time
+            assert user_time is not None and system_time is not None
+            assert metrics.max_rss is not None
+            self.assertGreater(user_time + system_time, 0)
+            self.assertGreater(metrics.max_rss, 64 * 1024 * 1024)
+
+    def test_no_output(self) -> None:
+        """Test that the first output is None if nothing was written."""
+        metrics = self.stream([sys.executable, "-c", "pass"])
+
+        self.assertEqual(metrics.returncode, 0)
+        self.assertEqual(metrics.stdout.lines, 0)
+        self.assertIsNone(metrics.first_output)
+
+    def test_result(self) -> None:
+        """Test that the metrics are part of the result."""
+        result = stream_subprocess(
+            COMMAND, StringIO(), StringIO(), engine=self.ENGINE, result=True
+        )
+
+        self.assertEqual(result.metrics.returncode, 2)
+        self.assertEqual(result.metrics.stdout.lines, 1000)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorStreamMetricsTests(StreamMetricsTests):
+    """Tests for the metrics using the selector engine."""
+
+    ENGINE = "selector"
+
+
+class BinaryStreamMetricsTests(StreamMetricsTests):
+    """Tests for the metrics of the binary mode."""
+
+    BINARY = True
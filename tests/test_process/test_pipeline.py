@@ -0,0 +1,134 @@
+import signal
+import sys
+import tempfile
+import time
+import unittest
+from io import BytesIO, StringIO
+
+from pygeneral.process import stream_pipeline
+
+PRODUCER = [
+    sys.executable,
+    "-c",
+    (
+        "import sys\n"
+        "for i in range(3): print(f'line {i}')\n"
+        "sys.stderr.write('produced\\n')\n"
+        "sys.exit(3)"
+    ),
+]
+UPPER = [
+    sys.executable,
+    "-c",
+    (
+        "import sys\n"
+        "sys.stdout.write(sys.stdin.read().upper())\n"
+        "sys.stderr.write('upper\\n')"
+    ),
+]
+
+
+class StreamPipelineTests(unittest.TestCase):
+    """Tests for stream_pipeline."""
+
+    ENGINE = "thread"
+    BINARY = False
+
+    def stream(self, commands: list[list[str]], **kwargs):
+        """Stream `commands` and return the return codes and the output."""
+        sink = BytesIO if self.BINARY else StringIO
+        stdout, stderr = sink(), sink()
+        return_codes = stream_pipeline(
+            commands,
+            stdout,
+            stderr,
+            engine=self.ENGINE,
+            binary=self.BINARY,
+            **kwargs,
+        )
+        output = [
+            value.decode() if isinstance(value, bytes) else value
+            for value in (stdout.getvalue(), stderr.getvalue())
+        ]
+        return return_codes, *output
+
+    def test_pipeline(self) -> None:
+        """Test that the stages are connected and each return code is kept."""
+        return_codes, stdout, stderr = self.stream([PRODUCER, UPPER])
+
+        self.assertEqual(return_codes, [3, 0])
+        self.assertEqual(stdout, "LINE 0\nLINE 1\nLINE 2\n")
+        self.assertEqual(sorted(stderr.splitlines()), ["produced", "upper"])
+
+    def test_single_command(self) -> None:
+        """Test that a single command is streamed like stream_subprocess."""
+        return_codes, stdout, stderr = self.stream([PRODUCER])
+
+        self.assertEqual(return_codes, [3])
+        self.assertEqual(stdout, "line 0\nline 1\nline 2\n")
+        self.assertEqual(stderr, "produced\n")
+
+    def test_stdin(self) -> None:
+        """Test that stdin is passed to the first command."""
+        with tempfile.TemporaryFile() as stdin:
+            stdin.write(b"input\n")
+            stdin.seek(0)
+
+            return_codes, stdout, _ = self.stream([UPPER, UPPER], stdin=stdin)
+
+        self.assertEqual(return_codes, [0, 0])
+        self.assertEqual(stdout, "INPUT\n")
+
+    @unittest.skipIf(sys.platform == "win32", "SIGPIPE is POSIX only")
+    def test_sigpipe(self) -> None:
+        """Test that a stage gets SIGPIPE when the next one exits early."""
+        head = [sys.executable, "-c", "import sys; print(sys.stdin.readline())"]
+        return_codes, stdout, _ = self.stream([["yes"], head])
+
+        self.assertEqual(return_codes, [-signal.SIGPIPE, 0])
+        self.assertEqual(stdout, "y\n\n")
+
+    def test_missing_command(self) -> None:
+        """Test that started stages are stopped if a command fails to start."""
+        sleep = [sys.executable, "-c", "import time; time.sleep(60)"]
+        start = time.monotonic()
+
+        with self.assertRaises(FileNotFoundError):
+            self.stream([sleep, ["pygeneral-missing-command"]])
+
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_sink_error(self) -> None:
+        """Test that the error of a sink is raised instead of blocking."""
+        loud = [sys.executable, "-c", "for i in range(2000000): print(i)"]
+        cat = [sys.executable, "-c", "import sys\nfor x in sys.stdin: print(x)"]
+
+        def fail(_: str | bytes) -> None:
+            raise RuntimeError("sink failed")
+
+        with self.assertRaisesRegex(RuntimeError, "sink failed"):
+            stream_pipeline(
+                [loud, cat],
+                fail,
+                StringIO(),
+                engine=self.ENGINE,
+                binary=self.BINARY,
+            )
+
+    def test_no_commands(self) -> None:
+        """Test that an empty pipeline is rejected."""
+        with self.assertRaises(ValueError):
+            stream_pipeline([])
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorStreamPipelineTests(StreamPipelineTests):
+    """Tests for stream_pipeline using the selector engine."""
+
+    ENGINE = "selector"
+
+
+class BinaryStreamPipelineTests(StreamPipelineTests):
+    """Tests for the binary mode of stream_pipeline."""
+
+    BINARY = True
@@ -0,0 +1,112 @@
+import subprocess
+import sys
+import unittest
+from io import BytesIO, StringIO
+
+from pygeneral.process import Capture, StreamResult, stream_subprocess
+
+LINES = [f"{i}\n" for i in range(1000)]
+COMMAND = [
+    sys.executable,
+    "-c",
+    (
+        "import sys\n"
+        "for i in range(1000): print(i)\n"
+        "sys.stderr.write('failed')\n"
+        "sys.exit(5)"
+    ),
+]
+
+
+class CaptureTests(unittest.TestCase):
+    """Tests for Capture."""
+
+    def write(self, capture: Capture) -> Capture:
+        """Write `LINES` to `capture`."""
+        for line in LINES:
+            capture.write(line)
+        return capture
+
+    def test_unbounded(self) -> None:
+        """Test that all lines are kept by default."""
+        capture = self.write(Capture())
+
+        self.assertEqual(capture.getvalue(), "".join(LINES))
+        self.assertEqual(capture.tail(2), "998\n999\n")
+        self.assertEqual(capture.dropped, 0)
+
+    def test_lines(self) -> None:
+        """Test that only the last lines are kept in a ring buffer."""
+        capture = self.write(Capture(lines=3))
+
+        self.assertEqual(capture.getvalue(), "997\n998\n999\n")
+        self.assertEqual(capture.tail(5), "997\n998\n999\n")
+        self.assertEqual(capture.dropped, 997)
+
+    def test_size(self) -> None:
+        """Test that the output spills to a file beyond the byte budget."""
+        capture = Capture(size=100)
+        capture.write("é\n")
+        self.assertFalse(capture.spilled)
+
+        self.write(capture)
+
+        self.assertTrue(capture.spilled)
+        self.assertEqual(capture.getvalue(), "é\n" + "".join(LINES))
+        self.assertEqual(capture.tail(3), "997\n998\n999\n")
+        self.assertEqual(capture.tail(2000), capture.getvalue())
+        capture.write("tail")
+        self.assertEqual(capture.tail(2), "999\ntail")
+        capture.close()
+
+    def test_invalid(self) -> None:
+        """Test that invalid limits are rejected."""
+        with self.assertRaises(ValueError):
+            Capture(lines=1, size=1)
+        with self.assertRaises(ValueError):
+            Capture(lines=0)
+
+
+class StreamResultTests(unittest.TestCase):
+    """Tests for stream_subprocess with a result."""
+
+    def test_result(self) -> None:
+        """Test that the output is captured and still streamed."""
+        stdout = StringIO()
+
+        result = stream_subprocess(
+            COMMAND, stdout, StringIO(), result=True, capture_lines=10
+        )
+
+        self.assertIsInstance(result, StreamResult)
+        self.assertEqual(result.returncode, 5)
+        self.assertEqual(stdout.getvalue(), "".join(LINES))
+        self.assertEqual(result.stdout.getvalue(), "".join(LINES[-10:]))
+        self.assertEqual(result.stderr.getvalue(), "failed")
+
+    def test_binary(self) -> None:
+        """Test that the output of the binary mode is captured as lines."""
+        result = stream_subprocess(
+            COMMAND,
+            BytesIO(),
+            BytesIO(),
+            binary=True,
+            result=True,
+            capture_size=100,
+        )
+
+        self.assertTrue(result.stdout.spilled)
+        self.assertEqual(result.stdout.tail(1), "999\n")
+
+    def test_check_returncode(self) -> None:
+        """Test that a failure raises an error with the tail of the output."""
+        result = stream_subprocess(
+            COMMAND, StringIO(), StringIO(), result=True
+        )
+
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            result.check_returncode(lines=2)
+
+        self.assertEqual(context.exception.returncode, 5)
+        self.assertEqual(context.exception.output, "998\n999\n")
+        self.assertEqual(context.exception.stderr, "failed")
@@ -0,0 +1,248 @@
+import sys
+import threading
+import time
+import unittest
+from io import StringIO
+
+from pygeneral.process import LineSink, QueuedSink, stream_subprocess
+from pygeneral.process.decode import LineDecoder
+from pygeneral.process.flush import flush_timer
+from pygeneral.process.sinks import Overflow, ProgressSink
+
+
+class BlockedSink:
+    """A sink that blocks on its first write until it is released."""
+
+    lines: list[str]
+    started: threading.Event
+    released: threading.Event
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self, line: str) -> None:
+        self.started.set()
+        self.released.wait(10)
+        self.lines.append(line)
+
+
+class QueuedSinkTests(unittest.TestCase):
+    """Tests for QueuedSink."""
+
+    def fill(self, overflow: Overflow) -> tuple[BlockedSink, QueuedSink]:
+        """Write 0..4 to a queue of 2 lines in front of a blocked sink."""
+        sink = BlockedSink()
+        queued = QueuedSink(sink, maxsize=2, overflow=overflow)
+        queued.open()
+        queued.write("0")
+        sink.started.wait(10)
+        for line in "1234":
+            queued.write(line)
+        sink.released.set()
+        queued.close()
+        return sink, queued
+
+    def test_drop_newest(self) -> None:
+        """Test that lines that do not fit in the queue are dropped."""
+        sink, queued = self.fill("drop_newest")
+
+        self.assertEqual(sink.lines, ["0", "1", "2"])
+        self.assertEqual(queued.dropped, 2)
+
+    def test_drop_oldest(self) -> None:
+        """Test that the oldest lines make room for new ones."""
+        sink, queued = self.fill("drop_oldest")
+
+        self.assertEqual(sink.lines, ["0", "3", "4"])
+        self.assertEqual(queued.dropped, 2)
+
+    def test_block(self) -> None:
+        """Test that a blocking queue keeps all lines."""
+        sink = BlockedSink()
+        sink.released.set()
+        queued = QueuedSink(sink, maxsize=1)
+
+        queued.open()
+        for line in "01234":
+            queued.write(line)
+        queued.close()
+
+        self.assertEqual(sink.lines, list("01234"))
+        self.assertEqual(queued.dropped, 0)
+
+    def test_error(self) -> None:
+        """Test that an error of the sink is raised when it is closed."""
+
+        def sink(_: str) -> None:
+            raise OSError("disk full")
+
+        queued = QueuedSink(sink, maxsize=1)
+        queued.open()
+        for line in "01234":
+            queued.write(line)
+
+        with self.assertRaisesRegex(OSError, "disk full"):
+            queued.close()
+
+    def test_invalid(self) -> None:
+        """Test that invalid arguments are rejected."""
+        with self.assertRaises(ValueError):
+            QueuedSink(print, maxsize=0)
+        with self.assertRaises(ValueError):
+            QueuedSink(print, overflow="drop")  # pyright: ignore
+
+    def test_stream_subprocess(self) -> None:
+        """Test that a slow sink does not hold back a fast one."""
+        fast = StringIO()
+        slow: list[str] = []
+
+        def sink(line: str) -> None:
+            time.sleep(0.01)
+            slow.append(line)
+
+        queued = QueuedSink(sink, maxsize=10, overflow="drop_newest")
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys\n"
+                "for i in range(1000): print(i); print(i, file=sys.stderr)"
+            ),
+        ]
+
+        return_code = stream_subprocess(command, [fast, queued], queued)
+
+        self.assertEqual(return_code, 0)
+        expected = "".join(f"{i}\n" for i in range(1000))
+        self.assertEqual(fast.getvalue(), expected)
+        self.assertEqual(len(slow) + queued.dropped, 2000)
+        self.assertGreater(queued.dropped, 0)
+
+    def test_line_sink(self) -> None:
+        """Test that a queued sink in a line sink is reused by streams."""
+        lines: list[str] = []
+        sink = LineSink(QueuedSink(lines.append, maxsize=4))
+        command = [sys.executable, "-c", "for i in range(100): print(i)"]
+
+        for _ in range(2):
+            stream_subprocess(command, sink, sink, binary=True)
+
+        expected = [f"{i}\n" for i in range(100)]
+        self.assertEqual(lines, expected * 2)
+
+
+class ProgressSinkTests(unittest.TestCase):
+    """Tests for the coalescing of progress updates."""
+
+    ENGINE = "thread"
+
+    def test_decoder(self) -> None:
+        """Test that a lone carriage return ends a progress update."""
+        decoder = LineDecoder("utf-8", progress=True)
+
+        self.assertEqual(decoder.decode(b"1%\r2%\rdone\r"), ["1%\r", "2%\r"])
+        self.assertEqual(decoder.decode(b"\nnext\r\n"), ["done\n", "next\n"])
+        self.assertEqual(decoder.decode(b"last", final=True), ["last"])
+
+    def test_decoder_long_line(self) -> None:
+        """Test that a line that spans many chunks is joined once."""
+        for progress in [False, True]:
+            decoder = LineDecoder("utf-8", progress=progress)
+
+            for chunk in [b"a", b"b", b"c"]:
+                self.assertEqual(decoder.decode(chunk), [])
+            self.assertEqual(decoder.decode(b"d\ne"), ["abcd\n"])
+            self.assertEqual(decoder.decode(b"f", final=True), ["ef"])
+
+    def test_coalesce(self) -> None:
+        """Test that updates are held back and superseded by lines."""
+        lines: list[str] = []
+        sink = ProgressSink(lines.append, interval=60)
+
+        sink.open()
+        for line in ["1\r", "2\r", "3\r", "done\n", "4\r", "5\r"]:
+            sink.write(line)
+        self.assertEqual(lines, ["1\r", "done\n"])
+        sink.close()
+
+        self.assertEqual(lines, ["1\r", "done\n", "5\r"])
+
+    def test_interval(self) -> None:
+        """Test that a held back update is written once it is due."""
+        lines: list[str] = []
+        sink = ProgressSink(lines.append, interval=0.05)
+
+        sink.open()
+        sink.write("1\r")
+        sink.write("2\r")
+        time.sleep(0.5)
+        self.assertEqual(lines, ["1\r", "2\r"])
+        sink.close()
+
+        self.assertEqual(lines, ["1\r", "2\r"])
+
+    def test_interval_error(self) -> None:
+        """Test that an error of a held back update is raised on close."""
+        lines: list[str] = []
+
+        def sink(line: str) -> None:
+            if lines:
+                raise OSError("write failed")
+            lines.append(line)
+
+        progress = ProgressSink(sink, interval=0.05)
+        progress.open()
+        progress.write("1\r")
+        progress.write("2\r")
+        time.sleep(0.5)
+
+        with self.assertRaisesRegex(OSError, "write failed"):
+            progress.close()
+        self.assertTrue(flush_timer().is_alive())
+
+    def test_line_sink(self) -> None:
+        """Test that a line sink coalesces the updates in its chunks."""
+        lines: list[str] = []
+        sink = LineSink(lines.append, "utf-8", progress=60)
+
+        sink.open()
+        sink.write(b"".join(b"%d\r" % i for i in range(100)) + b"ok\r\n")
+        sink.close()
+
+        self.assertEqual(lines, ["ok\n"])
+
+    def test_stream_subprocess(self) -> None:
+        """Test that progress updates of a subprocess are coalesced."""
+        lines: list[str] = []
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys\n"
+                "for i in range(10000): sys.stdout.write(f'{i}%\\r')\n"
+                "print('done')\n"
+                "sys.stdout.write('1%\\r2%\\r')"
+            ),
+        ]
+
+        return_code = stream_subprocess(
+            command, lines.append, engine=self.ENGINE, progress=60
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(lines[-2:], ["done\n", "2%\r"])
+        self.assertLessEqual(len(lines), 3)
+
+    def test_binary(self) -> None:
+        """Test that progress is rejected in binary mode."""
+        with self.assertRaises(ValueError):
+            stream_subprocess(["true"], binary=True, progress=0.1)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorProgressSinkTests(ProgressSinkTests):
+    """Tests for the coalescing of progress updates using a selector."""
+
+    ENGINE = "selector"
@@ -0,0 +1,276 @@
+import sys
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import BytesIO, StringIO
+
+from pygeneral.process import LineSink, stream_subprocess
+
+
+class StreamSubprocessTests(unittest.TestCase):
+    """Tests for stream_subprocess."""
+
+    ENGINE = "thread"
+
+    def test_stream_subprocess_success(self) -> None:
+        """Test that a successful subprocess streams output correctly."""
+        stdout_buffer = StringIO()
+        stderr_buffer = StringIO()
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; print('Hello World!'); sys.exit(0)",
+        ]
+
+        with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            return_code = stream_subprocess(command, engine=self.ENGINE)
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(stdout_buffer.getvalue(), "Hello World!\n")
+        self.assertEqual(stderr_buffer.getvalue(), "")
+
+    def test_stream_subprocess_failure(self) -> None:
+        """Test that a failing subprocess streams output and returns its code."""
+        stdout_buffer = StringIO()
+        stderr_buffer = StringIO()
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys; sys.stdout.write('Oops\\n'); "
+                "sys.stderr.write('Bad things happened\\n'); sys.exit(3)"
+            ),
+        ]
+
+        with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            return_code = stream_subprocess(command, engine=self.ENGINE)
+
+        self.assertEqual(return_code, 3)
+        self.assertEqual(stdout_buffer.getvalue(), "Oops\n")
+        self.assertEqual(stderr_buffer.getvalue(), "Bad things happened\n")
+
+    def test_stream_subprocess_custom_sinks(self) -> None:
+        """Test that explicit stdout and stderr sinks capture the output."""
+        stdout_buffer = StringIO()
+        stderr_buffer = StringIO()
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys; print('custom stdout'); "
+                "sys.stderr.write('custom stderr\\n'); sys.exit(0)"
+            ),
+        ]
+
+        return_code = stream_subprocess(
+            command,
+            stdout=stdout_buffer,
+            stderr=stderr_buffer,
+            engine=self.ENGINE,
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(stdout_buffer.getvalue(), "custom stdout\n")
+        self.assertEqual(stderr_buffer.getvalue(), "custom stderr\n")
+
+    def test_stream_subprocess_multiple_stdout_targets(self) -> None:
+        """Test that multiple stdout targets each receive the same output."""
+        first_buffer = StringIO()
+        second_buffer = StringIO()
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; print('fan out'); sys.exit(0)",
+        ]
+
+        return_code = stream_subprocess(
+            command, stdout=[first_buffer, second_buffer], engine=self.ENGINE
+        )
+
+        self.assertEqual(return_code, 0)
+        expected_output = "fan out\n"
+        self.assertEqual(first_buffer.getvalue(), expected_output)
+        self.assertEqual(second_buffer.getvalue(), expected_output)
+
+    def test_stream_subprocess_callable_sink(self) -> None:
+        """Test that a callable sink receives each stdout line."""
+        captured: list[str] = []
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; print('callable sink'); sys.exit(0)",
+        ]
+
+        return_code = stream_subprocess(
+            command, stdout=captured.append, engine=self.ENGINE
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(captured, ["callable sink\n"])
+
+    def test_stream_subprocess_newlines(self) -> None:
+        """Test that newlines are translated and a last partial line is kept."""
+        captured: list[str] = []
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.buffer.write(b'a\\r\\nb\\rc')",
+        ]
+
+        return_code = stream_subprocess(
+            command, stdout=captured.append, engine=self.ENGINE
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(captured, ["a\n", "b\n", "c"])
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorStreamSubprocessTests(StreamSubprocessTests):
+    """Tests for stream_subprocess using the selector engine."""
+
+    ENGINE = "selector"
+
+    def test_stream_subprocess_no_threads(self) -> None:
+        """Test that the selector engine does not start threads."""
+        counts: list[int] = []
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; print('x'); sys.stderr.write('y\\n')",
+        ]
+
+        stream_subprocess(
+            command,
+            stdout=lambda _: counts.append(threading.active_count()),
+            stderr=lambda _: counts.append(threading.active_count()),
+            engine=self.ENGINE,
+        )
+
+        self.assertEqual(counts, [threading.active_count()] * 2)
+
+    def test_stream_subprocess_large_output(self) -> None:
+        """Test that output larger than a pipe buffer is streamed in order."""
+        captured: list[str] = []
+        command = [
+            sys.executable,
+            "-c",
+            (
+                "import sys\n"
+                "for i in range(100000):\n"
+                "    print(i)\n"
+                "    sys.stderr.write(f'{i}\\n')"
+            ),
+        ]
+
+        return_code = stream_subprocess(
+            command,
+            stdout=captured.append,
+            stderr=lambda _: None,
+            engine=self.ENGINE,
+        )
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(captured, [f"{i}\n" for i in range(100000)])
+
+
+class BinaryStreamSubprocessTests(unittest.TestCase):
+    """Tests for the binary mode of stream_subprocess."""
+
+    ENGINE = "thread"
+    COMMAND = [
+        sys.executable,
+        "-c",
+        (
+            "import sys\n"
+            "for i in range(100000):\n"
+            "    print(i)\n"
+            "sys.stdout.write('tail')\n"
+            "sys.stderr.write('err\\r\\n')\n"
+            "sys.exit(4)"
+        ),
+    ]
+    EXPECTED = "".join(f"{i}\n" for i in range(100000)) + "tail"
+
+    def test_chunks(self) -> None:
+        """Test that sinks receive the output as chunks of bytes."""
+        chunks: list[bytes] = []
+        stderr = BytesIO()
+
+        return_code = stream_subprocess(
+            self.COMMAND,
+            stdout=chunks.append,
+            stderr=stderr,
+            engine=self.ENGINE,
+            binary=True,
+        )
+
+        self.assertEqual(return_code, 4)
+        self.assertLess(len(chunks), 100000)
+        self.assertEqual(b"".join(chunks), self.EXPECTED.encode())
+        self.assertEqual(stderr.getvalue(), b"err\r\n")
+
+    def test_line_sink(self) -> None:
+        """Test that a line sink receives decoded lines."""
+        lines: list[str] = []
+        stderr = StringIO()
+
+        stream_subprocess(
+            self.COMMAND,
+            stdout=[BytesIO(), LineSink(lines.append)],
+            stderr=LineSink(stderr),
+            engine=self.ENGINE,
+            binary=True,
+        )
+
+        self.assertEqual(len(lines), 100001)
+        self.assertEqual("".join(lines), self.EXPECTED)
+        self.assertEqual(stderr.getvalue(), "err\n")
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorBinaryStreamSubprocessTests(BinaryStreamSubprocessTests):
+    """Tests for the binary mode of stream_subprocess using a selector."""
+
+    ENGINE = "selector"
+
+
+class SinkErrorTests(unittest.TestCase):
+    """Tests for sinks that raise while stream_subprocess is running."""
+
+    ENGINE = "thread"
+    COMMAND = [sys.executable, "-c", "for i in range(2000000): print(i)"]
+
+    def stream(self, **kwargs) -> None:
+        """Stream `COMMAND` to a sink that fails on its first write."""
+
+        def fail(_: str | bytes) -> None:
+            raise RuntimeError("sink failed")
+
+        kwargs.setdefault("stderr", StringIO())
+        with self.assertRaisesRegex(RuntimeError, "sink failed"):
+            stream_subprocess(self.COMMAND, fail, engine=self.ENGINE, **kwargs)
+
+    def test_text(self) -> None:
+        """Test that the error of a text sink is raised."""
+        self.stream()
+
+    def test_binary(self) -> None:
+        """Test that the error of a binary sink is raised."""
+        self.stream(binary=True, stderr=BytesIO())
+
+    def test_progress(self) -> None:
+        """Test that the error of a sink of progress updates is raised."""
+        self.stream(progress=0.1)
+
+    @unittest.skipIf(sys.platform == "win32", "pseudo-terminals are POSIX only")
+    def test_pty(self) -> None:
+        """Test that the error of a sink of a pseudo-terminal is raised."""
+        self.stream(pty=True)
+
+
+@unittest.skipIf(sys.platform == "win32", "selectors do not support pipes")
+class SelectorSinkErrorTests(SinkErrorTests):
+    """Tests for sinks that raise using the selector engine."""
+
+    ENGINE = "selector"
@@ -0,0 +1,105 @@
+import sys
+import time
+import unittest
+from io import BytesIO, StringIO
+
+from pygeneral.process import stream_subprocess
+
+ISATTY = [
+    sys.executable,
+    "-c",
+    (
+        "import sys\n"
+        "print(sys.stdout.isatty())\n"
+        "print(sys.stderr.isatty(), file=sys.stderr)\n"
+        "sys.exit(2)"
+    ),
+]
+
+
+@unittest.skipIf(sys.platform == "win32", "pseudo-terminals are POSIX only")
+class PtyTests(unittest.TestCase):
+    """Tests for the pseudo-terminal mode of stream_subprocess."""
+
+    ENGINE = "thread"
+    BINARY = False
+
+    def stream(self, command: list[str], **kwargs):
+        """Stream `command` and return its return code and output."""
+        sink = BytesIO if self.BINARY else StringIO
+        stdout, stderr = sink(), sink()
+        return_code = stream_subprocess(
+            command,
+            stdout,
+            stderr,
+            engine=self.ENGINE,
+            binary=self.BINARY,
+            **kwargs,
+        )
+        output = [
+            value.decode() if isinstance(value, bytes) else value
+            for value in (stdout.getvalue(), stderr.getvalue())
+        ]
+        return return_code, *output
+
+    def test_split(self) -> None:
+        """Test that stdout and stderr are separate terminals."""
+        return_code, stdout, stderr = self.stream(ISATTY, pty=True)
+
+        self.assertEqual(return_code, 2)
+        self.assertEqual(stdout, "True\n")
+        self.assertEqual(stderr, "True\n")
+
+    def test_merged(self) -> None:
+        """Test that a merged terminal sends all output to stdout."""
+        return_code, stdout, stderr = self.stream(ISATTY, pty="merged")
+
+        self.assertEqual(return_code, 2)
+        self.assertEqual(stdout, "True\nTrue\n")
+        self.assertEqual(stderr, "")
+
+    def test_large_output(self) -> None:
+        """Test that all output is read before the end of file."""
+        command = [
+            sys.executable,
+            "-c",
+            "for i in range(100000): print(i)",
+        ]
+
+        _, stdout, _ = self.stream(command, pty=True)
+
+        self.assertEqual(stdout, "".join(f"{i}\n" for i in range(100000)))
+
+    def test_latency(self) -> None:
+        """Test that lines arrive while the subprocess is still running."""
+        command = [
+            sys.executable,
+            "-c",
+            "import time; print('ready'); time.sleep(1)",
+        ]
+        arrivals: list[float] = []
+        start = time.monotonic()
+
+        stream_subprocess(
+            command,
+            lambda _: arrivals.append(time.monotonic()),
+            StringIO(),
+            engine=self.ENGINE,
+            pty=True,
+        )
+
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertEqual(len(arrivals), 1)
+        self.assertLess(arrivals[0] - start, 0.9)
+
+
+class SelectorPtyTests(PtyTests):
+    """Tests for the pseudo-terminal mode using the selector engine."""
+
+    ENGINE = "selector"
+
+
+class BinaryPtyTests(PtyTests):
+    """Tests for the pseudo-terminal mode in binary mode."""
+
+    BINARY = True
@@ -0,0 +1,172 @@
+import mmap
+import pickle
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tempfile import TemporaryFile
+from unittest import TestCase
+from unittest.mock import patch
+
+from pygeneral.sort import (
+    LenSortedBuffer,
+    LenSorter,
+    _split_chunks,
+    lensort,
+    lensort_bytes,
+    lensort_many,
+    lensort_stream,
+)
+
+
+def _make_lines(count: int, seed: int = 0) -> list[str]:
+    """Return `count` random lines, some of which have no `=` in them."""
+    rng = random.Random(seed)
+    lines: list[str] = []
+    for _ in range(count):
+        name = "x" * rng.randint(0, 12)
+        value = "y" * rng.randint(0, 12)
+        separator = rng.choice(["=", " = ", "==", ""])
+        lines.append(f"{name}{separator}{value}")
+    return lines
+
+
+class TestLenSortStream(TestCase):
+    def test_in_memory(self):
+        lines = _make_lines(1000)
+        expected = lensort("\n".join(lines), "=")
+        actual = "\n".join(lensort_stream(lines, "="))
+        self.assertEqual(expected, actual)
+
+    def test_spilled(self):
+        text = "\n".join(_make_lines(5000))
+        expected = lensort(text, "=")
+        lines = text.splitlines(keepends=True)
+        actual = "\n".join(lensort_stream(lines, "=", buffer_size=4096))
+        self.assertEqual(expected, actual)
+
+    def test_empty_lines(self):
+        lines = ["a = 1\n", "\n", "bb = 2\r\n", "\n"]
+        expected = lensort("".join(lines), "=")
+        self.assertEqual(expected, "\n".join(lensort_stream(lines, "=")))
+
+
+class TestLenSort(TestCase):
+    @staticmethod
+    def two_pass(lines: str, regex: str) -> str:
+        """The original implementation of `lensort`."""
+        as_list = lines.splitlines()
+        as_list.sort(key=len)
+        as_list.sort(
+            key=lambda x: m.start() if (m := re.search(regex, x)) else 0
+        )
+        return "\n".join(as_list)
+
+    def test_two_pass(self):
+        text = "\n".join(_make_lines(5000))
+        for regex in ["=", "y+", "^x", "$"]:
+            self.assertEqual(self.two_pass(text, regex), lensort(text, regex))
+
+    def test_small(self):
+        lines = _make_lines(200)
+        for count in [1, 2, 10, 64, 65, 200]:
+            text = "\n".join(lines[:count])
+            self.assertEqual(self.two_pass(text, "="), lensort(text, "="))
+
+    def test_empty(self):
+        self.assertEqual("", lensort("", "="))
+
+
+class TestLenSortParallel(TestCase):
+    def test_split_chunks(self):
+        text = "\n".join(_make_lines(1000)) + "\r\n\n"
+        chunks = _split_chunks(text, 7)
+        self.assertEqual(7, len(chunks))
+        self.assertEqual(text, "".join(chunks))
+        lines = [line for chunk in chunks for line in chunk.splitlines()]
+        self.assertEqual(text.splitlines(), lines)
+
+    def test_parallel(self):
+        text = "\n".join(_make_lines(5000))
+        expected = lensort(text, "=")
+        with patch("pygeneral.sort._PARALLEL_THRESHOLD", 0):
+            self.assertEqual(expected, lensort(text, "=", workers=3))
+
+
+class TestLenSortBytes(TestCase):
+    def test_bytes(self):
+        text = "\r\n".join(_make_lines(1000)) + "\n\nx = 1"
+        expected = lensort(text, "=")
+        actual = b"\n".join(lensort_bytes(text.encode(), b"="))
+        self.assertEqual(expected.encode(), actual)
+
+    def test_edges(self):
+        for data in [b"", b"\n", b"a", b"a = 1\n", b"\n\na = 1\r\n\r\n"]:
+            expected = lensort(data.decode(), "=").encode()
+            self.assertEqual(expected, b"\n".join(lensort_bytes(data, b"=")))
+
+    def test_mmap(self):
+        data = "\n".join(_make_lines(1000)).encode()
+        with TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                actual = b"\n".join(lensort_bytes(mm, b"="))
+        self.assertEqual(lensort(data.decode(), "=").encode(), actual)
+
+
+class TestLenSortLimit(TestCase):
+    def test_limit(self):
+        text = "\n".join(_make_lines(2000))
+        expected = lensort(text, "=").splitlines()
+        for limit in [0, 1, 50, 5000]:
+            self.assertEqual(
+                "\n".join(expected[:limit]), lensort(text, "=", limit=limit)
+            )
+            streamed = lensort_stream(text.splitlines(), "=", limit=limit)
+            self.assertEqual(expected[:limit], list(streamed))
+            data = lensort_bytes(text.encode(), b"=", limit=limit)
+            self.assertEqual(expected[:limit], [x.decode() for x in data])
+
+
+class TestLenSortedBuffer(TestCase):
+    def test_render(self):
+        lines = _make_lines(5000)
+        buffer = LenSortedBuffer("=", load=16)
+        for count, line in enumerate(lines, 1):
+            buffer.add(line)
+            if count % 1000 == 0:
+                expected = lensort("\n".join(lines[:count]), "=")
+                self.assertEqual(expected, buffer.render())
+                self.assertEqual(count, len(buffer))
+
+    def test_extend(self):
+        text = "\n".join(_make_lines(100))
+        buffer = LenSortedBuffer("=", text.splitlines(keepends=True))
+        self.assertEqual(lensort(text, "="), buffer.render())
+        buffer.clear()
+        self.assertEqual(0, len(buffer))
+        self.assertEqual([], list(buffer))
+
+
+class TestLenSorter(TestCase):
+    def setUp(self):
+        lines = _make_lines(1000)
+        self.texts = ["\n".join(lines[i : i + 40]) for i in range(0, 1000, 40)]
+        self.expected = [lensort(text, "=") for text in self.texts]
+
+    def test_sort_many(self):
+        self.assertEqual(self.expected, lensort_many(self.texts, "="))
+        self.assertEqual(self.expected, LenSorter("=").sort_many(self.texts))
+
+    def test_executors(self):
+        sorter = LenSorter(re.compile("="))
+        with ThreadPoolExecutor(2) as executor:
+            actual = sorter.sort_many(self.texts, executor)
+        self.assertEqual(self.expected, actual)
+        with ProcessPoolExecutor(2) as executor:
+            actual = sorter.sort_many(self.texts, executor, chunksize=8)
+        self.assertEqual(self.expected, actual)
+
+    def test_pickle(self):
+        sorter = pickle.loads(pickle.dumps(LenSorter("=")))
+        self.assertEqual(self.expected[0], sorter.sort(self.texts[0]))